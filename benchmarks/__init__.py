@@ -0,0 +1,9 @@
+"""
+metabarcoding_taxonomy 벤치마크 모음
+
+    synthetic            합성 level-1..N CSV 생성기
+    stages               MetabarcodingWorkflow 공개 단계별 시간·메모리 (결과 JSON 비교)
+    sparse_backend       dense vs sparse backend
+    supplementary_render Supplementary 바플롯 renderer 비교
+    import_time          import 시간 예산 검사
+"""
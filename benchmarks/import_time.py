@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+import 시간 예산 검사 (python -X importtime)
+각 문장을 새 인터프리터에서 실행해 누적 import 시간과 로드된 무거운 모듈을
+확인하고, 예산을 넘거나 금지된 모듈이 로드되면 종료 코드 1
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --repeat 5 --scale 2   # 느린 CI 머신
+"""
+from __future__ import annotations
+import argparse, os, re, subprocess, sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (문장, 예산 대상, 예산 ms, 로드되면 안 되는 모듈)
+#   total: 해당 문장의 전체 import 시간 / own: 우리 패키지 모듈 자체 시간만
+BUDGETS = (
+    ("import metabarcoding_taxonomy", "total", 50, ("pandas", "matplotlib", "scipy")),
+    ("import metabarcoding_taxonomy.cli", "total", 50, ("pandas", "matplotlib", "scipy")),
+    ("from metabarcoding_taxonomy import TaxonomyFilter", "own", 100,
+     ("matplotlib", "scipy")),
+    ("from metabarcoding_taxonomy import TaxonomyStatistics", "own", 100,
+     ("matplotlib", "scipy")),
+)
+
+_LINE_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def measure(stmt: str) -> tuple[float, float, set[str]]:
+    """(패키지 자체 ms, 전체 ms, 로드된 최상위 모듈)"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", stmt],
+                          cwd=ROOT, capture_output=True, text=True, check=True)
+    own = total = 0
+    loaded = set()
+    for line in proc.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if not m:
+            continue
+        self_us, cum_us, indent, name = int(m[1]), int(m[2]), m[3], m[4]
+        loaded.add(name.split(".")[0])
+        if name.startswith("metabarcoding_taxonomy"):
+            own += self_us
+        if len(indent) == 1:   # 최상위 import
+            total += cum_us
+    return own / 1000, total / 1000, loaded
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--repeat", type=int, default=3, help="best of N runs")
+    ap.add_argument("--scale", type=float, default=1.0, help="multiply budgets")
+    args = ap.parse_args()
+
+    failed = False
+    print(f"{'statement':<56}{'own ms':>9}{'total ms':>10}{'budget':>8}")
+    for stmt, metric, budget, forbidden in BUDGETS:
+        runs = [measure(stmt) for _ in range(args.repeat)]
+        own = min(r[0] for r in runs)
+        total = min(r[1] for r in runs)
+        loaded = set.union(*(r[2] for r in runs))
+        bad = sorted(loaded.intersection(forbidden))
+        over = (total if metric == "total" else own) > budget * args.scale
+        status = "FAIL" if over or bad else "ok"
+        print(f"{stmt:<56}{own:>9.1f}{total:>10.1f}"
+              f"{budget * args.scale:>7.0f} {metric[0]}  {status}"
+              + (f"  loaded {', '.join(bad)}" if bad else ""))
+        failed |= status == "FAIL"
+    return int(failed)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
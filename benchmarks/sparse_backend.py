@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+dense vs sparse backend 벤치마크
+합성 level 테이블(기본 100k taxon 열, 5 샘플, 0 비율 97%)에서
+filter_and_truncate · compute_unclassified_stats · 상대 풍부도 단계의
+실행 시간과 peak 메모리(tracemalloc)를 비교
+
+    python -m benchmarks.sparse_backend --taxa 100000 --samples 5
+"""
+from __future__ import annotations
+import argparse, logging, os, sys, tempfile, time, tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from metabarcoding_taxonomy import TaxonomyStatistics  # noqa: E402
+from benchmarks.synthetic import (add_spec_arguments, spec_from_args,  # noqa: E402
+                                  write_synthetic_levels)
+
+
+def run_stages(input_dir: str, backend: str) -> dict[str, tuple[float, float]]:
+    """단계별 (초, peak MiB)"""
+    results = {}
+    wf = TaxonomyStatistics(input_dir=input_dir, backend=backend,
+                            write_outputs=False, level_labels=["Species"])
+
+    def measure(name, fn):
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        out = fn()
+        elapsed = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[name] = (elapsed, peak / 2**20)
+        return out
+
+    lvl, fp = wf.level_names[0], wf.file_paths[0]
+    table = measure("load", lambda: wf.load_level(lvl))
+    result = measure("filter_and_truncate", lambda: wf.filter_and_truncate(table, fp))
+    measure("compute_unclassified_stats", wf.compute_unclassified_stats)
+    measure("relative_abundance", result.truncated.relative_abundance)
+    results["resident counts"] = (float("nan"), table.nbytes / 2**20)
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_spec_arguments(ap, taxa=100_000, samples=5, zero_frac=0.97)
+    args = ap.parse_args()
+    logging.getLogger("metabarcoding_taxonomy").setLevel(logging.WARNING)
+    spec = spec_from_args(args)
+    import scipy.sparse  # noqa: F401 — 첫 import 시간이 sparse load 에 섞이지 않도록
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_synthetic_levels(tmp, spec, levels=[spec.depth])   # 가장 깊은 level 만
+        rows = {b: run_stages(tmp, b) for b in ("dense", "sparse")}
+
+    print(f"{args.samples} samples × {args.taxa} taxa, zero fraction {args.zero_frac}")
+    print(f"{'stage':<28}{'dense s':>10}{'sparse s':>10}{'dense MiB':>12}{'sparse MiB':>12}")
+    for stage in rows["dense"]:
+        (dt, dm), (st, sm) = rows["dense"][stage], rows["sparse"][stage]
+        print(f"{stage:<28}{dt:>10.3f}{st:>10.3f}{dm:>12.1f}{sm:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MetabarcodingWorkflow 공개 단계별 벤치마크
+합성 level-1..N 데이터에서 각 단계를 새 인스턴스로 repeat 번 실행해 시간(최솟값·
+중앙값)을, 한 번 더 tracemalloc 아래에서 실행해 peak 메모리를 재고 결과를 JSON
+으로 저장 — 다른 커밋의 결과 파일과 --compare 로 비교
+
+    python -m benchmarks.stages --taxa 20000 --samples 12
+    python -m benchmarks.stages --compare benchmarks/results/abc1234.json
+"""
+from __future__ import annotations
+import argparse, json, logging, os, platform, statistics, subprocess, sys
+import tempfile, time, tracemalloc
+from typing import Callable, NamedTuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from benchmarks.synthetic import (add_spec_arguments, spec_from_args,  # noqa: E402
+                                  write_synthetic_levels)
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+RESULTS_VERSION = 1
+
+
+class Scenario(NamedTuple):
+    """setup 은 측정 전에 필요한 선행 단계, run 이 측정 대상"""
+    name: str
+    setup: Callable
+    run: Callable
+
+
+def _preload(wf):
+    for lvl in wf.level_names:
+        wf.load_level(lvl)
+
+
+def _filtered(wf):
+    _preload(wf)
+    wf.process_all_files()
+
+
+SCENARIOS = (
+    Scenario("load_level", lambda wf: None, _preload),
+    Scenario("process_all_files", _preload, lambda wf: wf.process_all_files()),
+    Scenario("compute_unclassified_stats", _preload,
+             lambda wf: wf.compute_unclassified_stats()),
+    Scenario("compute_taxa_counts", _preload, lambda wf: wf.compute_taxa_counts()),
+    Scenario("compute_alpha_diversity", _preload,
+             lambda wf: wf.compute_alpha_diversity()),
+    Scenario("compute_beta_diversity", _preload,
+             lambda wf: [wf.compute_beta_diversity(m) for m in ("braycurtis", "jaccard")]),
+    Scenario("rarefy_levels", _preload, lambda wf: wf.rarefy_levels(iterations=20)),
+    Scenario("plot_well_classified", lambda wf: wf.compute_unclassified_stats(),
+             lambda wf: wf.plot_well_classified()),
+    Scenario("plot_taxa_retained", lambda wf: wf.compute_taxa_counts(),
+             lambda wf: wf.plot_taxa_retained(wf.taxa_count_df)),
+    Scenario("plot_cumulative_barplots", _filtered,
+             lambda wf: wf.plot_cumulative_barplots()),
+    Scenario("supplementary_figure_all_details", _filtered,
+             lambda wf: wf.supplementary_figure_all_details()),
+    Scenario("run_all", lambda wf: None, lambda wf: wf.run_all()),
+)
+
+
+def _workflow(input_dir: str, options: dict):
+    from metabarcoding_taxonomy import MetabarcodingWorkflow
+    return MetabarcodingWorkflow(input_dir=input_dir, incremental=False, **options)
+
+
+def measure(scenario: Scenario, input_dir: str, options: dict,
+            repeat: int) -> dict:
+    """{"seconds": 최솟값, "median_s", "runs": [...], "peak_mib"}"""
+    runs = []
+    for _ in range(repeat):
+        wf = _workflow(input_dir, options)
+        scenario.setup(wf)
+        t0 = time.perf_counter()
+        scenario.run(wf)
+        runs.append(time.perf_counter() - t0)
+
+    wf = _workflow(input_dir, options)
+    scenario.setup(wf)
+    tracemalloc.start()
+    scenario.run(wf)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": round(min(runs), 6),
+            "median_s": round(statistics.median(runs), 6),
+            "runs": [round(r, 6) for r in runs],
+            "peak_mib": round(peak / 2**20, 3)}
+
+
+def _git_revision() -> tuple[str, bool]:
+    """(짧은 커밋 해시, 작업 트리 변경 여부) — git 이 없으면 ("unknown", False)"""
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               cwd=ROOT, capture_output=True, text=True,
+                               check=True).stdout.strip()
+        return rev, bool(dirty)
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+def compare(base: dict, current: dict, threshold: float) -> bool:
+    """단계별 시간·메모리 비율 출력 — threshold 배를 넘는 단계가 있으면 True"""
+    if base.get("spec") != current["spec"] or base.get("options") != current["options"]:
+        print("warning: baseline was measured with different data or options")
+    print(f"\nvs {base.get('commit', '?')}")
+    print(f"{'stage':<36}{'base s':>10}{'now s':>10}{'ratio':>8}"
+          f"{'base MiB':>10}{'now MiB':>10}")
+    regressed = False
+    for name, now in current["results"].items():
+        old = base.get("results", {}).get(name)
+        if old is None:
+            print(f"{name:<36}{'—':>10}{now['seconds']:>10.3f}")
+            continue
+        ratio = now["seconds"] / old["seconds"] if old["seconds"] else float("inf")
+        flag = "  SLOWER" if ratio > threshold else ""
+        regressed |= bool(flag)
+        print(f"{name:<36}{old['seconds']:>10.3f}{now['seconds']:>10.3f}{ratio:>8.2f}"
+              f"{old['peak_mib']:>10.1f}{now['peak_mib']:>10.1f}{flag}")
+    return regressed
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_spec_arguments(ap)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--stages", nargs="+", metavar="STAGE",
+                    choices=[s.name for s in SCENARIOS],
+                    help="subset of stages (default: all)")
+    ap.add_argument("--backend", default="dense")
+    ap.add_argument("--chunksize", type=int)
+    ap.add_argument("--derive-levels", action="store_true")
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--figure-format", default="pdf")
+    ap.add_argument("--preview", action="store_true")
+    ap.add_argument("--output", help="results JSON (default: benchmarks/results/"
+                                     "<commit>.json, ignored by git)")
+    ap.add_argument("--compare", metavar="BASE_JSON",
+                    help="results file from another commit to compare against")
+    ap.add_argument("--threshold", type=float, default=1.2,
+                    help="with --compare, exit 1 if a stage is this much slower")
+    args = ap.parse_args()
+    logging.getLogger("metabarcoding_taxonomy").setLevel(logging.WARNING)
+    logging.getLogger("matplotlib.font_manager").setLevel(logging.ERROR)
+
+    spec = spec_from_args(args)
+    options = {"backend": args.backend, "chunksize": args.chunksize,
+               "derive_levels": args.derive_levels, "workers": args.workers,
+               "figure_format": args.figure_format, "preview": args.preview}
+    scenarios = [s for s in SCENARIOS if not args.stages or s.name in args.stages]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        write_synthetic_levels(tmp, spec)
+        for scenario in scenarios:
+            results[scenario.name] = measure(scenario, tmp, options, args.repeat)
+            r = results[scenario.name]
+            print(f"{scenario.name:<36}{r['seconds']:>9.3f}s"
+                  f"{r['median_s']:>9.3f}s (median){r['peak_mib']:>10.1f} MiB")
+
+    import numpy, pandas, matplotlib
+    commit, dirty = _git_revision()
+    current = {
+        "version": RESULTS_VERSION, "commit": commit, "dirty": dirty,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(), "platform": platform.platform(),
+        "packages": {m.__name__: m.__version__ for m in (numpy, pandas, matplotlib)},
+        "spec": spec._asdict(), "options": options, "repeat": args.repeat,
+        "results": results,
+    }
+    out = args.output or os.path.join(RESULTS_DIR,
+                                      f"{commit}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as fh:
+        json.dump(current, fh, indent=1)
+    print(f"results → {out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            return int(compare(json.load(fh), current, args.threshold))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
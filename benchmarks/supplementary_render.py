@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Supplementary 바플롯 renderer 벤치마크
+합성 level 테이블(기본 5k taxon 열, 6 샘플)에서 _single_barplot_full 을
+renderer="bars" · "collection" · "collection"+rasterize 로 그려
+렌더링 시간과 PDF 크기를 비교
+
+    python -m benchmarks.supplementary_render --taxa 5000 --samples 6
+"""
+from __future__ import annotations
+import argparse, logging, os, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from metabarcoding_taxonomy import TaxonomyVisualizer  # noqa: E402
+from benchmarks.synthetic import (add_spec_arguments, spec_from_args,  # noqa: E402
+                                  write_synthetic_levels)
+
+MODES = (("bars", False), ("collection", False), ("collection", True))
+
+
+def render(input_dir: str, renderer: str, rasterize: bool) -> tuple[float, float]:
+    """(초, PDF KiB)"""
+    wf = TaxonomyVisualizer(input_dir=input_dir, write_outputs=False,
+                            level_labels=["Species"])
+    lvl, fp = wf.level_names[0], wf.file_paths[0]
+    table = wf.truncated_table(lvl, fp)
+
+    t0 = time.perf_counter()
+    fig = wf._single_barplot_full(lvl, table, 450, renderer=renderer,
+                                  rasterize=rasterize)
+    pdf = wf.figures.to_bytes(fig)     # write_outputs=False → 파일 없이 바이트로
+    elapsed = time.perf_counter() - t0
+    return elapsed, len(pdf) / 1024
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_spec_arguments(ap, taxa=5_000, samples=6, zero_frac=0.5)
+    args = ap.parse_args()
+    logging.getLogger("metabarcoding_taxonomy").setLevel(logging.WARNING)
+    logging.getLogger("matplotlib.font_manager").setLevel(logging.ERROR)
+    spec = spec_from_args(args)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_synthetic_levels(tmp, spec, levels=[spec.depth])
+        rows = {(r, ras): render(tmp, r, ras) for r, ras in MODES}
+
+    print(f"{args.samples} samples × {args.taxa} taxa, zero fraction {args.zero_frac}")
+    print(f"{'renderer':<24}{'seconds':>10}{'PDF KiB':>12}")
+    for (r, ras), (sec, kib) in rows.items():
+        name = f"{r}{' + rasterize' if ras else ''}"
+        print(f"{name:<24}{sec:>10.2f}{kib:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+합성 level-1..N CSV 생성기
+깊이 depth 의 계통 트리를 만들고 가장 깊은 level 의 카운트를 상위 level 로
+합쳐 QIIME2 collapse 결과처럼 서로 일관된 level 파일을 씀
+
+    python -m benchmarks.synthetic OUT_DIR --taxa 20000 --samples 12
+"""
+from __future__ import annotations
+import argparse, os
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+
+RANKS = ("k", "p", "c", "o", "f", "g", "s")
+# 노이즈 라벨 종류 (rank 접두사 뒤에 붙음, "__" 는 빈 rank)
+NOISE_LABELS = ("uncultured_bacterium", "Incertae_Sedis", "__")
+
+
+class SyntheticSpec(NamedTuple):
+    """
+    taxa       : 가장 깊은 level 의 taxon 열 수 (중복 계통이 합쳐져 약간 줄 수 있음)
+    samples    : 샘플(행) 수
+    zero_frac  : 가장 깊은 level 카운트 중 0 의 비율 (sparsity)
+    noise_frac : rank 마다 노드가 uncultured / incertae / "__" 라벨일 확률
+                 ("__" 노드의 하위 rank 는 모두 "__")
+    depth      : level 수 (1‥7)
+    """
+    taxa: int = 2_000
+    samples: int = 6
+    zero_frac: float = 0.8
+    noise_frac: float = 0.1
+    depth: int = 7
+    seed: int = 0
+
+
+def _tree(spec: SyntheticSpec, rng: np.random.Generator) -> list[np.ndarray]:
+    """rank 별 노드의 부모 인덱스 (rank 0 은 -1) — 노드 수는 taxa 의 거듭제곱으로 증가"""
+    sizes = [max(1, round(spec.taxa ** ((d + 1) / spec.depth)))
+             for d in range(spec.depth)]
+    parents = [np.full(sizes[0], -1)]
+    for d in range(1, spec.depth):
+        n_up, n = sizes[d - 1], max(sizes[d], sizes[d - 1])
+        # 모든 상위 노드가 자식을 하나 이상 갖도록
+        parents.append(np.sort(np.concatenate(
+            [np.arange(n_up), rng.integers(0, n_up, n - n_up)])))
+    return parents
+
+
+def _labels(spec: SyntheticSpec, parents: list[np.ndarray],
+            rng: np.random.Generator) -> list[np.ndarray]:
+    """rank 별 노드 세그먼트 ("g__Abcdef", "g__uncultured_bacterium", "__" …)"""
+    labels = []
+    for d, parent in enumerate(parents):
+        n = len(parent)
+        letters = (rng.integers(0, 26, size=(n, 6)) + ord("a")).astype(np.uint8)
+        names = np.array([f"{RANKS[d]}__" + bytes(row).decode().capitalize()
+                          for row in letters], dtype=object)
+        if d:   # Kingdom 은 항상 정상 라벨
+            noisy = rng.random(n) < spec.noise_frac
+            kinds = rng.integers(0, len(NOISE_LABELS), n)
+            for i in np.flatnonzero(noisy):
+                kind = NOISE_LABELS[kinds[i]]
+                names[i] = kind if kind == "__" else f"{RANKS[d]}__{kind}"
+            names[labels[-1][parent] == "__"] = "__"
+        labels.append(names)
+    return labels
+
+
+def _lineages(parents: list[np.ndarray], labels: list[np.ndarray]) -> list[np.ndarray]:
+    """rank 별 노드의 전체 계통 문자열"""
+    lineages = [labels[0]]
+    for d in range(1, len(parents)):
+        up = lineages[-1][parents[d]]
+        lineages.append(np.array([f"{u};{s}" for u, s in zip(up, labels[d])],
+                                 dtype=object))
+    return lineages
+
+
+def _collapse(counts: np.ndarray, names: np.ndarray) -> pd.DataFrame:
+    """같은 계통 문자열 열을 합침 (처음 등장 순서)"""
+    codes, uniques = pd.factorize(names)
+    out = np.zeros((counts.shape[0], len(uniques)), dtype=counts.dtype)
+    np.add.at(out.T, codes, counts.T)
+    return pd.DataFrame(out, columns=uniques)
+
+
+def synthetic_tables(spec: SyntheticSpec) -> dict[int, pd.DataFrame]:
+    """{level 번호: 샘플 × taxon 카운트 DataFrame (index=샘플 이름)}"""
+    if not 1 <= spec.depth <= len(RANKS):
+        raise ValueError(f"depth must be between 1 and {len(RANKS)}")
+    rng = np.random.default_rng(spec.seed)
+    parents = _tree(spec, rng)
+    lineages = _lineages(parents, _labels(spec, parents, rng))
+
+    n_leaf = len(parents[-1])
+    # 열마다 평균 풍부도가 다른 로그정규 카운트 (소수 우점종 + 긴 꼬리)
+    scale = rng.lognormal(3, 1.5, size=n_leaf)
+    counts = rng.poisson(scale, size=(spec.samples, n_leaf)).astype(np.int64)
+    counts[rng.random(counts.shape) < spec.zero_frac] = 0
+    samples = pd.Index([f"{h}H" for h in range(0, 6 * spec.samples, 6)],
+                       name="index")
+
+    # 각 leaf 의 rank 별 조상 → level d 테이블 = leaf 카운트를 조상 계통으로 합침
+    tables, ancestor = {}, np.arange(n_leaf)
+    for d in range(spec.depth - 1, -1, -1):
+        df = _collapse(counts, lineages[d][ancestor])
+        df.index = samples
+        tables[d + 1] = df
+        ancestor = parents[d][ancestor]
+    return dict(sorted(tables.items()))
+
+
+def write_synthetic_levels(out_dir: str, spec: SyntheticSpec = SyntheticSpec(),
+                           levels=None) -> list[str]:
+    """out_dir/level-N.csv 를 쓰고 경로 목록을 돌려줌 (levels 로 일부만 가능)"""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for n, df in synthetic_tables(spec).items():
+        if levels is not None and n not in levels:
+            continue
+        fp = os.path.join(out_dir, f"level-{n}.csv")
+        df.to_csv(fp)
+        paths.append(fp)
+    return paths
+
+
+def add_spec_arguments(ap: argparse.ArgumentParser, **defaults):
+    """SyntheticSpec 필드를 명령행 옵션으로 (defaults 로 기본값 변경)"""
+    spec = SyntheticSpec()._replace(**defaults)
+    ap.add_argument("--taxa", type=int, default=spec.taxa,
+                    help="taxon columns at the deepest level")
+    ap.add_argument("--samples", type=int, default=spec.samples)
+    ap.add_argument("--zero-frac", type=float, default=spec.zero_frac,
+                    help="fraction of zero counts (sparsity)")
+    ap.add_argument("--noise-frac", type=float, default=spec.noise_frac,
+                    help="per-rank chance of an uncultured / incertae / __ label")
+    ap.add_argument("--depth", type=int, default=spec.depth, help="number of levels")
+    ap.add_argument("--seed", type=int, default=spec.seed)
+
+
+def spec_from_args(args) -> SyntheticSpec:
+    return SyntheticSpec(args.taxa, args.samples, args.zero_frac, args.noise_frac,
+                         args.depth, args.seed)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("out_dir")
+    add_spec_arguments(ap)
+    args = ap.parse_args()
+    for fp in write_synthetic_levels(args.out_dir, spec_from_args(args)):
+        print(fp)
+
+
+if __name__ == "__main__":
+    main()
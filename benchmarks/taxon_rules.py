@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+taxon 규칙 벤치마크: baseline 스칼라 규칙 vs filtered_mask / truncate_labels
+합성 가장 깊은 level(기본 172k taxon 열)의 컬럼에 두 규칙을 적용해 시간을 재고
+결과가 baseline 과 같은지 확인 (일괄 경로는 빈 캐시 · 채워진 캐시 둘 다)
+
+    python -m benchmarks.taxon_rules --taxa 172000
+"""
+from __future__ import annotations
+import argparse, logging, os, re, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from metabarcoding_taxonomy import TaxonomyFilter  # noqa: E402
+from benchmarks.synthetic import (add_spec_arguments, spec_from_args,  # noqa: E402
+                                  synthetic_tables)
+
+
+# ─────────────── baseline 규칙 (비교 기준, 원본 그대로) ───────────────
+def baseline_is_filtered(taxon: str, target_level: int = None) -> bool:
+    segs = taxon.split(";")
+    lower = taxon.lower()
+    if "incertae" in lower or taxon.endswith("_sp"):
+        return True
+    if re.search(r"[0-9\-]", taxon):
+        return True
+    if any(k in lower for k in (
+        "uncultured", "unidentified", "candidum",
+        "candidatus", "metagenome"
+    )):
+        return True
+    if re.search(r"[^A-Za-z0-9_;]", taxon):
+        return True
+    if target_level is not None:
+        if len(segs) > target_level and segs[target_level] == "__":
+            return True
+        if len(segs) > target_level:
+            if all(s == "__" for s in segs[target_level:]):
+                return True
+    else:
+        if len(segs) >= 3 and all(s == "__" for s in segs[2:]):
+            return True
+        if len(segs) >= 2 and all(s == "__" for s in segs[1:]):
+            return True
+    return False
+
+
+def baseline_truncate(taxon: str) -> str:
+    parts, kept = taxon.split(";"), []
+    for p in parts:
+        lp = p.lower()
+        if (p == "__" or "incertae" in lp or p.endswith("_sp") or
+            re.search(r"[0-9\-]", p) or
+            any(k in lp for k in (
+                "uncultured", "unidentified", "candidum",
+                "candidatus", "metagenome"
+            )) or
+            re.search(r"[^A-Za-z0-9_;]", p)):
+            break
+        kept.append(p)
+    return ";".join(kept)
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - t0, out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_spec_arguments(ap, taxa=172_000, samples=2, zero_frac=0.9)
+    args = ap.parse_args()
+    logging.getLogger("metabarcoding_taxonomy").setLevel(logging.WARNING)
+    spec = spec_from_args(args)
+    tables = {spec.depth: synthetic_tables(spec)[spec.depth]}
+    taxa = tables[spec.depth].columns.to_numpy(dtype=object)
+    target = spec.depth - 1
+
+    rows = {}
+    rows["baseline mask"], mask = timed(
+        lambda: [baseline_is_filtered(t, target) for t in taxa])
+    rows["baseline truncate"], labels = timed(
+        lambda: [baseline_truncate(t) for t in taxa])
+    with tempfile.TemporaryDirectory() as tmp:
+        wf = TaxonomyFilter(tables=tables, input_dir=tmp)
+        for run in ("cold", "warm"):
+            rows[f"filtered_mask ({run})"], got = timed(
+                lambda: wf.filtered_mask(taxa, target))
+            assert got.tolist() == mask, "filtered_mask differs from baseline"
+            rows[f"truncate_labels ({run})"], got = timed(
+                lambda: wf.truncate_labels(taxa))
+            assert got.tolist() == labels, "truncate_labels differs from baseline"
+
+    print(f"{len(taxa)} taxa (level {spec.depth})")
+    for name, sec in rows.items():
+        print(f"{name:<26}{sec:>9.3f} s")
+
+
+if __name__ == "__main__":
+    main()
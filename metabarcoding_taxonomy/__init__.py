@@ -2,18 +2,45 @@
 # -*- coding: utf-8 -*-
 """
 metabarcoding_taxonomy
-패키지 레벨 내보내기
+패키지 레벨 내보내기 — 클래스는 처음 접근할 때 import (PEP 562)
+pandas 는 분석 클래스를, matplotlib 은 시각화 클래스를 쓸 때만 로드됨
 """
-from .base import MetabarcodingBase
-from .filter import TaxonomyFilter
-from .statistics import TaxonomyStatistics
-from .visualizer import TaxonomyVisualizer
-from .workflow import MetabarcodingWorkflow
-
-__all__ = [
-    "MetabarcodingBase",
-    "TaxonomyFilter",
-    "TaxonomyStatistics",
-    "TaxonomyVisualizer",
-    "MetabarcodingWorkflow",
-]
\ No newline at end of file
+from __future__ import annotations
+import importlib
+
+TYPE_CHECKING = False   # typing import 비용(~15ms) 없이 타입 검사기만 아래 import 를 봄
+
+_EXPORTS = {
+    "MetabarcodingBase": ".base",
+    "TaxonomyFilter": ".filter",
+    "TaxonomyStatistics": ".statistics",
+    "TaxonomyVisualizer": ".visualizer",
+    "MetabarcodingWorkflow": ".workflow",
+    "LevelTable": ".tables",
+    "FilterResult": ".filter",
+    "WorkflowResult": ".workflow",
+}
+
+__all__ = list(_EXPORTS)
+
+if TYPE_CHECKING:
+    from .base import MetabarcodingBase
+    from .filter import TaxonomyFilter
+    from .statistics import TaxonomyStatistics
+    from .visualizer import TaxonomyVisualizer
+    from .workflow import MetabarcodingWorkflow, WorkflowResult
+    from .tables import LevelTable
+    from .filter import FilterResult
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *_EXPORTS})
@@ -0,0 +1,7 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""python -m metabarcoding_taxonomy {filter,stats,plot,all} INPUT_DIR …"""
+from .cli import main
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+metabarcoding_taxonomy.abundance
+상대 풍부도 · 상위 N taxon 선택 (바플롯 두 종류와 CSV 내보내기 공용)
+"""
+from __future__ import annotations
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+from .tables import LevelTable
+
+
+class AbundanceView(NamedTuple):
+    """그림에 그려지는 값 그대로 (샘플 × 열, %)"""
+    samples: list[str]
+    taxa: list[str]          # 열 taxon 라벨 (has_other 면 마지막이 "Other")
+    values: np.ndarray       # 총합 0 인 샘플은 NaN
+    means: np.ndarray        # 열별 평균 (Other 제외)
+    has_other: bool
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.values, index=pd.Index(self.samples, name="sample"),
+                            columns=self.taxa)
+
+    def to_csv(self, fp: str):
+        self.to_frame().to_csv(fp)
+
+
+def rank_taxa(means: np.ndarray, top_n: int | None = None) -> np.ndarray:
+    """
+    평균 내림차순 열 위치 (동률은 앞 열 우선, NaN 은 맨 뒤)
+    top_n 이 있으면 argpartition 으로 상위 후보만 정렬
+    """
+    key = np.where(np.isnan(means), -np.inf, means)
+    if top_n is None or top_n >= len(key):
+        return np.argsort(-key, kind="stable")
+    if top_n <= 0:
+        return np.empty(0, dtype=np.intp)
+    cut = key[np.argpartition(-key, top_n - 1)[:top_n]].min()
+    candidates = np.flatnonzero(key >= cut)          # 경계 동률 포함
+    return candidates[np.argsort(-key[candidates], kind="stable")][:top_n]
+
+
+def top_abundance(table: LevelTable, top_n: int | None = None,
+                  samples: list[str] | None = None) -> AbundanceView:
+    """
+    한 번 정규화한 상대 풍부도(%)에서 상위 top_n 열과 "Other" 를 만듦
+    top_n=None 이면 모든 열을 평균 내림차순으로 (Other 없음)
+    Other = 100 - 상위 열 합 (0 미만은 0, 모든 샘플이 0 이면 생략)
+    """
+    rel, means = table.relative_abundance()
+    order = rank_taxa(means, top_n)
+    values = rel[:, order]
+    if table.is_sparse:
+        values = values.toarray()
+    taxa = table.taxa[order].tolist()
+    samples = samples if samples is not None else table.samples.tolist()
+
+    has_other = False
+    if top_n is not None:
+        other = np.clip(100 - np.nansum(values, axis=1), 0, None)
+        if other.any():
+            values = np.column_stack([values, other])
+            taxa.append("Other")
+            has_other = True
+    return AbundanceView(samples, taxa, values, means[order], has_other)
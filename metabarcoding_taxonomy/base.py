@@ -5,11 +5,25 @@ metabarcoding_taxonomy.base
 공통 I/O · 로깅 · 유틸리티
 """
 from __future__ import annotations
-import re, os, glob, datetime
+import re, os, glob, logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+from .lineage import LineageIndex, readable_segment
+from .manifest import RunManifest
+from .profiling import (StageTracer, describe_span, format_line, get_logger,
+                        record_io)
+from .tables import (BACKENDS, NPY_SUFFIX, TABLE_FORMATS, LevelTable,
+                     as_level_table, iter_level_chunks, npy_meta,
+                     read_level_header)
 
-plt.rcParams["font.family"] = "Arial"
+# 병렬 실행 시 level 단위로 로그를 모았다가 순서대로 출력하기 위한 버퍼
+_LOG_BUFFER: ContextVar[list[tuple[int, str]] | None] = ContextVar("_LOG_BUFFER", default=None)
+
+CACHE_DIR = ".metabarcoding_cache"
+TRACE_NAME = ".metabarcoding_trace.json"
+PROFILE_DIR = ".metabarcoding_profile"
 
 
 class MetabarcodingBase:
@@ -27,20 +41,72 @@ class MetabarcodingBase:
         sample_col: str | None = None,
         level_labels: list[str] | None = None,
         sample_name_mapping: dict[str, str] | None = None,
+        write_outputs: bool = True,
+        backend: str = "dense",
+        incremental: bool = True,
+        force: bool = False,
+        chunksize: int | None = None,
+        formats: str | tuple[str, ...] = ("csv",),
+        cache_inputs: bool = False,
+        derive_levels: bool = False,
+        trace_path: str | bool | None = None,
+        profile: tuple[str, ...] = (),
+        trace_memory: tuple[str, ...] = (),
+        tables=None,
     ):
-        self.input_dir = input_dir
+        self.input_dir = input_dir = input_dir or "."
         self.sample_col = sample_col
         self.sample_name_mapping = sample_name_mapping or {}
+        self.write_outputs = write_outputs   # 중간 결과 CSV 저장 여부
+        self._tables: dict[str, LevelTable] = {}
+        self._nodes: dict[str, np.ndarray] = {}   # level → taxon 열의 trie 노드 id
+        if backend not in BACKENDS:
+            raise ValueError(f"backend must be one of {BACKENDS}")
+        self.backend = backend              # "sparse": scipy CSC 카운트 행렬
+        self.chunksize = chunksize          # 지정 시 level 파일을 행 묶음으로 스트리밍
+        self.formats = (formats,) if isinstance(formats, str) else tuple(formats)
+        if not self.formats or set(self.formats) - set(TABLE_FORMATS):
+            raise ValueError(f"formats must be a subset of {TABLE_FORMATS}")
+        self.cache_inputs = cache_inputs    # 파싱한 level 입력을 .npy 로 캐시
+        self.derive_levels = derive_levels  # 가장 깊은 level 만 읽고 나머지는 roll-up
+
+        # 단계·level 별 timing span (trace_path 가 있으면 JSON 으로 저장)
+        #   profile / trace_memory: cProfile · tracemalloc 을 켤 단계 이름
+        self.trace_path = (os.path.join(input_dir, TRACE_NAME) if trace_path is True
+                           else trace_path or None)
+        self.tracer = StageTracer(profile, trace_memory,
+                                  profile_dir=os.path.join(input_dir, PROFILE_DIR))
 
-        # level-N.csv 경로 수집
-        pattern = os.path.join(input_dir, level_pattern)
-        self.file_paths = sorted(
-            fp for fp in glob.glob(pattern)
-            if re.fullmatch(r"level-\d+\.csv", os.path.basename(fp))
-        )
+        # level-N.csv 경로 수집 (tables 가 있으면 파일 대신 메모리 테이블)
+        #   메모리 테이블의 경로는 출력 이름용 — input_dir/level-N.csv 를 읽지 않음
+        self.in_memory = tables is not None
+        supplied = {}
+        if self.in_memory:
+            if chunksize or cache_inputs:
+                raise ValueError("chunksize / cache_inputs need level files on disk")
+            supplied = {os.path.join(input_dir, f"{name}.csv"): table
+                        for name, table in _level_items(tables)}
+            self.file_paths = sorted(supplied, key=_level_depth)
+        else:
+            pattern = os.path.join(input_dir, level_pattern)
+            self.file_paths = sorted(
+                fp for fp in glob.glob(pattern)
+                if re.fullmatch(r"level-\d+\.csv", os.path.basename(fp))
+            )
         if not self.file_paths:
+            if self.in_memory:
+                raise ValueError("tables must contain at least one level table")
             raise FileNotFoundError(f"No level files found in {input_dir}")
 
+        # derive_levels: level-1 … level-N 을 모두 가장 깊은 파일에서 만듦
+        #   (중간 파일이 없어도 됨, 출력 이름용 경로만 채움)
+        self.deepest_path = max(self.file_paths, key=_level_depth)
+        if derive_levels:
+            self.file_paths = [
+                os.path.join(input_dir, f"level-{d}.csv")
+                for d in range(1, _level_depth(self.deepest_path))
+            ] + [self.deepest_path]
+
         self.level_names = [
             os.path.splitext(os.path.basename(fp))[0]  # level-1 …
             for fp in self.file_paths
@@ -54,20 +120,250 @@ class MetabarcodingBase:
         else:
             self.level_labels = self.DEFAULT_LEVEL_LABELS[: len(self.level_names)]
 
+        # 메모리 테이블: 가장 깊은 level 만 쓰는 derive_levels 면 나머지는 비교용
+        self._supplied: dict[str, LevelTable] = {}
+        for fp, lvl in zip(self.file_paths, self.level_names):
+            if fp in supplied:
+                table = as_level_table(supplied[fp], sample_col, fp, backend)
+                (self._supplied if self.is_derived(fp) else self._tables)[lvl] = table
+
+        # 입력·파라미터가 그대로인 단계는 건너뜀 (force=True 면 전부 재실행)
+        self.manifest = RunManifest(
+            input_dir, enabled=incremental and write_outputs and not self.in_memory,
+            force=force)
+        if derive_levels:
+            self.manifest.aliases = {fp: self.deepest_path for fp in self.file_paths
+                                     if self.is_derived(fp)}
+
+        # 모든 level 이 공유하는 계통 trie (taxon 라벨 · roll-up)
+        self.lineages = LineageIndex()
+
         self.log(f"Initialized with levels: {self.level_names}")
 
+    @classmethod
+    def from_tables(cls, tables, **kw):
+        """
+        메모리의 level 테이블로 생성 — 파일을 읽지 않고 기본으로 쓰지도 않음
+        tables: {"level-N" 또는 N: 테이블} 또는 level-1 부터의 리스트
+                (테이블은 LevelTable, DataFrame, (counts, samples, taxa))
+        """
+        kw.setdefault("write_outputs", False)
+        return cls(tables=tables, **kw)
+
+    # ---------- level 테이블 저장소 ----------
+    def load_level(self, lvl: str) -> LevelTable:
+        """level-N.csv 를 한 번만 파싱해 배열 형태로 보관"""
+        table = self._tables.get(lvl)
+        if table is not None:
+            return table
+        fp = self.file_paths[self.level_names.index(lvl)]
+        with self.span("load", lvl) as span:
+            if self.is_derived(fp):
+                deepest = self.level_names[self.file_paths.index(self.deepest_path)]
+                codes, nodes = self.lineages.group_at(self.level_nodes(deepest),
+                                                      _level_depth(fp))
+                table = self.load_level(deepest).sum_columns(
+                    codes, self.lineages.decode(nodes))
+                table.src = fp
+                self._nodes[lvl] = nodes
+                span["derived"] = True
+            elif self.cache_inputs:
+                table = self._cached_level(lvl, fp)
+            else:
+                table = LevelTable.from_csv(fp, self.sample_col, self.backend)
+                record_io(inputs=[fp])
+            span["rows"], span["cols"] = table.shape
+        self._tables[lvl] = table
+        return table
+
+    def _cached_level(self, lvl: str, fp: str) -> LevelTable:
+        """
+        입력 캐시 (CACHE_DIR/level-N.arrays) 를 memory-map 으로 읽음
+        원본 CSV 의 size·mtime 이나 sample_col 이 다르면 다시 파싱해 캐시 갱신
+        """
+        path = os.path.join(self.input_dir, CACHE_DIR, lvl + NPY_SUFFIX)
+        st = os.stat(fp)
+        stamp = {"size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                 "requested_sample_col": self.sample_col}
+        meta = npy_meta(path)
+        if meta is not None and meta.get("source") == stamp:
+            record_io(inputs=[path])
+            return LevelTable.from_npy(path, self.backend)
+
+        table = LevelTable.from_csv(fp, self.sample_col, self.backend)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        table.to_npy(path, source=stamp)
+        record_io(inputs=[fp], outputs=[path])
+        return table
+
+    # ---------- level 파생 (derive_levels) ----------
+    def is_derived(self, fp: str) -> bool:
+        """fp 가 가장 깊은 level 의 roll-up 으로 만들어지는지"""
+        return self.derive_levels and fp != self.deepest_path
+
+    def level_source(self, fp: str) -> str:
+        """fp 를 만들기 위해 실제로 읽는 파일"""
+        return self.deepest_path if self.is_derived(fp) else fp
+
+    def level_chunks(self, fp: str):
+        """level 파일을 행 묶음으로 순회 (파생 level 은 묶음마다 roll-up)"""
+        chunks = iter_level_chunks(self.level_source(fp), self.sample_col,
+                                   self.chunksize, self.backend)
+        if not self.is_derived(fp):
+            yield from chunks
+            return
+        nodes = None    # 묶음마다 열이 같으므로 한 번만 encode
+        for chunk in chunks:
+            if nodes is None:
+                nodes = self.lineages.encode(chunk.taxa)
+            chunk = self.lineages.rollup(chunk, _level_depth(fp), nodes)
+            chunk.src = fp
+            yield chunk
+
+    def level_header(self, fp: str) -> pd.Index:
+        """taxon 열 이름만 (파생 level 은 헤더의 계통을 roll-up)"""
+        taxa = read_level_header(self.level_source(fp), self.sample_col)
+        if not self.is_derived(fp):
+            return taxa
+        ancestors = self.lineages.ancestors_at(self.lineages.encode(taxa),
+                                               _level_depth(fp))
+        return self.lineages.decode(pd.unique(ancestors))
+
+    def check_derived_levels(self, strict: bool = False) -> dict[str, bool]:
+        """
+        roll-up 으로 만든 level 을 주어진 테이블(메모리) 또는 같은 폴더의
+        level-N.csv 와 비교 (열 순서는 무시, 샘플·taxon 집합과 카운트가 같아야 함)
+        둘 다 없는 level 은 건너뜀. strict=True 면 불일치 시 ValueError
+        """
+        results = {}
+        for fp, lvl in zip(self.file_paths, self.level_names):
+            if not self.is_derived(fp):
+                continue
+            supplied = self._supplied.get(lvl)
+            if supplied is None:
+                if self.in_memory or not os.path.exists(fp):
+                    continue
+                supplied = LevelTable.from_csv(fp, self.sample_col, self.backend)
+            derived = self.load_level(lvl)
+            problem = _table_mismatch(derived, supplied)
+            results[lvl] = problem is None
+            self.log(f"{lvl}: roll-up " + ("matches supplied file" if problem is None
+                                           else f"differs from supplied file ({problem})"))
+        if strict and not all(results.values()):
+            bad = [lvl for lvl, ok in results.items() if not ok]
+            raise ValueError(f"Derived levels differ from supplied files: {bad}")
+        return results
+
+    def iter_levels(self):
+        """(level 이름, 파일 경로, LevelTable) 순회"""
+        for fp, lvl in zip(self.file_paths, self.level_names):
+            yield lvl, fp, self.load_level(lvl)
+
     # ---------- 공통 유틸 ----------
-    def log(self, msg: str):
-        now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print(f"[{now}] {msg}")
+    def log(self, msg: str, level: int = logging.INFO):
+        """
+        패키지 logger 로 "[시각] 메시지" 출력 (captured_log 안이면 버퍼에)
+        버퍼는 레벨과 함께 모두 모음 — 워커 프로세스는 본 프로세스의 logging
+        설정을 모르므로 거르는 것은 replay_log 에서
+        """
+        buffer = _LOG_BUFFER.get()
+        if buffer is not None:
+            buffer.append((level, format_line(msg)))
+        else:
+            get_logger().log(level, msg)
+
+    @staticmethod
+    def replay_log(lines: list[tuple[int, str]]):
+        """captured_log 로 모은 (레벨, 줄) 을 본 프로세스 logger 로 출력"""
+        logger = get_logger()
+        for level, line in lines:
+            logger.log(level, line, extra={"preformatted": True})
+
+    @contextmanager
+    def span(self, name: str, level: str | None = None, **fields):
+        """단계 timing span — 닫힐 때 DEBUG 로 한 줄 요약"""
+        with self.tracer.span(name, level, **fields) as span:
+            yield span
+        self.log(describe_span(span), logging.DEBUG)
+
+    def save_trace(self, path: str | None = None):
+        """지금까지의 span 을 JSON trace 로 (경로가 없으면 아무것도 안 함)"""
+        path = path or self.trace_path
+        if path:
+            self.tracer.save(path)
+
+    @staticmethod
+    @contextmanager
+    def captured_log():
+        """블록 안의 log() 출력을 리스트로 수집 (스레드/프로세스별)"""
+        buffer: list[tuple[int, str]] = []
+        token = _LOG_BUFFER.set(buffer)
+        try:
+            yield buffer
+        finally:
+            _LOG_BUFFER.reset(token)
 
     def map_sample_names(self, names: list[str]) -> list[str]:
         return [self.sample_name_mapping.get(n, n) for n in names]
 
+    def level_nodes(self, lvl: str) -> np.ndarray:
+        """level 테이블 taxon 열의 LineageIndex 노드 id (level 마다 한 번만 encode)"""
+        nodes = self._nodes.get(lvl)
+        if nodes is None:
+            nodes = self._nodes[lvl] = self.lineages.encode(self.load_level(lvl).taxa)
+        return nodes
+
+    def last_tax_label_with_readable_prefix(self, tax_string: str) -> str:
+        """
+        분류학적 경로에서 마지막 분류군명을 읽기 쉬운 접두사와 함께 추출
+        (범례 라벨은 절단·합친 문자열이라 trie 에 넣지 않고 마지막 세그먼트만 봄)
+        """
+        if tax_string == "Other":
+            return "Other"
+        return readable_segment(tax_string.rpartition(";")[2])
+
     @staticmethod
     def last_tax_label(taxon: str) -> str:
         """세미콜론 표기에서 마지막 라벨만 추출"""
         if taxon == "Other":
             return "Other"
-        last = taxon.split(";")[-1]
-        return last.split("__", 1)[1] if "__" in last else last
+        last = taxon.rpartition(";")[2]
+        return last.partition("__")[2] if "__" in last else last
+
+
+def _level_items(tables) -> list[tuple[str, object]]:
+    """
+    tables → [("level-N", 테이블)]
+    dict 키는 "level-N" 또는 정수 N, list/tuple 이면 순서대로 level-1, level-2 …
+    """
+    if isinstance(tables, dict):
+        items = []
+        for key, table in tables.items():
+            name = f"level-{key}" if isinstance(key, int) else str(key)
+            if not re.fullmatch(r"level-\d+", name):
+                raise ValueError(f"level table keys must be 'level-N' or N, got {key!r}")
+            items.append((name, table))
+        return items
+    return [(f"level-{i}", table) for i, table in enumerate(tables, 1)]
+
+
+def _level_depth(fp: str) -> int:
+    """"…/level-3.csv" → 3"""
+    return int(re.search(r"level-(\d+)", os.path.basename(fp)).group(1))
+
+
+def _table_mismatch(derived: LevelTable, supplied: LevelTable) -> str | None:
+    """두 테이블이 열 순서만 다르면 None, 아니면 차이 설명"""
+    if not derived.samples.equals(supplied.samples):
+        return "samples differ"
+    if supplied.taxa.has_duplicates:
+        supplied, _ = supplied.aggregate_columns()
+    missing = supplied.taxa.difference(derived.taxa)
+    extra = derived.taxa.difference(supplied.taxa)
+    if len(missing) or len(extra):
+        return f"{len(missing)} taxa missing, {len(extra)} unexpected"
+    order = derived.taxa.get_indexer(supplied.taxa)
+    a = derived.dense_columns(order)
+    b = supplied.dense_columns(np.arange(len(supplied.taxa)))
+    n_diff = int((~np.isclose(a, b, equal_nan=True)).any(axis=0).sum())
+    return f"{n_diff} taxa with different counts" if n_diff else None
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+metabarcoding_taxonomy.batch
+여러 프로젝트(input_dir)를 하나의 워커 풀에서 일괄 실행
+
+manifest (JSON 리스트):
+    [
+      {"name": "marine_0-24H",
+       "input_dir": "/data/marine_media_csv",
+       "level_labels": ["Kingdom", "Phylum", ...],
+       "sample_name_mapping": {"0H": "0H", "6H": "6H"},
+       "supplementary": true},
+      ...
+    ]
+
+    python -m metabarcoding_taxonomy.batch manifest.json --workers 4
+"""
+from __future__ import annotations
+import argparse, json, os, time, traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import NamedTuple
+import pandas as pd
+from .profiling import configure_logging, get_logger
+from .workflow import MetabarcodingWorkflow
+
+
+# batch_summary.csv 열 순서 (실패 행은 뒤쪽 결과 열이 비어 있음)
+SUMMARY_COLUMNS = ("project", "input_dir", "status", "levels", "samples",
+                   "deepest_level", "mean_unclassified", "retained_taxa_ratio",
+                   "error", "elapsed_s")
+
+
+class BatchJob(NamedTuple):
+    """manifest 항목 하나"""
+    name: str
+    input_dir: str
+    level_labels: list[str] | None = None
+    sample_name_mapping: dict[str, str] | None = None
+    level_pattern: str = "level-*.csv"
+    supplementary: bool = True
+
+
+def load_manifest(path: str) -> list[BatchJob]:
+    with open(path, encoding="utf-8") as fh:
+        entries = json.load(fh)
+    base = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    for entry in entries:
+        entry = dict(entry)
+        # 상대 경로는 manifest 위치 기준
+        entry["input_dir"] = os.path.join(base, entry["input_dir"])
+        entry.setdefault("name", os.path.basename(os.path.normpath(entry["input_dir"])))
+        jobs.append(BatchJob(**entry))
+    return jobs
+
+
+def _run_project(job: BatchJob, force: bool = False) -> dict:
+    """워커 프로세스에서 프로젝트 하나 실행 — 예외는 결과로 돌려줌"""
+    row = {"project": job.name, "input_dir": job.input_dir}
+    start = time.perf_counter()
+    with MetabarcodingWorkflow.captured_log() as lines:
+        try:
+            wf = MetabarcodingWorkflow(
+                input_dir=job.input_dir,
+                level_pattern=job.level_pattern,
+                level_labels=job.level_labels,
+                sample_name_mapping=job.sample_name_mapping,
+                force=force,
+            )
+            wf.run_all()
+            if job.supplementary:
+                wf.supplementary_figure_all_details()
+
+            deepest = wf.level_names[-1]
+            row.update(
+                status="ok",
+                levels=len(wf.level_names),
+                samples=len(wf.stats_df),
+                deepest_level=deepest,
+                mean_unclassified=float(wf.stats_df[deepest].mean()),
+                retained_taxa_ratio=float(wf.taxa_count_df[deepest]),
+                error="",
+            )
+        except Exception as exc:
+            row.update(status="failed", error=f"{type(exc).__name__}: {exc}",
+                       traceback=traceback.format_exc())
+    row["elapsed_s"] = round(time.perf_counter() - start, 3)
+    row["log_lines"] = lines
+    return row
+
+
+def run_batch(
+    jobs: list[BatchJob],
+    workers: int | None = None,
+    summary_path: str | None = "batch_summary.csv",
+    verbose: bool = True,
+    force: bool = False,
+) -> pd.DataFrame:
+    """
+    모든 job 을 하나의 ProcessPoolExecutor 에서 실행
+    실패한 프로젝트는 요약표에 status=failed 로 남기고 나머지는 계속 진행
+    """
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_run_project, job, force) for job in jobs]
+        for job, fut in zip(jobs, futures):   # manifest 순서대로 수집
+            try:
+                row = fut.result()
+            except BrokenProcessPool as exc:  # 워커 프로세스 자체가 죽은 경우
+                row = {"project": job.name, "input_dir": job.input_dir,
+                       "status": "failed", "error": f"BrokenProcessPool: {exc}",
+                       "log_lines": []}
+            if verbose:
+                MetabarcodingWorkflow.replay_log(row["log_lines"])
+                if row["status"] == "failed":
+                    get_logger().error(f"[batch] {job.name} FAILED — {row['error']}\n"
+                                       + row.get("traceback", ""))
+            rows.append(row)
+
+    # 첫 행이 실패여도 열 순서가 같도록 고정
+    summary = pd.DataFrame(rows, columns=list(SUMMARY_COLUMNS))
+    for col in ("levels", "samples"):   # 실패 행(NaN)이 있어도 정수로 유지
+        if col in summary:
+            summary[col] = summary[col].astype("Int64")
+    if summary_path:
+        summary.to_csv(summary_path, index=False)
+    n_failed = int((summary["status"] == "failed").sum()) if rows else 0
+    summary.attrs["n_failed"] = n_failed
+    if verbose:
+        get_logger().info(f"[batch] {len(rows) - n_failed} succeeded, {n_failed} failed")
+    return summary
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Run MetabarcodingWorkflow on many projects")
+    ap.add_argument("manifest", help="JSON manifest of projects")
+    ap.add_argument("--workers", type=int, default=None,
+                    help="worker processes (default: CPU count)")
+    ap.add_argument("--summary", default="batch_summary.csv",
+                    help="per-project summary CSV path")
+    ap.add_argument("--force", action="store_true",
+                    help="ignore run manifests and redo every stage")
+    args = ap.parse_args(argv)
+    configure_logging()
+
+    summary = run_batch(load_manifest(args.manifest), args.workers, args.summary,
+                        force=args.force)
+    return int(summary.attrs["n_failed"] > 0)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+metabarcoding_taxonomy.cache
+taxon 규칙 판정 결과 메모이제이션 (bounded LRU)
+"""
+from __future__ import annotations
+import threading
+from collections import OrderedDict, namedtuple
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+_MISSING = object()
+
+
+class LRUCache:
+    """크기 제한 LRU 딕셔너리 + hit/miss 카운터"""
+
+    def __init__(self, maxsize: int = 100_000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()   # executor="thread" 에서 공유됨
+
+    def __getstate__(self):
+        # 프로세스 풀로 넘길 때 lock 은 제외
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_many(self, keys, default=None) -> list:
+        """get 의 일괄판 — 묶음 전체를 lock 한 번으로 조회"""
+        data, out, hits = self._data, [], 0
+        with self._lock:
+            for key in keys:
+                value = data.get(key, _MISSING)
+                if value is _MISSING:
+                    out.append(default)
+                else:
+                    data.move_to_end(key)
+                    out.append(value)
+                    hits += 1
+            self.hits += hits
+            self.misses += len(out) - hits
+        return out
+
+    def put_many(self, items):
+        """put 의 일괄판 (초과분은 마지막에 한꺼번에 내보냄)"""
+        data = self._data
+        with self._lock:
+            for key, value in items:
+                data[key] = value
+                data.move_to_end(key)
+            for _ in range(len(data) - self.maxsize):
+                data.popitem(last=False)
+
+    def reserve(self, size: int):
+        """maxsize 를 최소 size 로 늘림 (줄이지는 않음)"""
+        with self._lock:
+            self.maxsize = max(self.maxsize, size)
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+
+class TaxonRuleCache:
+    """
+    워크플로 인스턴스 단위 taxon 규칙 캐시
+
+    segments : 세그먼트            → 판정 비트 (filter.segment_flags)
+    lineages : 전체 계통 문자열     → (조상 포함 noisy 여부, 절단 라벨)
+    verdicts : (taxon, target_level) → is_filtered_taxon 결과
+
+    일괄 규칙(filtered_mask · truncate_labels)은 segments 만 씀 — 세그먼트 키는
+    target_level 과 무관하므로 level·단계가 달라도 조상 세그먼트가 그대로 hit
+    lineages · verdicts 는 스칼라 규칙(is_filtered_taxon · truncate_taxonomy) 전용
+    segments 는 일괄 규칙이 묶음의 새 세그먼트 수만큼 maxsize 를 늘림 (maxsize 는 하한)
+
+    executor="thread" 워커는 같은 캐시를 공유하지만, executor="process" 워커는
+    각자 pickle 된 사본을 받으므로 워커 사이에 hit 이 공유되지 않음
+    (워커에서 채운 항목은 본 프로세스로 돌아오지 않음)
+    """
+
+    def __init__(self, maxsize: int = 200_000):
+        self.segments = LRUCache(maxsize)
+        self.lineages = LRUCache(maxsize)
+        self.verdicts = LRUCache(maxsize)
+
+    def cache_info(self) -> dict[str, CacheInfo]:
+        return {
+            "segments": self.segments.info(),
+            "lineages": self.lineages.info(),
+            "verdicts": self.verdicts.info(),
+        }
+
+    def summary(self) -> str:
+        return ", ".join(
+            f"{name} hits={i.hits} misses={i.misses} size={i.currsize}"
+            for name, i in self.cache_info().items()
+        )
+
+    def clear(self):
+        for table in (self.segments, self.lineages, self.verdicts):
+            table.clear()
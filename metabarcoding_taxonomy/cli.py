@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+metabarcoding_taxonomy.cli
+명령행 진입점 — 분석 클래스는 하위 명령이 정해진 뒤 import 하므로
+filter / stats 는 matplotlib 을 전혀 로드하지 않음
+
+    python -m metabarcoding_taxonomy filter DATA_DIR
+    python -m metabarcoding_taxonomy stats  DATA_DIR --map 0H=T0
+    python -m metabarcoding_taxonomy stats  DATA_DIR --diversity
+    python -m metabarcoding_taxonomy all    DATA_DIR --rarefy 5000 --iterations 200
+    python -m metabarcoding_taxonomy plot   DATA_DIR --figure-format png --preview
+    python -m metabarcoding_taxonomy all    DATA_DIR --workers 4 --supplementary
+    python -m metabarcoding_taxonomy serve  --port 8750
+"""
+from __future__ import annotations
+import argparse, os, re
+
+
+def _map_pair(pair: str) -> tuple[str, str]:
+    sample, sep, name = pair.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected SAMPLE=NAME, got {pair!r}")
+    return sample, name
+
+
+def _positive(value: str) -> int:
+    n = int(value)
+    if n <= 0:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {value}")
+    return n
+
+
+def _non_negative(value: str) -> int:
+    n = int(value)
+    if n < 0:
+        raise argparse.ArgumentTypeError(f"expected a non-negative integer, got {value}")
+    return n
+
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("input_dir", help="folder with level-N.csv files")
+    common.add_argument("--pattern", default="level-*.csv", help="level file glob")
+    common.add_argument("--sample-col", help="sample column (default: first column)")
+    common.add_argument("--labels", nargs="+", metavar="LABEL",
+                        help="level labels, e.g. Kingdom Phylum … Species")
+    common.add_argument("--map", nargs="+", default=[], type=_map_pair,
+                        metavar="SAMPLE=NAME",
+                        help="rename samples in tables and figures")
+    common.add_argument("--backend", default="dense", choices=("dense", "sparse"),
+                        help="dense | sparse (scipy)")
+    common.add_argument("--chunksize", type=_positive,
+                        help="stream level files in chunks of this many rows")
+    common.add_argument("--formats", nargs="+", default=["csv"], metavar="FMT",
+                        choices=("csv", "npy"),
+                        help="filter output formats: csv and/or npy")
+    common.add_argument("--cache-inputs", action="store_true",
+                        help="keep parsed level files as memory-mapped .npy")
+    common.add_argument("--derive-levels", action="store_true",
+                        help="read only the deepest level file and roll it up "
+                             "to the shallower levels")
+    common.add_argument("--check-derived", action="store_true",
+                        help="with --derive-levels, fail if a roll-up differs "
+                             "from a supplied level file")
+    common.add_argument("--trace", nargs="?", const=True, metavar="PATH",
+                        help="write a JSON trace of timed stages "
+                             "(default: INPUT_DIR/.metabarcoding_trace.json)")
+    common.add_argument("--profile", nargs="+", default=[], metavar="STAGE",
+                        help="cProfile these stages (load, filter, stats, plot, "
+                             "workflow or all) into INPUT_DIR/.metabarcoding_profile")
+    common.add_argument("--trace-memory", nargs="+", default=[], metavar="STAGE",
+                        help="record the tracemalloc peak of these stages")
+    common.add_argument("-v", "--verbose", action="store_true",
+                        help="also log one line per timed stage")
+    common.add_argument("--no-incremental", action="store_true",
+                        help="do not read or write the run manifest")
+    common.add_argument("--force", action="store_true",
+                        help="ignore the run manifest and redo every stage")
+
+    figures = argparse.ArgumentParser(add_help=False)
+    figures.add_argument("--figure-format", default="pdf", choices=("pdf", "svg", "png"),
+                         help="pdf | svg | png")
+    figures.add_argument("--preview", action="store_true",
+                         help="low-resolution PNG previews")
+    figures.add_argument("--top-n", type=_positive, default=10,
+                         help="taxa shown in the cumulative barplots")
+    figures.add_argument("--supplementary", action="store_true",
+                         help="also draw the all-taxa supplementary barplots")
+    figures.add_argument("--renderer", default="collection", choices=("collection", "bars"),
+                         help="supplementary renderer: collection | bars")
+    figures.add_argument("--rasterize", action="store_true",
+                         help="rasterize the supplementary bar stack")
+
+    rarefaction = argparse.ArgumentParser(add_help=False)
+    rarefaction.add_argument("--rarefy", nargs="?", type=_non_negative, const=0,
+                             metavar="DEPTH",
+                             help="run on tables rarefied to DEPTH reads (default: "
+                                  "shallowest sample), written to "
+                                  "INPUT_DIR/rarefied-DEPTH")
+    rarefaction.add_argument("--iterations", type=_positive, default=100,
+                             help="rarefaction draws averaged per level")
+    rarefaction.add_argument("--seed", type=int, default=0)
+    rarefaction.add_argument("--rarefy-workers", type=_positive, default=1,
+                             help="processes for the rarefaction draws")
+
+    ap = argparse.ArgumentParser(prog="metabarcoding_taxonomy",
+                                 description="Metabarcoding taxonomy filtering, "
+                                             "statistics and figures")
+    sub = ap.add_subparsers(dest="command", required=True)
+    sub.add_parser("filter", parents=[common],
+                   help="write *_filtered / *_retained / *_truncated tables")
+    stats = sub.add_parser("stats", parents=[common, rarefaction],
+                           help="print unclassified and retained-taxa ratios")
+    stats.add_argument("--diversity", action="store_true",
+                       help="also print alpha diversity and write Bray–Curtis / "
+                            "Jaccard matrices as level-N_<metric>.csv")
+    sub.add_parser("plot", parents=[common, figures, rarefaction],
+                   help="draw all figures")
+    run_all = sub.add_parser("all", parents=[common, figures, rarefaction],
+                             help="filter → stats → figures")
+    run_all.add_argument("--workers", type=_positive, default=1)
+    run_all.add_argument("--executor", default="process", choices=("process", "thread"),
+                         help="process | thread")
+
+    serve = sub.add_parser("serve", help="local HTTP/JSON service with warm caches")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8750)
+    serve.add_argument("--workers", type=_non_negative, default=2,
+                       help="rendering processes (0: render in request threads)")
+    serve.add_argument("--max-projects", type=_positive, default=8,
+                       help="inputs kept warm (LRU)")
+    serve.add_argument("--max-figures", type=_positive, default=256,
+                       help="rendered figures kept in memory (LRU)")
+    serve.add_argument("--backend", default="dense", choices=("dense", "sparse"),
+                       help="dense | sparse (scipy)")
+    return ap
+
+
+def _options(args) -> dict:
+    return dict(
+        input_dir=args.input_dir,
+        level_pattern=args.pattern,
+        sample_col=args.sample_col,
+        level_labels=args.labels,
+        sample_name_mapping=dict(args.map),
+        backend=args.backend,
+        chunksize=args.chunksize,
+        formats=tuple(args.formats),
+        cache_inputs=args.cache_inputs,
+        derive_levels=args.derive_levels,
+        trace_path=args.trace,
+        profile=tuple(args.profile),
+        trace_memory=tuple(args.trace_memory),
+        incremental=not args.no_incremental,
+        force=args.force,
+    )
+
+
+def validate(ap: argparse.ArgumentParser, args):
+    """
+    분석을 시작하기 전에 입력 폴더·옵션 조합 확인 — 잘못된 사용은 여기서
+    usage 오류로 끝내고, 실행 중 예외는 traceback 과 함께 그대로 올라가게 함
+    """
+    import glob, importlib.util   # import 시간 예산 — 검사할 때만
+    if args.backend == "sparse" and importlib.util.find_spec("scipy") is None:
+        ap.error("--backend sparse requires scipy")
+    if args.command == "serve":
+        return
+    if not os.path.isdir(args.input_dir):
+        ap.error(f"input_dir {args.input_dir!r} is not a directory")
+    depths = [int(m[1]) for fp in glob.glob(os.path.join(args.input_dir, args.pattern))
+              if (m := re.fullmatch(r"level-(\d+)\.csv", os.path.basename(fp)))]
+    if not depths:
+        ap.error(f"no level-N.csv files match {args.pattern!r} in {args.input_dir}")
+    n_levels = max(depths) if args.derive_levels else len(depths)
+    if args.labels and len(args.labels) != n_levels:
+        ap.error(f"--labels needs {n_levels} labels, got {len(args.labels)}")
+    if args.check_derived and not args.derive_levels:
+        ap.error("--check-derived requires --derive-levels")
+
+
+def _figure_options(args) -> dict:
+    return dict(figure_format=args.figure_format, preview=args.preview)
+
+
+def _checked(obj, args):
+    """--check-derived 불일치는 usage 오류가 아니라 데이터 문제 → 메시지와 함께 종료"""
+    if args.derive_levels and args.check_derived:
+        bad = [lvl for lvl, ok in obj.check_derived_levels().items() if not ok]
+        if bad:
+            raise SystemExit(f"error: derived levels differ from supplied files: {bad}")
+    return obj
+
+
+def _rarefied(obj, args, **kw):
+    """--rarefy 면 rarefy 한 테이블로 만든 같은 클래스의 인스턴스"""
+    if args.rarefy is None:
+        return obj
+    depth = args.rarefy or obj.rarefaction_depth()
+    shallow = [lvl for lvl in obj.level_names if obj.load_level(lvl).row_sums().max() < depth]
+    if shallow:
+        raise SystemExit(f"error: no sample reaches rarefaction depth {depth} "
+                         f"at level(s) {shallow}")
+    return obj.rarefied(depth, args.iterations, args.seed,
+                        args.rarefy_workers, options=kw)
+
+
+def _plot(viz, args):
+    viz.plot_well_classified()
+    viz.plot_taxa_retained(viz.compute_taxa_counts())
+    viz.plot_cumulative_barplots(top_n=args.top_n)
+    if args.supplementary:
+        viz.supplementary_figure_all_details(renderer=args.renderer,
+                                             rasterize=args.rasterize)
+
+
+def run(args):
+    if args.command == "serve":
+        from .service import serve
+        return serve(args.host, args.port, workers=args.workers,
+                     max_projects=args.max_projects, max_figures=args.max_figures,
+                     backend=args.backend)
+
+    if args.command == "filter":
+        from .filter import TaxonomyFilter
+        obj = _checked(TaxonomyFilter(**_options(args)), args)
+        obj.process_all_files()
+
+    elif args.command == "stats":
+        from .statistics import TaxonomyStatistics
+        obj = _checked(TaxonomyStatistics(**_options(args)), args)
+        obj = _rarefied(obj, args)
+        print(obj.compute_unclassified_stats())
+        print(obj.compute_taxa_counts())
+        if args.diversity:
+            print(obj.compute_alpha_diversity())
+            for metric in ("braycurtis", "jaccard"):
+                obj.compute_beta_diversity(metric)
+
+    elif args.command == "plot":
+        from .visualizer import TaxonomyVisualizer
+        obj = TaxonomyVisualizer(**_options(args), **_figure_options(args))
+        obj = _rarefied(_checked(obj, args), args, **_figure_options(args))
+        _plot(obj, args)
+
+    else:
+        from .workflow import MetabarcodingWorkflow
+        obj = MetabarcodingWorkflow(**_options(args), **_figure_options(args),
+                                    workers=args.workers, executor=args.executor)
+        obj = _rarefied(_checked(obj, args), args, **_figure_options(args),
+                        workers=args.workers, executor=args.executor)
+        obj.run_all(top_n=args.top_n)
+        if args.supplementary:
+            obj.supplementary_figure_all_details(renderer=args.renderer,
+                                                 rasterize=args.rasterize)
+    obj.save_trace()
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = build_parser()
+    args = ap.parse_args(argv)
+    validate(ap, args)
+    import logging
+    from .profiling import configure_logging
+    configure_logging(logging.DEBUG if getattr(args, "verbose", False) else logging.INFO)
+    run(args)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
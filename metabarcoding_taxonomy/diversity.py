@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+metabarcoding_taxonomy.diversity
+alpha (richness · Shannon · Simpson) · beta (Bray–Curtis · Jaccard) 다양성
+샘플 쌍 Python 루프 없이 배열 연산으로 계산 (dense / sparse LevelTable 공용)
+"""
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+from .tables import LevelTable
+
+ALPHA_METRICS = ("richness", "shannon", "simpson")
+BETA_METRICS = ("braycurtis", "jaccard")
+# Bray–Curtis 블록 하나의 min(x, y) 원소 수 (float64 0.8MB — 캐시에 들어가는 크기가
+# 큰 블록보다 2~3 배 빠름)
+BLOCK_CELLS = 100_000
+
+
+def _nonzero_entries(table: LevelTable) -> tuple[np.ndarray, np.ndarray]:
+    """0 이 아닌 카운트의 (행 번호, 값) — sparse 는 저장된 값만 훑음"""
+    if table.is_sparse:
+        m = table.counts.tocsr()
+        rows = np.repeat(np.arange(m.shape[0]), np.diff(m.indptr))
+        keep = m.data > 0
+        return rows[keep], m.data[keep]
+    rows, cols = np.nonzero(table.counts > 0)
+    return rows, table.counts[rows, cols]
+
+
+def alpha_diversity(table: LevelTable, base: float = 2.0) -> pd.DataFrame:
+    """
+    샘플별 richness (관측 taxon 수) · Shannon (밑 base, QIIME2 와 같이 기본 2)
+    · Simpson (1 - Σp²) — 총합 0 인 샘플의 Shannon / Simpson 은 NaN
+    """
+    n = table.shape[0]
+    rows, data = _nonzero_entries(table)
+    sums = np.bincount(rows, data.astype(float), minlength=n)
+    p = data / sums[rows]
+    richness = np.bincount(rows, minlength=n)
+    empty = sums == 0
+    shannon = -np.bincount(rows, p * np.log(p), minlength=n) / np.log(base)
+    simpson = 1 - np.bincount(rows, p * p, minlength=n)
+    shannon[empty] = simpson[empty] = np.nan
+    return pd.DataFrame({"richness": richness, "shannon": shannon,
+                         "simpson": simpson}, index=table.samples)
+
+
+def _observed_counts(table: LevelTable) -> np.ndarray:
+    """한 샘플에서라도 관측된 taxon 열만 dense float 배열로 (거리에 영향 없음)"""
+    if table.is_sparse:
+        m = table.counts.tocsc()
+        return m[:, np.flatnonzero(np.diff(m.indptr))].toarray().astype(float)
+    counts = np.asarray(table.counts, dtype=float)
+    return counts[:, counts.any(axis=0)]
+
+
+def bray_curtis(table: LevelTable, block_cells: int = BLOCK_CELLS) -> np.ndarray:
+    """
+    Σ|x - y| / Σ(x + y) 거리 행렬 — 음이 아닌 카운트에서
+    Σ|x - y| = Σx + Σy - 2·Σmin(x, y) 이므로 min 합만 블록으로 누적
+    블록 = (행 묶음 × 뒤쪽 샘플 × taxon 묶음), 원소 수 block_cells 안팎의 버퍼
+    하나를 재사용하고 위 삼각만 계산해 대칭으로 채움. 둘 다 빈 샘플 쌍은 NaN
+
+    계산량은 O(n²·t / 2) (n 샘플, t 관측 taxon), 메모리는 O(n² + block_cells)
+    Python 루프는 블록 수만큼 ≈ n²·t / (2·block_cells) 번 — 한 번에 block_cells
+    개를 numpy 로 처리하므로 루프 자체의 비용은 전체의 몇 % 이내
+    (2000 샘플 × 3000 taxon: 약 6 만 번). 더 큰 블록은 캐시를 벗어나 오히려 느림
+    """
+    x = _observed_counts(table)
+    n, t = x.shape
+    shared = np.zeros((n, n))
+    buf = np.empty(0)
+    start = 0
+    while start < n:
+        rest = n - start
+        stop = start + max(1, min(rest, block_cells // max(1, rest * t)))
+        step = max(1, block_cells // ((stop - start) * rest))
+        for c in range(0, t, step):
+            width = min(step, t - c)
+            if buf.size < (stop - start) * rest * width:
+                buf = np.empty((stop - start) * rest * width)
+            out = buf[:(stop - start) * rest * width].reshape(stop - start, rest, width)
+            np.minimum(x[start:stop, None, c:c + width], x[None, start:, c:c + width],
+                       out=out)
+            shared[start:stop, start:] += out.sum(axis=2)
+        start = stop
+    shared = np.triu(shared) + np.triu(shared, 1).T
+    sums = x.sum(axis=1)
+    den = sums[:, None] + sums[None, :]
+    out = np.full((n, n), np.nan)
+    np.divide(den - 2 * shared, den, out=out, where=den != 0)
+    return out
+
+
+def jaccard(table: LevelTable) -> np.ndarray:
+    """
+    출현 여부 기준 1 - |A∩B| / |A∪B| — 교집합 크기는 출현 행렬 P 의 P @ P.T
+    (sparse 는 sparse 곱), 둘 다 빈 샘플 쌍은 NaN
+    """
+    present = table.counts > 0
+    if table.is_sparse:
+        present = present.astype(float).tocsr()
+        inter = (present @ present.T).toarray()
+        sizes = np.asarray(present.sum(axis=1)).ravel()
+    else:
+        present = present.astype(float)
+        inter = present @ present.T
+        sizes = present.sum(axis=1)
+    union = sizes[:, None] + sizes[None, :] - inter
+    out = np.full(inter.shape, np.nan)
+    np.divide(inter, union, out=out, where=union != 0)
+    return 1 - out
+
+
+_BETA = {"braycurtis": bray_curtis, "jaccard": jaccard}
+
+
+def beta_diversity(table: LevelTable, metric: str = "braycurtis",
+                   samples: list[str] | None = None) -> pd.DataFrame:
+    """샘플 × 샘플 거리 행렬 (samples 로 행·열 이름 변경)"""
+    if metric not in _BETA:
+        raise ValueError(f"metric must be one of {BETA_METRICS}")
+    labels = pd.Index(samples if samples is not None else table.samples)
+    return pd.DataFrame(_BETA[metric](table), index=labels, columns=labels)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+metabarcoding_taxonomy.figures
+pyplot 없이 Figure 를 만들고 저장하는 템플릿 (폰트·축 스타일·레이아웃 캐시)
+"""
+from __future__ import annotations
+import io, threading
+from matplotlib import font_manager, rc_context, rcParams
+from matplotlib.figure import Figure
+from matplotlib.text import Text
+from .cache import LRUCache
+
+FIGURE_FORMATS = ("pdf", "svg", "png")
+PREVIEW_DPI = 96
+
+# 날짜 메타데이터를 빼서 같은 입력이면 같은 바이트의 파일이 나오도록 함
+_METADATA = {"pdf": {"CreationDate": None}, "svg": {"Date": None}, "png": {}}
+
+_FONT_LOCK = threading.Lock()
+_RESOLVED_FONTS: dict[str, str] = {}
+# svg.hashsalt 는 savefig 인자가 없어 저장하는 동안만 rc_context 로 지정 (SVG id 고정)
+_SVG_LOCK = threading.Lock()
+_SVG_RC = {"svg.hashsalt": "metabarcoding_taxonomy"}
+
+
+def resolve_font(family: str = "Arial") -> str:
+    """
+    family 를 프로세스당 한 번만 찾음 (rcParams 는 바꾸지 않음)
+    없으면 matplotlib 기본 sans-serif 로 — 글자마다 findfont 경고가 반복되지 않음
+    """
+    with _FONT_LOCK:
+        resolved = _RESOLVED_FONTS.get(family)
+        if resolved is None:
+            try:
+                font_manager.findfont(font_manager.FontProperties(family=family),
+                                      fallback_to_default=False)
+                resolved = family
+            except ValueError:
+                resolved = rcParams["font.sans-serif"][0]
+            _RESOLVED_FONTS[family] = resolved
+        return resolved
+
+
+class FigureTemplate:
+    """
+    그림 공통 설정
+
+    fmt     : "pdf" | "svg" | "png" (png 는 Agg 래스터)
+    preview : True 면 PREVIEW_DPI 의 png 로 빠르게 확인용 출력
+    그림은 matplotlib.figure.Figure 로 직접 만들므로 pyplot 전역 상태가 없고
+    스레드/프로세스 워커에서 동시에 그려도 됨
+    """
+
+    def __init__(self, fmt: str = "pdf", dpi: int = 450, preview: bool = False,
+                 font_family: str = "Arial", layout_cache_size: int = 256):
+        if fmt not in FIGURE_FORMATS:
+            raise ValueError(f"figure format must be one of {FIGURE_FORMATS}")
+        self.fmt = "png" if preview else fmt
+        self.dpi = PREVIEW_DPI if preview else dpi
+        self.preview = preview
+        self.font_family = font_family
+        self._layouts = LRUCache(layout_cache_size)
+
+    @property
+    def params(self) -> dict:
+        """manifest 키에 들어갈 출력 설정"""
+        return {"fmt": self.fmt, "save_dpi": self.dpi, "font": self.font_family}
+
+    def filename(self, stem: str) -> str:
+        return f"{stem}.{self.fmt}"
+
+    # ---------- 그림 ----------
+    def figure(self, figsize: tuple[float, float], dpi: int | None = None):
+        """(Figure, Axes) — preview 면 dpi 무시"""
+        fig = Figure(figsize=figsize, dpi=self.dpi if self.preview else dpi or self.dpi)
+        return fig, fig.add_subplot()
+
+    @staticmethod
+    def style_axes(ax, ylabel: str, ylim: tuple[float, float], fontsize: int,
+                   grid_axis: str = "both", grid_alpha: float = .4):
+        ax.set_ylim(*ylim)
+        ax.set_ylabel(ylabel, fontsize=fontsize)
+        ax.tick_params(axis="both" if grid_axis == "both" else "y",
+                       which="major", labelsize=fontsize)
+        ax.grid(True, axis=grid_axis, ls="--", alpha=grid_alpha)
+
+    @staticmethod
+    def legend_right(ax, fontsize: int = 14, **kw):
+        """축 오른쪽 바깥 범례 (바플롯 공통)"""
+        return ax.legend(bbox_to_anchor=(1.02, 1), loc="upper left",
+                         fontsize=fontsize, **kw)
+
+    def apply_font(self, fig):
+        """
+        그림 안의 모든 글자에 폰트 지정 (전역 rcParams 대신 그림 단위)
+        나중에 생기는 눈금 라벨은 첫 눈금의 글꼴 속성을 복사하므로 함께 적용됨
+        """
+        family = resolve_font(self.font_family)
+        for text in fig.findobj(Text):
+            text.set_fontfamily(family)
+
+    def layout(self, fig, key: tuple, rect=(0, 0, 1, 1)):
+        """
+        tight_layout 결과(subplot 여백)를 key 별로 캐시
+        key 에는 여백을 결정하는 것(그림 크기, 눈금·범례 라벨 등)을 모두 넣을 것
+        """
+        self.apply_font(fig)   # 여백 측정 전에
+        params = self._layouts.get(key)
+        if params is None:
+            fig.tight_layout(rect=rect)
+            sp = fig.subplotpars
+            self._layouts.put(key, {"left": sp.left, "right": sp.right,
+                                    "bottom": sp.bottom, "top": sp.top})
+        else:
+            fig.subplots_adjust(**params)
+
+    def save(self, fig, path):
+        """path 는 파일 경로 또는 쓰기 가능한 바이너리 객체"""
+        self.apply_font(fig)
+        if self.fmt != "svg":
+            fig.savefig(path, format=self.fmt, dpi=self.dpi,
+                        metadata=_METADATA[self.fmt])
+            return
+        with _SVG_LOCK, rc_context(_SVG_RC):
+            fig.savefig(path, format=self.fmt, dpi=self.dpi,
+                        metadata=_METADATA[self.fmt])
+
+    def to_bytes(self, fig) -> bytes:
+        buf = io.BytesIO()
+        self.save(fig, buf)
+        return buf.getvalue()
@@ -6,98 +6,243 @@ metabarcoding_taxonomy.filter
 """
 from __future__ import annotations
 import os, re
+from typing import NamedTuple
+import numpy as np
 import pandas as pd
 from .base import MetabarcodingBase
+from .cache import TaxonRuleCache
+from .profiling import annotate, record_io, traced
+from .tables import (NPY_SUFFIX, LevelTable, NpyTableWriter, as_level_table,
+                     count_rows, safe_ratio)
+
+# ─────────────────────────── 세그먼트 규칙 ───────────────────────────
+# is_filtered_taxon / truncate_taxonomy 의 규칙은 모두 세그먼트(";" 사이) 단위로
+# 판정할 수 있으므로, 고유 세그먼트마다 한 번만 평가한 플래그를 열 단위로 모음
+_NOISE_WORDS = ("incertae", "uncultured", "unidentified",
+                "candidum", "candidatus", "metagenome")
+# 소문자로 바꾼 bytes 에서 노이즈 키워드 · 영문자/"_"/";" 외 문자
+_NOISE_RE = re.compile(b"|".join(w.encode() for w in _NOISE_WORDS) + rb"|[^a-z_;]+")
+NOISY, CUT, SP_END, EMPTY = 1, 2, 4, 8
+_UNSEEN = 0xFF   # get_many 의 miss 표시 (판정 비트 조합으로는 나오지 않는 값)
+# 한 번에 나눠 볼 taxon 수 (세그먼트 문자열 리스트의 메모리 상한)
+_CLASSIFY_BLOCK = 50_000
+
+
+def segment_flags(seg: str) -> int:
+    """
+    세그먼트 하나의 판정 비트
+    NOISY  : 노이즈 키워드(대소문자 무시) 또는 영문자·"_" 외 문자 (숫자·하이픈 …)
+    CUT    : 절단 시 여기서 끊김 (NOISY · "__" · "_sp" 종결)
+    SP_END : "_sp" 로 끝남 / EMPTY : 빈 레벨 "__"
+    """
+    return int(classify_segments([seg])[0])
+
+
+def classify_segments(segs: list[str]) -> np.ndarray:
+    """
+    segment_flags 의 일괄판: 세그먼트를 ";" 로 이어 붙인 bytes 를 정규식으로 한 번 훑음
+    (비 ASCII 문자는 "?" 로 바뀌어 글자 수가 유지되고, 그 자체로 NOISY)
+    """
+    n = len(segs)
+    lengths = np.fromiter(map(len, segs), dtype=np.int64, count=n)
+    ends = np.cumsum(lengths + 1) - 1          # 각 세그먼트 뒤 ";" 위치
+    raw = ";".join(segs).encode("ascii", "replace")
+    hits = np.fromiter((m.start() for m in _NOISE_RE.finditer(raw.lower())),
+                       dtype=np.int64)
+    noisy = np.zeros(n, dtype=bool)
+    noisy[np.searchsorted(ends, hits)] = True
+
+    buf = np.frombuffer(raw + b";;;", dtype=np.uint8)
+    c3, c2, c1 = (buf[ends - k] for k in (3, 2, 1))     # 세그먼트 끝 세 글자
+    sp = (lengths >= 3) & (c3 == ord("_")) & (c2 == ord("s")) & (c1 == ord("p"))
+    empty = (lengths == 2) & (c2 == ord("_")) & (c1 == ord("_"))
+    return (noisy * NOISY | (noisy | sp | empty) * CUT
+            | sp * SP_END | empty * EMPTY).astype(np.uint8)
+
+
+class _SegmentBlock(NamedTuple):
+    """taxon 묶음을 세그먼트로 편 결과 (원소 = 세그먼트 하나)"""
+    flags: np.ndarray     # 원소별 판정 비트
+    lengths: np.ndarray   # 원소별 문자 수
+    starts: np.ndarray    # taxon 별 첫 원소 위치
+    counts: np.ndarray    # taxon 별 세그먼트 수
+
+
+def _has_empty_levels(segs: list[str], target_level: int = None) -> bool:
+    """빈 분류 레벨("__") 패턴 검사"""
+    if target_level is not None:
+        # 해당 레벨에서 빈 값("__") 체크 (0-based index)
+        # (해당 레벨 이후가 모두 빈 값인 경우도 여기에 포함됨)
+        return len(segs) > target_level and segs[target_level] == "__"
+
+    # 기존 로직 (하위 호환성)
+    if len(segs) >= 3 and all(s == "__" for s in segs[2:]):
+        return True
+    return len(segs) >= 2 and all(s == "__" for s in segs[1:])
+
+
+class FilterResult(NamedTuple):
+    """filter_and_truncate 결과 (level 단위)"""
+    filtered: LevelTable
+    retained: LevelTable
+    truncated: LevelTable
 
 
 class TaxonomyFilter(MetabarcodingBase):
     """필터링·전처리 담당"""
 
+    def __init__(self, *a, taxon_cache_size: int = 200_000, **kw):
+        # 레벨·단계 간에 공유되는 규칙 판정 캐시
+        self.taxon_cache = TaxonRuleCache(taxon_cache_size)
+        self.filter_results: dict[str, FilterResult] = {}
+        # 스트리밍 필터 패스에서 함께 계산한 (샘플 이름, 미분류 비율)
+        self.streamed_stats: dict[str, tuple[list, np.ndarray]] = {}
+        super().__init__(*a, **kw)
+
     # ─────────────────────────── 필터 규칙 ───────────────────────────
     def is_filtered_taxon(self, taxon: str, target_level: int = None) -> bool:
-        segs = taxon.split(";")
-        lower = taxon.lower()
-
-        # 기존 조건들
-        if "incertae" in lower or taxon.endswith("_sp"):
-            return True
-        if re.search(r"[0-9\-]", taxon):
-            return True
-        if any(k in lower for k in (
-            "uncultured", "unidentified", "candidum",
-            "candidatus", "metagenome"
-        )):
-            return True
-        if re.search(r"[^A-Za-z0-9_;]", taxon):
-            return True
-
-        # === 강화된 빈 분류 레벨 패턴 검사 ===
-        if target_level is not None:
-            # 해당 레벨에서 빈 값("__") 체크 (0-based index)
-            if len(segs) > target_level and segs[target_level] == "__":
-                return True
-            
-            # 해당 레벨 이후 모든 레벨이 빈 값인지 체크
-            if len(segs) > target_level:
-                remaining_levels = segs[target_level:]
-                if all(s == "__" for s in remaining_levels):
-                    return True
-        else:
-            # 기존 로직 (하위 호환성)
-            if len(segs) >= 3 and all(s == "__" for s in segs[2:]):
-                return True
-            if len(segs) >= 2 and all(s == "__" for s in segs[1:]):
-                return True
-        
-        return False
+        key = (taxon, target_level)
+        verdict = self.taxon_cache.verdicts.get(key)
+        if verdict is None:
+            # incertae·노이즈 키워드·숫자/특수문자·"_sp" 종결·빈 레벨
+            noisy, _ = self._lineage(taxon)
+            verdict = (noisy or taxon.endswith("_sp")
+                       or _has_empty_levels(taxon.split(";"), target_level))
+            self.taxon_cache.verdicts.put(key, verdict)
+        return verdict
 
     def truncate_taxonomy(self, taxon: str) -> str:
-        parts, kept = taxon.split(";"), []
-        for p in parts:
-            lp = p.lower()
-            if (p == "__" or "incertae" in lp or p.endswith("_sp") or
-                re.search(r"[0-9\-]", p) or
-                any(k in lp for k in (
-                    "uncultured", "unidentified", "candidum",
-                    "candidatus", "metagenome"
-                )) or
-                re.search(r"[^A-Za-z0-9_;]", p)):
+        return self._lineage(taxon)[1]
+
+    # ─────────────────────────── 캐시 기반 판정 ───────────────────────────
+    def _segment(self, seg: str) -> tuple[bool, bool]:
+        """세그먼트 판정: (noisy, 절단 시 여기서 끊기는지)"""
+        flags = self.taxon_cache.segments.get(seg)
+        if flags is None:
+            flags = segment_flags(seg)
+            self.taxon_cache.segments.put(seg, flags)
+        return bool(flags & NOISY), bool(flags & CUT)
+
+    def _extend(self, parent_rec: tuple[bool, str] | None,
+                taxon: str) -> tuple[bool, str]:
+        """상위 prefix 판정 + 마지막 세그먼트 판정 → taxon 판정"""
+        parent, _, seg = taxon.rpartition(";")
+        seg_noisy, seg_cut = self._segment(seg)
+        if parent_rec is None:  # 최상위 세그먼트
+            rec = (seg_noisy, "" if seg_cut else taxon)
+        else:
+            p_noisy, p_trunc = parent_rec
+            intact = p_trunc == parent and not seg_cut
+            rec = (p_noisy or seg_noisy, taxon if intact else p_trunc)
+        self.taxon_cache.lineages.put(taxon, rec)
+        return rec
+
+    def _lineage(self, taxon: str) -> tuple[bool, str]:
+        """계통 문자열 판정: (조상 포함 noisy 여부, 절단 라벨)"""
+        lineages = self.taxon_cache.lineages
+
+        # 캐시에 있는 가장 깊은 조상까지 올라간 뒤 아래로 내려오며 계산
+        chain, rec, node = [], None, taxon
+        while (rec := lineages.get(node)) is None:
+            chain.append(node)
+            node, sep, _ = node.rpartition(";")
+            if not sep:
                 break
-            kept.append(p)
-        return ";".join(kept)
-
-    # ─────────────────────────── 분류군 라벨 처리 ───────────────────────────
-    def last_tax_label_with_readable_prefix(self, tax_string):
-        """분류학적 경로에서 마지막 분류군명을 읽기 쉬운 접두사와 함께 추출"""
-        if tax_string == "Other":
-            return "Other"
-        
-        # 접두사 매핑
-        prefix_map = {
-            'k__': 'K: ',    # Kingdom
-            'p__': 'P: ',    # Phylum  
-            'c__': 'C: ',    # Class
-            'o__': 'O: ',    # Order
-            'f__': 'F: ',    # Family
-            'g__': 'G: ',    # Genus
-            's__': 'S: '     # Species
-        }
-        
-        parts = tax_string.split(';')
-        last_part = parts[-1]
-        
-        # 접두사 변환
-        for prefix, readable in prefix_map.items():
-            if last_part.startswith(prefix):
-                name = last_part.replace(prefix, '')
-                return f"{readable}{name}"
-        
-        return last_part  # 접두사가 없는 경우 그대로 반환
+        for node in reversed(chain):
+            rec = self._extend(rec, node)
+        return rec
+
+    def _segment_block(self, taxa) -> _SegmentBlock:
+        """
+        taxon 묶음을 한 번에 세그먼트로 펴고 고유 세그먼트만 판정
+        (";".join(...).split(";") 는 taxon 별 split 을 이어 붙인 것과 같음)
+        """
+        segs = np.array(";".join(taxa).split(";"), dtype=object)
+        codes, uniques = pd.factorize(segs)
+        uniques = uniques.tolist()
+        # 캐시 조회 · 저장은 묶음당 한 번씩, 없는 세그먼트만 판정
+        cache = self.taxon_cache.segments
+        flags_u = np.fromiter(cache.get_many(uniques, default=_UNSEEN),
+                              dtype=np.uint8, count=len(uniques))
+        todo = np.flatnonzero(flags_u == _UNSEEN)
+        if len(todo):
+            missing = [uniques[i] for i in todo]
+            # 새 세그먼트가 같은 level 의 세그먼트를 밀어내지 않도록 크기를 늘림
+            # (세그먼트 수는 level 컬럼 수를 따라가고, 생성 시 크기는 하한)
+            cache.reserve(len(cache) + len(missing))
+            flags_u[todo] = classify_segments(missing)
+            cache.put_many(zip(missing, flags_u[todo].tolist()))
+        lengths_u = np.fromiter(map(len, uniques), dtype=np.int64, count=len(uniques))
+        lengths = lengths_u[codes]
+        # 문자 위치로 taxon 경계 → 세그먼트 경계 (taxon 마다 split 하지 않음)
+        seg_pos = np.zeros(len(segs), dtype=np.int64)
+        np.cumsum(lengths[:-1] + 1, out=seg_pos[1:])
+        taxon_pos = np.zeros(len(taxa), dtype=np.int64)
+        taxon_len = np.fromiter(map(len, taxa), dtype=np.int64, count=len(taxa))
+        np.cumsum(taxon_len[:-1] + 1, out=taxon_pos[1:])
+        starts = np.searchsorted(seg_pos, taxon_pos)
+        counts = np.diff(starts, append=len(segs))
+        return _SegmentBlock(flags_u[codes], lengths, starts, counts)
+
+    def _blocks(self, taxa):
+        taxa = np.asarray(taxa, dtype=object)
+        for i in range(0, len(taxa), _CLASSIFY_BLOCK):
+            chunk = taxa[i:i + _CLASSIFY_BLOCK]
+            yield chunk, self._segment_block(chunk.tolist())
+
+    # ─────────────────────────── 일괄(벡터) 규칙 ───────────────────────────
+    def filtered_mask(self, taxa, target_level: int = None) -> np.ndarray:
+        """
+        컬럼 Index 전체에 is_filtered_taxon 을 적용한 bool 배열
+        세그먼트 플래그를 taxon 별로 np.*.reduceat 으로 모음 (절단 라벨은 만들지 않음)
+        """
+        masks = [np.zeros(0, dtype=bool)]
+        for _, blk in self._blocks(taxa):
+            if not len(blk.counts):
+                continue
+            ends = blk.starts + blk.counts
+            noisy = np.logical_or.reduceat(blk.flags & NOISY > 0, blk.starts)
+            sp_end = blk.flags[ends - 1] & SP_END > 0
+            empty = blk.flags & EMPTY > 0
+            if target_level is not None:
+                has = blk.counts > target_level
+                at = np.where(has, blk.starts + target_level, 0)
+                empty_level = has & empty[at]
+            else:
+                # segs[1:] (2 개 이상) 또는 segs[2:] (3 개 이상) 가 모두 "__"
+                pos = np.arange(len(blk.flags)) - np.repeat(blk.starts, blk.counts)
+                empty_level = np.zeros(len(blk.counts), dtype=bool)
+                for first in (1, 2):
+                    filled = np.logical_or.reduceat(~empty & (pos >= first), blk.starts)
+                    empty_level |= (blk.counts > first) & ~filled
+            masks.append(noisy | sp_end | empty_level)
+        return np.concatenate(masks)
+
+    def truncate_labels(self, taxa) -> np.ndarray:
+        """
+        컬럼 Index 전체에 truncate_taxonomy 를 적용한 라벨 배열
+        첫 CUT 세그먼트 앞까지의 문자 수를 세그먼트 길이 누적합으로 구해 잘라냄
+        """
+        labels = [np.empty(0, dtype=object)]
+        for chunk, blk in self._blocks(taxa):
+            if not len(chunk):
+                continue
+            n = len(blk.flags)
+            ends = blk.starts + blk.counts
+            cut_at = np.where(blk.flags & CUT > 0, np.arange(n), n)
+            first = np.minimum(np.minimum.reduceat(cut_at, blk.starts), ends)
+            # 세그먼트마다 길이 + ";" 하나 → 앞 k 개 = 누적합 차이 - 1
+            offsets = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(blk.lengths + 1, out=offsets[1:])
+            keep = np.maximum(offsets[first] - offsets[blk.starts] - 1, 0)
+            out = chunk.copy()
+            for i in np.flatnonzero(first < ends):
+                out[i] = chunk[i][:keep[i]]
+            labels.append(out)
+        return np.concatenate(labels)
 
     # ─────────────────────────── 파일 처리 ───────────────────────────
-    def filter_and_truncate(self, df: pd.DataFrame, src: str):
-        self.log(f"Processing {src}")
-        
+    def _target_level(self, src: str) -> int | None:
         # 파일명에서 레벨 추출
         filename = os.path.basename(src)
         level_match = re.search(r'level-(\d+)', filename)
@@ -107,34 +252,164 @@ class TaxonomyFilter(MetabarcodingBase):
             self.log(f" Target level: {target_level + 1} (index: {target_level})")
         else:
             self.log(f" Target level: auto-detect")
-        
-        sample_col = self.sample_col or df.columns[0]
-        taxa_cols = df.columns.drop(sample_col)
+        return target_level
+
+    def filter_and_truncate(self, table: LevelTable | pd.DataFrame,
+                            src: str | None = None) -> FilterResult:
+        """src 를 생략하면 table.src (출력 이름 · target level 에 쓰임)"""
+        src = src or getattr(table, "src", None)
+        if src is None:
+            raise ValueError("src is required for tables without a source path")
+        self.log(f"Processing {src}")
+        if not isinstance(table, LevelTable):
+            table = as_level_table(table, self.sample_col, src, self.backend)
+        target_level = self._target_level(src)
+        taxa_cols = table.taxa
+        annotate(rows=table.shape[0], cols=table.shape[1])
 
         # 레벨별 필터링 적용
-        filtered = [c for c in taxa_cols if self.is_filtered_taxon(c, target_level)]
-        retained = [c for c in taxa_cols if c not in filtered]
+        mask = self.filtered_mask(taxa_cols, target_level)
+        n_filtered = int(mask.sum())
         
         self.log(f" Columns total={len(taxa_cols)}, "
-                 f"filtered={len(filtered)}, retained={len(retained)}")
+                 f"filtered={n_filtered}, retained={len(taxa_cols) - n_filtered}")
 
-        # 결과 DataFrame
-        df_filtered = df[[sample_col] + filtered]
-        df_retained = df[[sample_col] + retained]
-        df_trunc    = df.copy()
-        df_trunc.columns = [sample_col] + [self.truncate_taxonomy(c) for c in taxa_cols]
+        # 결과 테이블 (절단 후 같은 계통이 된 열은 합침)
+        relabeled = table.relabel(self.truncate_labels(taxa_cols))
+        truncated, n_merged = relabeled.aggregate_columns()
+        self.log(f" Truncated columns={truncated.shape[1]} "
+                 f"({n_merged} duplicate columns merged)")
+        result = FilterResult(
+            filtered=table.select(mask),
+            retained=table.select(~mask),
+            truncated=truncated,
+        )
 
         # 통계 출력
-        total = df[taxa_cols].to_numpy().sum()
-        fsum  = df_filtered[filtered].to_numpy().sum() if filtered else 0
+        total = table.counts.sum()
+        fsum  = result.filtered.counts.sum() if n_filtered else 0
         self.log(f" Total={total}, filtered={fsum} ({fsum/total*100:.2f}%)")
 
+        base = os.path.splitext(os.path.basename(src))[0]
+        self.filter_results[base] = result
+        if self.write_outputs:
+            for fmt in self.formats:
+                f_out, r_out, t_out = self.output_paths(src, fmt)
+                if fmt == "npy":
+                    result.filtered.to_npy (f_out)
+                    result.retained.to_npy (r_out)
+                    result.truncated.to_npy(t_out)
+                else:
+                    result.filtered.to_csv (f_out)
+                    result.retained.to_csv (r_out)
+                    result.truncated.to_csv(t_out)
+        return result
+
+    @staticmethod
+    def output_paths(src: str, fmt: str = "csv") -> list[str]:
+        """level-N.csv → [_filtered, _retained, _truncated] 경로 (fmt 별 확장자)"""
         base = os.path.splitext(os.path.basename(src))[0]
         out_dir = os.path.dirname(src)
-        df_filtered.to_csv(f"{out_dir}/{base}_filtered.csv",  index=False)
-        df_retained.to_csv(f"{out_dir}/{base}_retained.csv",  index=False)
-        df_trunc.to_csv   (f"{out_dir}/{base}_truncated.csv", index=False)
+        ext = NPY_SUFFIX if fmt == "npy" else ".csv"
+        return [f"{out_dir}/{base}_{kind}{ext}"
+                for kind in ("filtered", "retained", "truncated")]
+
+    def filter_outputs(self, src: str) -> list[str]:
+        """self.formats 전체의 출력 경로"""
+        return [fp for fmt in self.formats for fp in self.output_paths(src, fmt)]
+
+    def stream_filter_and_truncate(self, lvl: str, src: str):
+        """
+        filter_and_truncate 의 스트리밍 버전 (self.chunksize 행씩)
+        열 마스크·절단 라벨은 헤더에서 한 번만 계산하고, 출력 CSV 는 이어 쓰며,
+        stats_df 에 필요한 샘플별 미분류 비율도 같은 패스에서 누적
+        """
+        self.log(f"Processing {src} (streaming, chunksize={self.chunksize})")
+        target_level = self._target_level(src)
+        samples, ratios, writers = [], [], []
+        total = fsum = 0
+        for i, chunk in enumerate(self.level_chunks(src)):
+            if i == 0:
+                mask = self.filtered_mask(chunk.taxa, target_level)
+                stats_mask = self.filtered_mask(chunk.taxa)
+                codes, trunc_labels = pd.factorize(self.truncate_labels(chunk.taxa))
+                n_filtered = int(mask.sum())
+                self.log(f" Columns total={len(chunk.taxa)}, "
+                         f"filtered={n_filtered}, "
+                         f"retained={len(chunk.taxa) - n_filtered}")
+                self.log(f" Truncated columns={len(trunc_labels)} "
+                         f"({len(chunk.taxa) - len(trunc_labels)} duplicate "
+                         f"columns merged)")
+                if self.write_outputs and "npy" in self.formats:
+                    n_rows = count_rows(self.level_source(src))
+                    labels = (chunk.taxa[mask], chunk.taxa[~mask], trunc_labels)
+                    writers = [NpyTableWriter(out, n_rows, taxa, chunk.sample_col, src)
+                               for out, taxa in zip(self.output_paths(src, "npy"),
+                                                    labels)]
+
+            total += chunk.counts.sum()
+            fsum  += chunk.select(mask).counts.sum() if n_filtered else 0
+            samples += chunk.samples.tolist()
+            ratios.append(safe_ratio(chunk.select(stats_mask).row_sums(),
+                                     chunk.row_sums()))
+
+            if self.write_outputs:
+                parts = (chunk.select(mask), chunk.select(~mask),
+                         chunk.sum_columns(codes, trunc_labels))
+                if "csv" in self.formats:
+                    mode, header = ("w", True) if i == 0 else ("a", False)
+                    for part, out in zip(parts, self.output_paths(src)):
+                        part.to_csv(out, mode=mode, header=header)
+                for part, writer in zip(parts, writers):
+                    writer.write(part)
+
+        for writer in writers:
+            writer.close()
+        annotate(rows=len(samples), cols=len(mask))
+        self.log(f" Total={total}, filtered={fsum} ({fsum/total*100:.2f}%)")
+        self.streamed_stats[lvl] = (samples, np.concatenate(ratios))
+
+    @traced("filter", level_arg=0)
+    def filter_level(self, lvl: str, fp: str) -> FilterResult | None:
+        """입력이 바뀌지 않았으면 (manifest 기준) 건너뛰고 None"""
+        outputs = self.filter_outputs(fp)
+        key = self.manifest.stage_key([fp], sample_col=self.sample_col)
+        if self.manifest.is_current(f"filter:{lvl}", key, outputs):
+            self.log(f"Skipping {fp} (unchanged)")
+            annotate(skipped=True)
+            return None
+        if self.chunksize:
+            record_io(inputs=[self.level_source(fp)])
+            self.stream_filter_and_truncate(lvl, fp)
+            result = None
+        else:
+            result = self.filter_and_truncate(self.load_level(lvl), fp)
+        if self.write_outputs:
+            record_io(outputs=outputs)
+        self.manifest.record(f"filter:{lvl}", key, outputs)
+        return result
+
+    def process_all_files(self) -> dict[str, FilterResult]:
+        """모든 level 필터링 → {level: FilterResult} (건너뛴 level 은 없음)"""
+        for fp, lvl in zip(self.file_paths, self.level_names):
+            self.filter_level(lvl, fp)
+        return {lvl: self.filter_results[lvl] for lvl in self.level_names
+                if lvl in self.filter_results}
 
-    def process_all_files(self):
-        for fp in self.file_paths:
-            self.filter_and_truncate(pd.read_csv(fp), fp)
+    def truncated_table(self, lvl: str, fp: str) -> LevelTable:
+        """
+        메모리 결과 → 디스크 *_truncated.arrays (memory-map) → *_truncated.csv
+        → 새로 필터링 순으로 확보
+        """
+        result = self.filter_results.get(lvl)
+        if result is not None:
+            return result.truncated
+        if self.in_memory:
+            return self.filter_and_truncate(self.load_level(lvl), fp).truncated
+        npy_fp = self.output_paths(fp, "npy")[2]
+        if "npy" in self.formats and os.path.isdir(npy_fp):
+            return LevelTable.from_npy(npy_fp, self.backend)
+        trunc_fp = self.output_paths(fp)[2]
+        if os.path.exists(trunc_fp):
+            return LevelTable.from_csv(trunc_fp, backend=self.backend)
+        return self.filter_and_truncate(self.load_level(lvl), fp).truncated
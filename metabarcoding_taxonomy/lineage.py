@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+metabarcoding_taxonomy.lineage
+계통 문자열("k__A;p__B;…") trie 인덱스 — 세그먼트는 한 번만 intern 하고
+노드마다 정수 id 를 부여해 부모·라벨 조회와 상위 레벨 roll-up 을 O(1) 로
+(계통 문자열 자체는 저장하지 않음 — level 테이블의 열 이름은 CSV 헤더 그대로
+문자열이고, 필터 규칙·출력이 그 문자열을 씀. trie 는 roll-up 용 id 만 제공)
+"""
+from __future__ import annotations
+import threading
+import numpy as np
+import pandas as pd
+from .tables import LevelTable
+
+# 마지막 세그먼트의 rank 접두사 → 범례용 표기
+READABLE_PREFIX = {
+    "k__": "K: ",    # Kingdom
+    "p__": "P: ",    # Phylum
+    "c__": "C: ",    # Class
+    "o__": "O: ",    # Order
+    "f__": "F: ",    # Family
+    "g__": "G: ",    # Genus
+    "s__": "S: ",    # Species
+}
+
+
+def readable_segment(segment: str) -> str:
+    """"g__Vibrio" → "G: Vibrio" (접두사가 없으면 그대로)"""
+    for prefix, readable in READABLE_PREFIX.items():
+        if segment.startswith(prefix):
+            return f"{readable}{segment.replace(prefix, '')}"
+    return segment
+
+
+class LineageIndex:
+    """
+    계통 trie
+
+    node 0 은 root (깊이 0). 노드 i 는 parent[i], 세그먼트 id seg[i],
+    깊이 depth[i] 를 가지며 세그먼트 문자열은 segments[seg[i]] 에 한 번만 저장
+    같은 계통 문자열은 항상 같은 id → level 테이블 열을 정수 배열로 표현 가능
+    문자열 → id 는 세그먼트마다 (부모, 세그먼트) → 자식 dict 를 따라 내려감
+    """
+
+    ROOT = 0
+
+    def __init__(self):
+        self.segments: list[str] = []
+        self._segment_ids: dict[str, int] = {}
+        self._parent: list[int] = [-1]
+        self._seg: list[int] = [-1]
+        self._depth: list[int] = [0]
+        self._children: dict[tuple[int, int], int] = {}
+        self._arrays: tuple[np.ndarray, np.ndarray] | None = None
+        self._lock = threading.Lock()   # executor="thread" 에서 공유됨
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._parent)
+
+    # ---------- 추가 ----------
+    def _intern(self, segment: str) -> int:
+        sid = self._segment_ids.get(segment)
+        if sid is None:
+            sid = self._segment_ids[segment] = len(self.segments)
+            self.segments.append(segment)
+        return sid
+
+    def find(self, lineage: str) -> int | None:
+        """이미 있는 계통의 노드 id (없으면 None, trie 는 바꾸지 않음)"""
+        node = self.ROOT
+        for segment in lineage.split(";"):
+            sid = self._segment_ids.get(segment)
+            node = None if sid is None else self._children.get((node, sid))
+            if node is None:
+                return None
+        return node
+
+    def add(self, lineage: str) -> int:
+        """계통 문자열 → 노드 id (없는 조상 노드도 함께 생성)"""
+        node = self.find(lineage)
+        if node is not None:
+            return node
+        with self._lock:
+            node = self.ROOT
+            for segment in lineage.split(";"):
+                sid = self._intern(segment)
+                child = self._children.get((node, sid))
+                if child is None:
+                    child = len(self._parent)
+                    self._children[(node, sid)] = child
+                    self._parent.append(node)
+                    self._seg.append(sid)
+                    self._depth.append(self._depth[node] + 1)
+                    self._arrays = None
+                node = child
+        return node
+
+    def encode(self, taxa) -> np.ndarray:
+        """taxon 열 이름들 → 노드 id 배열"""
+        return np.fromiter((self.add(t) for t in taxa), dtype=np.int64,
+                           count=len(taxa))
+
+    # ---------- 조회 ----------
+    def parent(self, node: int) -> int:
+        return self._parent[node]
+
+    def depth(self, node: int) -> int:
+        return self._depth[node]
+
+    def label(self, node: int) -> str:
+        """마지막 세그먼트 ("g__Vibrio")"""
+        return self.segments[self._seg[node]] if node else ""
+
+    def readable_label(self, node: int) -> str:
+        return readable_segment(self.label(node))
+
+    def lineage(self, node: int) -> str:
+        """노드 → 전체 계통 문자열 (조상 세그먼트를 이어 붙여 매번 만듦)"""
+        segments = []
+        while node != self.ROOT:
+            segments.append(self.label(node))
+            node = self._parent[node]
+        return ";".join(reversed(segments))
+
+    def decode(self, nodes) -> pd.Index:
+        """노드 id 배열 → 계통 문자열 Index (호출 안에서만 부모 문자열 재사용)"""
+        memo = {self.ROOT: ""}
+
+        def text(node: int) -> str:
+            out = memo.get(node)
+            if out is None:
+                parent = self._parent[node]
+                out = (self.label(node) if parent == self.ROOT
+                       else f"{text(parent)};{self.label(node)}")
+                memo[node] = out
+            return out
+        return pd.Index([text(int(n)) for n in nodes])
+
+    def _as_arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        if self._arrays is None:
+            self._arrays = (np.asarray(self._parent, dtype=np.int64),
+                            np.asarray(self._depth, dtype=np.int64))
+        return self._arrays
+
+    def ancestors_at(self, nodes, depth: int) -> np.ndarray:
+        """각 노드의 깊이 depth 조상 (이미 더 얕으면 자기 자신)"""
+        parent, depths = self._as_arrays()
+        nodes = np.asarray(nodes, dtype=np.int64).copy()
+        for _ in range(int(depths[nodes].max(initial=0)) - depth):
+            deeper = depths[nodes] > depth
+            nodes[deeper] = parent[nodes[deeper]]
+        return nodes
+
+    # ---------- roll-up ----------
+    def group_at(self, nodes, depth: int) -> tuple[np.ndarray, np.ndarray]:
+        """(열마다 묶음 번호, 묶음별 깊이 depth 조상 노드) — 처음 등장 순서"""
+        return pd.factorize(self.ancestors_at(nodes, depth))
+
+    def rollup(self, table: LevelTable, depth: int,
+               nodes: np.ndarray | None = None) -> LevelTable:
+        """
+        level 테이블의 열을 깊이 depth 계통으로 합침
+        (level-7 → level-3 등, 열 순서는 처음 등장 순서)
+        nodes : table.taxa 의 노드 id (이미 encode 했으면 다시 문자열을 나누지 않음)
+        """
+        codes, uniques = self.group_at(
+            self.encode(table.taxa) if nodes is None else nodes, depth)
+        return table.sum_columns(codes, self.decode(uniques))
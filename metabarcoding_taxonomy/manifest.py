@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+metabarcoding_taxonomy.manifest
+content-hash 기반 단계별 재실행 판단 (incremental re-run)
+"""
+from __future__ import annotations
+import hashlib, json, os
+
+MANIFEST_NAME = ".metabarcoding_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def _digest(obj) -> str:
+    blob = json.dumps(obj, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()
+
+
+class RunManifest:
+    """
+    출력 폴더에 저장되는 실행 기록
+
+    files  : 입력 파일별 (size, mtime_ns, sha256) — stat 이 같으면 해시 재사용
+    stages : 단계 이름 → (입력 해시·파라미터 digest, 출력 파일, 보관 데이터)
+    """
+
+    def __init__(self, out_dir: str, enabled: bool = True, force: bool = False):
+        self.out_dir = out_dir
+        self.enabled = enabled
+        self.force = force
+        self.autosave = True
+        self.path = os.path.join(out_dir, MANIFEST_NAME)
+        self.files: dict[str, dict] = {}
+        self.stages: dict[str, dict] = {}
+        self.updated: dict[str, dict] = {}
+        self.aliases: dict[str, str] = {}   # 파생 입력 경로 → 실제로 읽는 파일
+        if enabled and os.path.exists(self.path):
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            return  # 손상된 manifest 는 무시하고 전부 다시 실행
+        if data.get("version") == MANIFEST_VERSION:
+            self.files = data.get("files", {})
+            self.stages = data.get("stages", {})
+
+    def save(self):
+        if not self.enabled:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"version": MANIFEST_VERSION, "files": self.files,
+                       "stages": self.stages}, fh, indent=1)
+        os.replace(tmp, self.path)
+
+    # ---------- 해시 ----------
+    def file_hash(self, fp: str) -> str:
+        st = os.stat(fp)
+        key = os.path.relpath(fp, self.out_dir)
+        entry = self.files.get(key)
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            return entry["sha256"]
+
+        h = hashlib.sha256()
+        with open(fp, "rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                h.update(block)
+        self.files[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                           "sha256": h.hexdigest()}
+        return h.hexdigest()
+
+    def stage_key(self, files: list[str], **params) -> str:
+        """입력 파일 해시 + 파라미터 → 단계 digest (aliases 는 원본 파일로 해시)"""
+        if not self.enabled:
+            return ""   # 기록·비교하지 않으므로 파일을 해시할 필요 없음
+        hashes = {os.path.basename(fp): self.file_hash(self.aliases.get(fp, fp))
+                  for fp in files}
+        return _digest({"files": hashes, "params": params})
+
+    # ---------- 단계 ----------
+    def is_current(self, stage: str, key: str, outputs: list[str] = ()) -> bool:
+        """입력이 그대로이고 출력 파일이 모두 남아 있으면 True"""
+        if not self.enabled or self.force:
+            return False
+        entry = self.stages.get(stage)
+        if entry is None or entry["key"] != key:
+            return False
+        return all(os.path.exists(o) for o in outputs)
+
+    def data(self, stage: str):
+        """is_current 인 단계에 함께 저장해 둔 결과"""
+        return self.stages[stage].get("data")
+
+    def record(self, stage: str, key: str, outputs: list[str] = (), data=None):
+        if not self.enabled:
+            return
+        entry = {"key": key, "outputs": [os.path.basename(o) for o in outputs]}
+        if data is not None:
+            entry["data"] = data
+        self.stages[stage] = entry
+        self.updated[stage] = entry
+        if self.autosave:
+            self.save()
+
+    def merge(self, files: dict, stages: dict):
+        """병렬 워커가 기록한 항목 반영"""
+        if not self.enabled or not stages:
+            return
+        self.files.update(files)
+        self.stages.update(stages)
+        self.updated.update(stages)
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+metabarcoding_taxonomy.profiling
+단계·level 별 timing span (행·열 수, 읽고 쓴 바이트, RSS) — logging 과
+JSON trace 로 출력, 필요한 단계만 cProfile / tracemalloc
+"""
+from __future__ import annotations
+import cProfile, functools, json, logging, os, sys, threading, time, tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+try:
+    import resource                  # Windows 에는 없음
+except ImportError:
+    resource = None
+
+LOGGER = logging.getLogger("metabarcoding_taxonomy")
+LOGGER.addHandler(logging.NullHandler())   # 출력 핸들러는 앱(CLI 등)이 붙임
+LOG_FORMAT = "[%(asctime)s] %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+TRACE_VERSION = 1
+
+# 병렬 실행 시 level 단위로 span 을 모았다가 본 프로세스 trace 에 합치기 위한 버퍼
+_SPAN_BUFFER: ContextVar[list[dict] | None] = ContextVar("_SPAN_BUFFER", default=None)
+# 현재 열린 가장 안쪽 span (annotate / 출력 파일 기록용)
+_CURRENT_SPAN: ContextVar[dict | None] = ContextVar("_CURRENT_SPAN", default=None)
+# cProfile · tracemalloc 은 중첩할 수 없으므로 가장 바깥 span 만 켬
+_PROFILING: ContextVar[bool] = ContextVar("_PROFILING", default=False)
+
+
+class _LineFormatter(logging.Formatter):
+    """워커에서 이미 "[시각] 메시지" 로 만든 줄은 그대로 출력"""
+    def format(self, record):
+        if getattr(record, "preformatted", False):
+            return record.getMessage()
+        return super().format(record)
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """출력 시점의 sys.stdout 에 씀 (print 와 같은 동작)"""
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+def get_logger() -> logging.Logger:
+    """
+    패키지 logger — 라이브러리는 NullHandler 만 붙이고 root 로 전파
+    (핸들러·레벨은 logging.basicConfig 나 configure_logging 으로 앱이 정함)
+    """
+    return LOGGER
+
+
+def configure_logging(level: int = logging.INFO) -> logging.Logger:
+    """
+    CLI·배치 스크립트용 — 패키지 logger 에 stdout 핸들러를 한 번만 붙임
+    예전 print 출력과 같은 "[YYYY-MM-DD HH:MM:SS] 메시지" 형식
+    """
+    if not any(isinstance(h, _StdoutHandler) for h in LOGGER.handlers):
+        handler = _StdoutHandler()
+        handler.setFormatter(_LineFormatter(LOG_FORMAT, DATE_FORMAT))
+        LOGGER.addHandler(handler)
+    LOGGER.setLevel(level)
+    return LOGGER
+
+
+def format_line(msg: str) -> str:
+    return f"[{time.strftime(DATE_FORMAT)}] {msg}"
+
+
+def max_rss() -> int | None:
+    """
+    프로세스 시작 이후 최대 RSS (bytes, ru_maxrss) — resource 모듈이 없으면 None
+    span 마다 따로 재는 값이 아니므로 span 에는 이 값과 span 동안 늘어난 양을 기록
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024   # Linux 는 KiB
+
+
+def path_bytes(paths) -> int:
+    """파일 크기 합 (.arrays 같은 디렉터리는 안의 파일 합, 없는 경로는 0)"""
+    total = 0
+    for path in paths:
+        if not path:
+            continue
+        if os.path.isdir(path):
+            total += sum(e.stat().st_size for e in os.scandir(path) if e.is_file())
+        elif os.path.exists(path):
+            total += os.path.getsize(path)
+    return total
+
+
+def _human_bytes(n: int) -> str:
+    return f"{n / 2**20:.1f}MiB" if n >= 2**20 else f"{n / 1024:.1f}KiB"
+
+
+def describe_span(span: dict) -> str:
+    """span 한 줄 요약 (DEBUG 로그용)"""
+    parts = [span["name"]]
+    if span.get("level"):
+        parts.append(span["level"])
+    parts.append(f"{span['seconds']:.3f}s")
+    for key in ("rows", "cols"):
+        if key in span:
+            parts.append(f"{key}={span[key]}")
+    for key in ("bytes_read", "bytes_written", "rss_growth", "traced_peak"):
+        if span.get(key):
+            parts.append(f"{key}={_human_bytes(span[key])}")
+    if span.get("skipped"):
+        parts.append("skipped")
+    return "span " + " ".join(parts)
+
+
+def annotate(**fields):
+    """현재 span 에 값 기록 (열린 span 이 없으면 무시)"""
+    span = _CURRENT_SPAN.get()
+    if span is not None:
+        span.update(fields)
+
+
+def record_io(inputs=(), outputs=()):
+    """현재 span 이 읽거나 쓴 경로 추가 (닫힐 때 크기를 합산)"""
+    span = _CURRENT_SPAN.get()
+    if span is not None:
+        span["inputs"].extend(inputs)
+        span["outputs"].extend(outputs)
+
+
+def traced(name: str, level_arg: int | None = None):
+    """
+    메서드 전체를 self.span(name, level) 으로 감싸는 데코레이터
+    level 은 level_arg 번째 위치 인자 (level_barplot(lvl, fp, …) 이면 0)
+    """
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(self, *args, **kw):
+            level = args[level_arg] if level_arg is not None else None
+            with self.span(name, level):
+                return fn(self, *args, **kw)
+        return inner
+    return wrap
+
+
+class StageTracer:
+    """
+    timing span 기록기
+
+    span 이름은 "stage" 또는 "stage:detail" (load, filter, stats:unclassified,
+    plot:barplot …). profile / memory 에는 stage 이름, 전체 이름 또는 "all"
+      profile : cProfile 결과를 profile_dir/<span>[-<level>].prof 로 저장
+      memory  : tracemalloc 최대 할당량을 span 의 traced_peak 에 기록
+    max_rss 는 span 이 닫힐 때의 프로세스 최대 RSS (그 전 단계 포함),
+    rss_growth 는 span 동안 그 최대치가 늘어난 양 (스레드 워커끼리는 섞임)
+    span 은 dict — 블록 안에서 rows, cols, inputs, outputs (경로) 등을 채움
+    """
+
+    def __init__(self, profile=(), memory=(), profile_dir: str = "."):
+        self.profile = set(profile)
+        self.memory = set(memory)
+        self.profile_dir = profile_dir
+        self.spans: list[dict] = []
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _wants(stages: set[str], name: str) -> bool:
+        return bool(stages) and ("all" in stages or name in stages
+                                 or name.split(":")[0] in stages)
+
+    @contextmanager
+    def span(self, name: str, level: str | None = None, **fields):
+        span = {"name": name, "level": level, "inputs": [], "outputs": [], **fields}
+        current = _CURRENT_SPAN.set(span)
+        outer = not _PROFILING.get()
+        profiler = (cProfile.Profile() if outer and self._wants(self.profile, name)
+                    else None)
+        memory = (outer and self._wants(self.memory, name)
+                  and not tracemalloc.is_tracing())
+        token = _PROFILING.set(True) if profiler or memory else None
+        if memory:
+            tracemalloc.start()
+        if profiler is not None:
+            try:
+                profiler.enable()
+            except ValueError:   # 다른 스레드가 이미 프로파일 중 (3.12+)
+                profiler = None
+        rss0 = max_rss()
+        start, t0, c0 = time.time(), time.perf_counter(), time.process_time()
+        try:
+            yield span
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            span.update(start=round(start, 6),
+                        seconds=round(time.perf_counter() - t0, 6),
+                        cpu_seconds=round(time.process_time() - c0, 6),
+                        bytes_read=path_bytes(span.pop("inputs", ())),
+                        bytes_written=path_bytes(span.pop("outputs", ())),
+                        max_rss=max_rss(), pid=os.getpid())
+            if rss0 is not None:
+                span["rss_growth"] = span["max_rss"] - rss0
+            if memory:
+                span["traced_peak"] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            if profiler is not None:
+                span["profile"] = self._dump(profiler, name, level)
+            if token is not None:
+                _PROFILING.reset(token)
+            _CURRENT_SPAN.reset(current)
+            self._record(span)
+
+    def _dump(self, profiler: cProfile.Profile, name: str, level: str | None) -> str:
+        os.makedirs(self.profile_dir, exist_ok=True)
+        stem = name.replace(":", "_") + (f"-{level}" if level else "")
+        path = os.path.join(self.profile_dir, f"{stem}.prof")
+        profiler.dump_stats(path)
+        return path
+
+    def _record(self, span: dict):
+        buffer = _SPAN_BUFFER.get()
+        with self._lock:
+            (self.spans if buffer is None else buffer).append(span)
+
+    @staticmethod
+    @contextmanager
+    def captured():
+        """블록 안에서 닫힌 span 을 리스트로 수집 (스레드/프로세스별)"""
+        buffer: list[dict] = []
+        token = _SPAN_BUFFER.set(buffer)
+        try:
+            yield buffer
+        finally:
+            _SPAN_BUFFER.reset(token)
+
+    def extend(self, spans: list[dict]):
+        with self._lock:
+            self.spans.extend(spans)
+
+    # ---------- 출력 ----------
+    def summary(self):
+        """span 이름별 합계 (DataFrame: count, seconds, cpu_seconds, bytes …)"""
+        import pandas as pd
+        df = pd.DataFrame(self.spans)
+        if df.empty:
+            return df
+        cols = [c for c in ("seconds", "cpu_seconds", "bytes_read", "bytes_written")
+                if c in df]
+        out = df.groupby("name", sort=False)[cols].sum()
+        out.insert(0, "count", df.groupby("name", sort=False).size())
+        for col in ("max_rss", "rss_growth"):
+            if col in df:
+                out[col] = df.groupby("name", sort=False)[col].max()
+        return out
+
+    def save(self, path: str):
+        """JSON trace 저장 ({"version", "spans": [...]})"""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"version": TRACE_VERSION, "spans": self.spans}, fh, indent=1)
+        os.replace(tmp, path)
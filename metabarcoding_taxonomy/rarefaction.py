@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+metabarcoding_taxonomy.rarefaction
+rarefaction — 샘플마다 같은 깊이로 비복원 추출 (multivariate hypergeometric)
+반복을 묶음(batch)으로 나눠 프로세스 풀에서 실행, 평균 카운트와 지표별 신뢰 구간
+"""
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+from .diversity import ALPHA_METRICS, alpha_diversity
+from .tables import LevelTable
+
+RAREFACTION_METRICS = ("unclassified", *ALPHA_METRICS)
+
+
+class RarefactionResult(NamedTuple):
+    """
+    table   : 반복 평균 카운트 (float) — 깊이가 같으므로 비율·상대 풍부도는
+              반복별 값의 평균과 같음
+    stats   : 샘플 × (지표, mean / low / high) — 비선형 지표(다양성)는 반복마다 계산
+    dropped : 총 카운트가 depth 미만이라 제외된 샘플
+    """
+    depth: int
+    iterations: int
+    table: LevelTable
+    stats: pd.DataFrame
+    dropped: list
+
+
+def _observed(table: LevelTable) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (관측된 열 위치, 해당 열의 dense 정수 카운트)
+    비복원 추출은 read 카운트에만 의미가 있으므로 정수가 아니거나 음수면 ValueError
+    (상대 풍부도·이미 rarefy 한 평균 테이블 등을 조용히 잘라 쓰지 않음)
+    """
+    if table.is_sparse:
+        m = table.counts.tocsc()
+        cols = np.flatnonzero(np.diff(m.indptr))
+        counts = m[:, cols].toarray()
+    else:
+        counts = np.asarray(table.counts)
+        cols = np.flatnonzero(counts.any(axis=0))
+        counts = counts[:, cols]
+    if not np.all(counts == np.floor(counts)) or (counts < 0).any():
+        raise ValueError("rarefaction needs non-negative integer counts")
+    return cols, counts.astype(np.int64)
+
+
+def _rarefy_batch(counts: np.ndarray, mask: np.ndarray, depth: int,
+                  seed: np.random.SeedSequence, size: int):
+    """
+    워커: size 번 반복 → (반복 합 카운트, {지표: 반복 × 샘플})
+    샘플마다 multivariate_hypergeometric 한 번에 size 개를 뽑음 (0 인 열 제외)
+    """
+    rng = np.random.default_rng(seed)
+    n = counts.shape[0]
+    total = np.zeros(counts.shape)
+    stats = {m: np.empty((size, n)) for m in RAREFACTION_METRICS}
+    for i in range(n):
+        nz = np.flatnonzero(counts[i])
+        draws = rng.multivariate_hypergeometric(counts[i, nz], depth, size=size)
+        total[i, nz] = draws.sum(axis=0)
+        stats["unclassified"][:, i] = draws[:, mask[nz]].sum(axis=1) / depth
+        alpha = alpha_diversity(LevelTable(range(size), nz, draws))
+        for m in ALPHA_METRICS:
+            stats[m][:, i] = alpha[m].to_numpy()
+    return total, stats
+
+
+def depth_range(table: LevelTable) -> tuple[int, int]:
+    """(가장 얕은, 가장 깊은) 샘플 총 카운트 — 0 인 샘플 제외"""
+    sums = table.row_sums()
+    sums = sums[sums > 0]
+    return (int(sums.min()), int(sums.max())) if len(sums) else (0, 0)
+
+
+def rarefy(table: LevelTable, depth: int, iterations: int = 100,
+           seed: int | np.random.SeedSequence = 0, workers: int = 1,
+           batch: int = 10, ci: float = 0.95,
+           unclassified_mask: np.ndarray | None = None) -> RarefactionResult:
+    """
+    table 을 depth 로 iterations 번 rarefy
+    반복은 batch 개씩 묶어 seed 의 SeedSequence.spawn 으로 묶음별 시드를 받으므로
+    결과는 workers 수와 무관하게 같음 (workers > 1 이면 프로세스 풀)
+    unclassified_mask : 미분류 비율을 셀 taxon 열 (없으면 0)
+    신뢰 구간은 반복 분포의 (1 - ci) / 2, (1 + ci) / 2 분위수
+    """
+    if depth <= 0:
+        raise ValueError("depth must be a positive count")
+    if iterations <= 0 or batch <= 0:
+        raise ValueError("iterations and batch must be positive")
+    if not 0 < ci < 1:
+        raise ValueError("ci must be between 0 and 1")
+
+    keep = table.row_sums() >= depth
+    dropped = table.samples[~keep].tolist()
+    if not keep.any():
+        raise ValueError(f"no sample has at least {depth} counts")
+    cols, counts = _observed(table)
+    counts = counts[keep]
+    mask = (np.zeros(len(cols), dtype=bool) if unclassified_mask is None
+            else np.asarray(unclassified_mask, dtype=bool)[cols])
+
+    sizes = [min(batch, iterations - start) for start in range(0, iterations, batch)]
+    seq = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    seeds = seq.spawn(len(sizes))
+    args = ([counts] * len(sizes), [mask] * len(sizes), [depth] * len(sizes),
+            seeds, sizes)
+    if workers > 1 and len(sizes) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(sizes))) as pool:
+            batches = list(pool.map(_rarefy_batch, *args))
+    else:
+        batches = list(map(_rarefy_batch, *args))
+
+    mean = np.zeros((counts.shape[0], len(table.taxa)))
+    mean[:, cols] = sum(total for total, _ in batches) / iterations
+    samples = table.samples[keep]
+    q = [(1 - ci) / 2 * 100, (1 + ci) / 2 * 100]
+    frames = {}
+    for m in RAREFACTION_METRICS:
+        values = np.concatenate([stats[m] for _, stats in batches])
+        low, high = np.nanpercentile(values, q, axis=0)
+        frames[m] = pd.DataFrame({"mean": np.nanmean(values, axis=0),
+                                  "low": low, "high": high}, index=samples)
+    rarefied = LevelTable(samples, table.taxa, mean, table.sample_col, table.src)
+    return RarefactionResult(
+        depth, iterations, rarefied.to_sparse() if table.is_sparse else rarefied,
+        pd.concat(frames, axis=1), dropped)
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+metabarcoding_taxonomy.service
+로컬 HTTP/JSON 분석 서비스 — 파싱한 level 테이블·taxon 판정·그림을 입력 해시
+기준 bounded LRU 캐시에 유지하고, 그림 렌더링은 프로세스 풀에서
+
+    python -m metabarcoding_taxonomy serve --port 8750 --workers 2
+
+    POST /stats    {"input_dir": "/data/run1", "mapping": {"0H": "T0"}}
+    POST /barplot  {"input_dir": "/data/run1", "level": "level-5", "top_n": 15,
+                    "format": "png"}            # format 생략 시 값(JSON)만
+    POST /filter   {"tables": {"level-1": {"samples": [...], "taxa": [...],
+                                           "counts": [[...], ...]}}}
+    GET  /health
+"""
+from __future__ import annotations
+import glob, json, math, multiprocessing, os, re, threading
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from .cache import LRUCache
+from .manifest import RunManifest, _digest
+
+CONTENT_TYPES = {"pdf": "application/pdf", "svg": "image/svg+xml",
+                 "png": "image/png"}
+
+
+def _render_barplot(fmt: str, dpi: int, preview: bool, font_family: str,
+                    view, legend: list[str]) -> bytes:
+    """워커 프로세스: AbundanceView → 그림 바이트 (matplotlib 은 여기서만 로드)"""
+    from .figures import FigureTemplate
+    from .visualizer import barplot_figure
+    figures = _TEMPLATES.get((fmt, dpi, preview, font_family))
+    if figures is None:
+        figures = _TEMPLATES[(fmt, dpi, preview, font_family)] = FigureTemplate(
+            fmt, dpi, preview, font_family)
+    return figures.to_bytes(barplot_figure(figures, view, legend, dpi))
+
+
+_TEMPLATES: dict = {}   # 워커 프로세스별 FigureTemplate (레이아웃 캐시 유지)
+
+
+def _mapping(req: dict) -> dict:
+    mapping = req.get("mapping") or {}
+    if not isinstance(mapping, dict):
+        raise ValueError("mapping must be an object of sample name -> label")
+    return mapping
+
+
+def _finite(obj):
+    """JSON 에는 NaN/Infinity 가 없으므로 null 로 (합계 0 샘플의 비율 등)"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(v) for v in obj]
+    return obj
+
+
+class Project:
+    """
+    입력 하나(폴더 또는 인라인 테이블)의 warm 상태
+    분석 인스턴스가 level 테이블·taxon 판정 캐시·필터 결과를 들고 있고,
+    샘플 이름 매핑과 무관한 미분류 비율·retained 비율은 한 번만 계산
+    """
+
+    def __init__(self, key: str, analysis):
+        self.key = key
+        self.analysis = analysis
+        self.lock = threading.Lock()
+        self._unclassified: tuple[list, dict] | None = None
+        self._retained: dict[str, float] | None = None
+
+    def unclassified(self) -> tuple[list, dict]:
+        """(샘플 이름, {level: 샘플별 미분류 비율})"""
+        with self.lock:
+            if self._unclassified is None:
+                a, ratios, samples = self.analysis, {}, None
+                for fp, lvl in zip(a.file_paths, a.level_names):
+                    level_samples, ratios[lvl] = a.level_unclassified(lvl, fp)
+                    samples = samples or level_samples
+                self._unclassified = (samples, ratios)
+            return self._unclassified
+
+    def retained(self) -> dict[str, float]:
+        with self.lock:
+            if self._retained is None:
+                a = self.analysis
+                self._retained = {lvl: a.level_retained_ratio(lvl, fp)
+                                  for fp, lvl in zip(a.file_paths, a.level_names)}
+            return self._retained
+
+    def truncated(self, lvl: str):
+        """절단 테이블 — 디스크의 예전 *_truncated 출력은 쓰지 않음"""
+        a = self.analysis
+        if lvl not in a.level_names:
+            raise KeyError(f"unknown level {lvl!r}; levels are {a.level_names}")
+        with self.lock:
+            result = a.filter_results.get(lvl)
+            if result is None:
+                fp = a.file_paths[a.level_names.index(lvl)]
+                result = a.filter_and_truncate(a.load_level(lvl), fp)
+            return result.truncated
+
+    def filter_summary(self) -> dict[str, dict]:
+        with self.lock:
+            results = self.analysis.process_all_files()
+        return {lvl: {kind: int(table.shape[1]) for kind, table in r._asdict().items()}
+                for lvl, r in results.items()}
+
+
+class AnalysisService:
+    """
+    요청 처리 본체 (HTTP 와 무관하게 직접 호출 가능)
+
+    max_projects : 유지할 입력 수 (LRU)
+    max_figures  : 렌더링한 그림 바이트 캐시 크기 (LRU)
+    workers      : 렌더링 프로세스 수 (0 이면 요청 스레드에서 직접)
+    """
+
+    def __init__(self, max_projects: int = 8, max_figures: int = 256,
+                 workers: int = 2, backend: str = "dense",
+                 font_family: str = "Arial"):
+        self.projects = LRUCache(max_projects)
+        self.figures = LRUCache(max_figures)
+        self.backend = backend
+        self.font_family = font_family
+        self._hashes = RunManifest(".", enabled=False)   # stat 기반 파일 해시 재사용
+        self._hash_lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self.pool = (ProcessPoolExecutor(workers,
+                                         mp_context=multiprocessing.get_context("spawn"))
+                     if workers else None)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    # ---------- 입력 ----------
+    def _input_key(self, req: dict) -> str:
+        options = {k: req.get(k) for k in ("sample_col", "level_pattern",
+                                           "derive_levels")}
+        if "tables" in req:
+            return _digest({"tables": req["tables"], **options})
+        input_dir = req.get("input_dir")
+        if not input_dir:
+            raise ValueError("request needs 'input_dir' or 'tables'")
+        pattern = os.path.join(input_dir, req.get("level_pattern") or "level-*.csv")
+        files = sorted(fp for fp in glob.glob(pattern)
+                       if re.fullmatch(r"level-\d+\.csv", os.path.basename(fp)))
+        if not files:
+            raise FileNotFoundError(f"No level files found in {input_dir}")
+        with self._hash_lock:
+            hashes = {os.path.abspath(fp): self._hashes.file_hash(os.path.abspath(fp))
+                      for fp in files}
+        return _digest({"files": hashes, **options})
+
+    def project(self, req: dict) -> Project:
+        key = self._input_key(req)
+        project = self.projects.get(key)
+        if project is not None:
+            return project
+        with self._build_lock:
+            project = self.projects.get(key)
+            if project is None:
+                project = Project(key, self._analysis(req))
+                self.projects.put(key, project)
+        return project
+
+    def _analysis(self, req: dict):
+        from .statistics import TaxonomyStatistics
+        options = dict(sample_col=req.get("sample_col"), backend=self.backend,
+                       derive_levels=bool(req.get("derive_levels")),
+                       write_outputs=False, incremental=False)
+        if "tables" in req:
+            tables = {name: (t["counts"], t["samples"], t["taxa"])
+                      for name, t in req["tables"].items()}
+            return TaxonomyStatistics.from_tables(tables, **options)
+        return TaxonomyStatistics(
+            input_dir=req["input_dir"],
+            level_pattern=req.get("level_pattern") or "level-*.csv", **options)
+
+    # ---------- 요청 ----------
+    def stats(self, req: dict) -> dict:
+        project = self.project(req)
+        samples, ratios = project.unclassified()
+        mapping = _mapping(req)
+        return {
+            "key": project.key,
+            "samples": [mapping.get(s, s) for s in samples],
+            "unclassified": {lvl: r.tolist() for lvl, r in ratios.items()},
+            "retained_taxa_ratio": project.retained(),
+        }
+
+    def filter(self, req: dict) -> dict:
+        project = self.project(req)
+        return {"key": project.key, "levels": project.filter_summary()}
+
+    def barplot(self, req: dict) -> tuple[str, bytes | dict]:
+        """("json", 값) 또는 (content-type, 그림 바이트)"""
+        from .abundance import top_abundance
+        project = self.project(req)
+        lvl = req.get("level") or project.analysis.level_names[-1]
+        top_n = int(req.get("top_n", 10))
+        if top_n <= 0:
+            raise ValueError("top_n must be a positive integer")
+        mapping = _mapping(req)
+        fmt = req.get("format")
+        dpi = int(req.get("dpi", 150))
+
+        fig_key = (project.key, lvl, top_n, tuple(sorted(mapping.items())), fmt, dpi)
+        if fmt is not None:
+            if fmt not in CONTENT_TYPES:
+                raise ValueError(f"format must be one of {tuple(CONTENT_TYPES)}")
+            cached = self.figures.get(fig_key)
+            if cached is not None:
+                return CONTENT_TYPES[fmt], cached
+
+        table = project.truncated(lvl)
+        samples = [mapping.get(s, s) for s in table.samples.tolist()]
+        view = top_abundance(table, top_n, samples)
+        a = project.analysis
+        legend = [a.last_tax_label_with_readable_prefix(t) for t in view.taxa]
+        if fmt is None:
+            return "json", {"key": project.key, "level": lvl, "samples": view.samples,
+                            "taxa": view.taxa, "legend": legend,
+                            "values": view.values.tolist(),
+                            "has_other": view.has_other}
+
+        args = (fmt, dpi, False, self.font_family, view, legend)
+        data = (self.pool.submit(_render_barplot, *args).result() if self.pool
+                else _render_barplot(*args))
+        self.figures.put(fig_key, data)
+        return CONTENT_TYPES[fmt], data
+
+    def health(self) -> dict:
+        return {"status": "ok",
+                "projects": self.projects.info()._asdict(),
+                "figures": self.figures.info()._asdict()}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    service: AnalysisService   # make_server 에서 지정
+    routes = {"/stats": "stats", "/filter": "filter", "/barplot": "barplot"}
+
+    def _send(self, status: int, content_type: str, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, status: int, obj):
+        self._send(status, "application/json",
+                   json.dumps(_finite(obj), default=str,
+                              allow_nan=False).encode("utf-8"))
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._json(200, self.service.health())
+        else:
+            self._json(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self):
+        method = self.routes.get(self.path)
+        if method is None:
+            return self._json(404, {"error": f"unknown path {self.path}"})
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            req = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(req, dict):
+                raise ValueError("request body must be a JSON object")
+            result = getattr(self.service, method)(req)
+        except FileNotFoundError as exc:
+            return self._json(404, {"error": str(exc)})
+        except (ValueError, KeyError, TypeError) as exc:
+            return self._json(400, {"error": f"{type(exc).__name__}: {exc}"})
+        except Exception as exc:   # 서비스는 계속 살아 있어야 함
+            return self._json(500, {"error": f"{type(exc).__name__}: {exc}"})
+        if method == "barplot":
+            content_type, body = result
+            if content_type == "json":
+                return self._json(200, body)
+            return self._send(200, content_type, body)
+        self._json(200, result)
+
+    def log_message(self, fmt, *args):
+        from .profiling import get_logger
+        get_logger().debug("%s %s", self.address_string(), fmt % args)
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8750,
+                service: AnalysisService | None = None) -> ThreadingHTTPServer:
+    """요청마다 스레드 하나 (CPU 를 쓰는 렌더링은 service 의 프로세스 풀)"""
+    handler = type("Handler", (_Handler,), {"service": service or AnalysisService()})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve(host: str = "127.0.0.1", port: int = 8750, **kw):
+    service = AnalysisService(**kw)
+    server = make_server(host, port, service)
+    from .profiling import get_logger
+    get_logger().info(f"Serving on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
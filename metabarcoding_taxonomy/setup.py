@@ -14,6 +14,14 @@ setup(
         "numpy", 
         "matplotlib"
     ],
+    extras_require={
+        "sparse": ["scipy"],
+    },
+    entry_points={
+        "console_scripts": [
+            "metabarcoding-taxonomy=metabarcoding_taxonomy.cli:main",
+        ],
+    },
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Science/Research",
@@ -2,52 +2,266 @@
 # -*- coding: utf-8 -*-
 """
 metabarcoding_taxonomy.statistics
-필터링 결과 기반 통계
+필터링 결과 기반 통계 · alpha / beta 다양성
 """
 from __future__ import annotations
+import os
+import numpy as np
 import pandas as pd
+from .diversity import BETA_METRICS, alpha_diversity, beta_diversity
 from .filter import TaxonomyFilter
+from .profiling import annotate, record_io, traced
+from .rarefaction import RarefactionResult, depth_range, rarefy
+from .tables import LevelTable, safe_ratio
 
 
 class TaxonomyStatistics(TaxonomyFilter):
-    """미분류 비율 · retained taxa 비율 계산"""
+    """미분류 비율 · retained taxa 비율 · 다양성 계산"""
     def __init__(self, *a, **kw):
         super().__init__(*a, **kw)
         self.stats_df = None
         self.taxa_count_df = None
+        self.alpha_df = None
+        self.beta: dict[str, dict[str, pd.DataFrame]] = {}   # metric → {level: 거리}
+        self.rarefaction: dict[str, RarefactionResult] = {}
+
+    # ───────────────── level 단위 계산 ─────────────────
+    def unclassified_ratio(self, table: LevelTable) -> np.ndarray:
+        """샘플별 (필터 대상 taxon 카운트 / 전체 카운트)"""
+        total = table.row_sums()
+        filt_sum = table.select(self.filtered_mask(table.taxa)).row_sums()
+        return safe_ratio(filt_sum, total)
+
+    def retained_ratio(self, table: LevelTable | pd.Index) -> float:
+        """필터 후 남는 taxon 열 비율 (열 이름만 필요)"""
+        taxa = table.taxa if isinstance(table, LevelTable) else table
+        retained = int((~self.filtered_mask(taxa)).sum())
+        return retained / len(taxa)
+
+    def level_unclassified(self, lvl: str, fp: str) -> tuple[list, np.ndarray]:
+        """(샘플 이름, 샘플별 미분류 비율) — chunksize 지정 시 스트리밍"""
+        if lvl in self.streamed_stats:   # 스트리밍 필터 패스에서 이미 계산됨
+            return self.streamed_stats[lvl]
+        if not self.chunksize:
+            table = self.load_level(lvl)
+            return table.samples.tolist(), self.unclassified_ratio(table)
+
+        samples, ratios, stats_mask = [], [], None
+        for chunk in self.level_chunks(fp):
+            if stats_mask is None:   # 열 마스크는 헤더 기준으로 한 번만
+                stats_mask = self.filtered_mask(chunk.taxa)
+            samples += chunk.samples.tolist()
+            ratios.append(safe_ratio(chunk.select(stats_mask).row_sums(),
+                                     chunk.row_sums()))
+        return samples, np.concatenate(ratios)
+
+    def level_retained_ratio(self, lvl: str, fp: str) -> float:
+        if self.chunksize:
+            return self.retained_ratio(self.level_header(fp))
+        return self.retained_ratio(self.load_level(lvl))
 
     # ───────────────── 미분류 비율 ─────────────────
+    @traced("stats:unclassified")
     def compute_unclassified_stats(self) -> pd.DataFrame:
         self.log("Computing unclassified stats…")
-        stats, sample_names = {}, None
+        if self.manifest.is_current("stats:unclassified", self._unclassified_key()):
+            self.log(" Inputs unchanged — reusing stored stats")
+            stored = self.manifest.data("stats:unclassified")
+            self.stats_df = pd.DataFrame(stored["data"], index=stored["index"],
+                                         columns=stored["columns"])
+            annotate(skipped=True)
+            return self.stats_df
 
+        stats, sample_names = {}, None
         for fp, lvl in zip(self.file_paths, self.level_names):
-            df = pd.read_csv(fp)
-            sample_col = self.sample_col or df.columns[0]
-
+            samples, stats[lvl] = self.level_unclassified(lvl, fp)
             if sample_names is None:
-                sample_names = df[sample_col].tolist()
-
-            taxa_cols = df.columns.drop(sample_col)
-            total = df[taxa_cols].sum(axis=1)
-            filt_cols = [c for c in taxa_cols if self.is_filtered_taxon(c)]
-            filt_sum = df[filt_cols].sum(axis=1) if filt_cols else 0
-            stats[lvl] = (filt_sum / total.replace(0, pd.NA)).values
+                sample_names = samples
             self.log(f" Level {lvl} done")
+        return self.set_unclassified_stats(stats, sample_names)
 
+    def set_unclassified_stats(self, stats: dict[str, np.ndarray],
+                               sample_names: list) -> pd.DataFrame:
         idx = self.map_sample_names(sample_names)
         self.stats_df = pd.DataFrame(stats, index=idx)
+        annotate(rows=self.stats_df.shape[0], cols=self.stats_df.shape[1])
+        self.manifest.record("stats:unclassified", self._unclassified_key(),
+                             data=self.stats_df.to_dict(orient="split"))
         return self.stats_df
 
+    def _unclassified_key(self) -> str:
+        return self.manifest.stage_key(self.file_paths, sample_col=self.sample_col,
+                                       mapping=self.sample_name_mapping)
+
     # ───────────────── retained taxa 개수 ─────────────────
+    @traced("stats:taxa_counts")
     def compute_taxa_counts(self) -> pd.Series:
         self.log("Computing retained taxa column ratios…")
+        if self.manifest.is_current("stats:taxa_counts", self._taxa_counts_key()):
+            self.log(" Inputs unchanged — reusing stored ratios")
+            stored = self.manifest.data("stats:taxa_counts")
+            self.taxa_count_df = pd.Series(stored, name="retained_taxa_ratio")
+            annotate(skipped=True)
+            return self.taxa_count_df
+
         ratios = {}
         for fp, lvl in zip(self.file_paths, self.level_names):
-            df = pd.read_csv(fp)
-            sample_col = self.sample_col or df.columns[0]
-            taxa_cols = df.columns.drop(sample_col)
-            retained = sum(not self.is_filtered_taxon(c) for c in taxa_cols)
-            ratios[lvl] = retained / len(taxa_cols)
+            ratios[lvl] = self.level_retained_ratio(lvl, fp)
+        return self.set_taxa_counts(ratios)
+
+    def set_taxa_counts(self, ratios: dict[str, float]) -> pd.Series:
         self.taxa_count_df = pd.Series(ratios, name="retained_taxa_ratio")
+        self.manifest.record("stats:taxa_counts", self._taxa_counts_key(),
+                             data=ratios)
         return self.taxa_count_df
+
+    def _taxa_counts_key(self) -> str:
+        return self.manifest.stage_key(self.file_paths, sample_col=self.sample_col)
+
+    # ───────────────── 다양성 ─────────────────
+    def level_alpha(self, lvl: str, fp: str, base: float = 2.0) -> pd.DataFrame:
+        """샘플 × (richness, shannon, simpson) — 샘플별 계산이라 chunksize 면 스트리밍"""
+        if not self.chunksize:
+            return alpha_diversity(self.load_level(lvl), base)
+        return pd.concat([alpha_diversity(chunk, base)
+                          for chunk in self.level_chunks(fp)])
+
+    @traced("stats:alpha")
+    def compute_alpha_diversity(self, base: float = 2.0) -> pd.DataFrame:
+        """원본 level 카운트 기준 — 열은 (level, 지표) MultiIndex"""
+        self.log("Computing alpha diversity…")
+        key = self.manifest.stage_key(self.file_paths, sample_col=self.sample_col,
+                                      mapping=self.sample_name_mapping, base=base)
+        if self.manifest.is_current("stats:alpha", key):
+            self.log(" Inputs unchanged — reusing stored diversity")
+            stored = self.manifest.data("stats:alpha")
+            self.alpha_df = pd.DataFrame(
+                stored["data"], index=stored["index"],
+                columns=pd.MultiIndex.from_tuples(map(tuple, stored["columns"])))
+            annotate(skipped=True)
+            return self.alpha_df
+
+        frames = {}
+        for fp, lvl in zip(self.file_paths, self.level_names):
+            frames[lvl] = self.level_alpha(lvl, fp, base)
+            self.log(f" Level {lvl} done")
+        df = pd.concat(frames, axis=1)
+        df.index = self.map_sample_names(df.index.tolist())
+        self.alpha_df = df
+        annotate(rows=df.shape[0], cols=df.shape[1])
+        self.manifest.record("stats:alpha", key, data=df.to_dict(orient="split"))
+        return df
+
+    @staticmethod
+    def beta_output_path(src: str, metric: str) -> str:
+        """level-N.csv → level-N_<metric>.csv"""
+        base = os.path.splitext(os.path.basename(src))[0]
+        return f"{os.path.dirname(src)}/{base}_{metric}.csv"
+
+    @traced("stats:beta", level_arg=0)
+    def level_beta(self, lvl: str, fp: str,
+                   metric: str = "braycurtis") -> pd.DataFrame:
+        """샘플 × 샘플 거리 행렬 — write_outputs 면 level-N_<metric>.csv 로 저장"""
+        out = self.beta_output_path(fp, metric)
+        outputs = [out] if self.write_outputs else []
+        key = self.manifest.stage_key([fp], sample_col=self.sample_col,
+                                      mapping=self.sample_name_mapping)
+        stored = (self.manifest.data(f"beta:{metric}:{lvl}")
+                  if self.manifest.is_current(f"beta:{metric}:{lvl}", key, outputs)
+                  else None)
+        if stored is not None:
+            # 숫자 샘플 이름이 int 로 바뀌지 않게 문자열로 읽고, 라벨은 기록해 둔 값으로
+            self.log(f" Level {lvl} unchanged — reading {out}")
+            annotate(skipped=True)
+            dist = pd.read_csv(out, index_col=0, dtype=str).astype(float)
+            dist.index = dist.columns = pd.Index(stored["samples"])
+            return dist
+
+        table = self.load_level(lvl)
+        annotate(rows=table.shape[0], cols=table.shape[1])
+        dist = beta_diversity(table, metric,
+                              self.map_sample_names(table.samples.tolist()))
+        if self.write_outputs:
+            dist.to_csv(out)
+            record_io(outputs=outputs)
+        self.manifest.record(f"beta:{metric}:{lvl}", key, outputs,
+                             data={"samples": dist.index.tolist()})
+        self.log(f" Level {lvl} done")
+        return dist
+
+    def compute_beta_diversity(self, metric: str = "braycurtis") -> dict[str, pd.DataFrame]:
+        """모든 level 의 거리 행렬 {level: DataFrame} (metric: braycurtis | jaccard)"""
+        if metric not in BETA_METRICS:
+            raise ValueError(f"metric must be one of {BETA_METRICS}")
+        self.log(f"Computing {metric} distances…")
+        self.beta[metric] = {lvl: self.level_beta(lvl, fp, metric)
+                             for fp, lvl in zip(self.file_paths, self.level_names)}
+        return self.beta[metric]
+
+    # ───────────────── rarefaction ─────────────────
+    def rarefaction_depth(self) -> int:
+        """모든 level 에서 가장 얕은 (0 이 아닌) 샘플 깊이"""
+        return min(depth_range(self.load_level(lvl))[0] for lvl in self.level_names)
+
+    @traced("rarefy", level_arg=0)
+    def level_rarefaction(self, lvl: str, depth: int, iterations: int = 100,
+                          seed: int | np.random.SeedSequence = 0, workers: int = 1,
+                          ci: float = 0.95) -> RarefactionResult:
+        table = self.load_level(lvl)
+        annotate(rows=table.shape[0], cols=table.shape[1], depth=depth,
+                 iterations=iterations)
+        result = rarefy(table, depth, iterations, seed, workers, ci=ci,
+                        unclassified_mask=self.filtered_mask(table.taxa))
+        if result.dropped:
+            self.log(f" Level {lvl}: dropped {len(result.dropped)} samples below "
+                     f"depth {depth} ({', '.join(map(str, result.dropped))})")
+        return result
+
+    def rarefy_levels(self, depth: int | None = None, iterations: int = 100,
+                      seed: int = 0, workers: int = 1,
+                      ci: float = 0.95) -> dict[str, RarefactionResult]:
+        """
+        모든 level 을 같은 depth (기본: 가장 얕은 샘플) 로 rarefy
+        level 별 시드는 SeedSequence(seed).spawn — 같은 seed 면 workers 와 무관하게 재현
+        """
+        depth = depth or self.rarefaction_depth()
+        self.log(f"Rarefying to depth {depth} ({iterations} iterations, "
+                 f"seed={seed}, workers={workers})…")
+        seeds = np.random.SeedSequence(seed).spawn(len(self.level_names))
+        for lvl, level_seed in zip(self.level_names, seeds):
+            self.rarefaction[lvl] = self.level_rarefaction(lvl, depth, iterations,
+                                                           level_seed, workers, ci)
+            self.log(f" Level {lvl} done")
+        return self.rarefaction
+
+    def rarefied(self, depth: int | None = None, iterations: int = 100,
+                 seed: int = 0, workers: int = 1, ci: float = 0.95,
+                 out_dir: str | None = None, options: dict | None = None):
+        """
+        rarefy 한 평균 테이블로 같은 클래스의 새 인스턴스를 만듦
+        → 통계·그림을 rarefied 카운트로 (출력은 out_dir, 기본 input_dir/rarefied-<depth>)
+        level 별 지표 신뢰 구간은 write_outputs 면 out_dir/level-N_rarefaction.csv
+        (다양성은 평균 테이블이 아니라 반복별로 계산한 rarefaction[lvl].stats 를 볼 것)
+        options : 새 인스턴스 생성 인자 (figure_format, workers … — 샘플 매핑·level
+                  라벨·backend·write_outputs 는 기본으로 이어받음)
+        """
+        results = self.rarefy_levels(depth, iterations, seed, workers, ci)
+        depth = next(iter(results.values())).depth
+        out_dir = out_dir or os.path.join(self.input_dir, f"rarefied-{depth}")
+        options = {"sample_name_mapping": self.sample_name_mapping,
+                   "level_labels": self.level_labels, "backend": self.backend,
+                   "write_outputs": self.write_outputs, **(options or {})}
+        if options["write_outputs"]:   # 쓰지 않으면 폴더도 만들지 않음
+            os.makedirs(out_dir, exist_ok=True)
+            for lvl, result in results.items():
+                out = os.path.join(out_dir, f"{lvl}_rarefaction.csv")
+                stats = result.stats.copy()
+                stats.index = self.map_sample_names(stats.index.tolist())
+                stats.to_csv(out)
+                record_io(outputs=[out])
+
+        obj = type(self).from_tables({lvl: r.table for lvl, r in results.items()},
+                                     input_dir=out_dir, **options)
+        obj.rarefaction = results
+        obj.tracer, obj.trace_path = self.tracer, self.trace_path   # 한 trace 로
+        return obj
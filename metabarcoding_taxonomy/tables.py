@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+metabarcoding_taxonomy.tables
+level-N 카운트 테이블 (샘플 × taxon 배열 + 라벨)
+"""
+from __future__ import annotations
+import csv, itertools, json, os, shutil
+import numpy as np
+import pandas as pd
+
+BACKENDS = ("dense", "sparse")
+TABLE_FORMATS = ("csv", "npy")
+NPY_SUFFIX = ".arrays"   # .npy 배열 + labels.json 을 담은 디렉터리
+
+
+def _scipy_sparse():
+    """선택 의존성 (backend="sparse") — 필요할 때만 import"""
+    try:
+        from scipy import sparse
+    except ImportError:
+        raise ImportError("backend='sparse' requires scipy") from None
+    return sparse
+
+
+class LevelTable:
+    """
+    한 번 파싱한 level 테이블을 배열 형태로 보관
+
+    counts 는 dense ndarray 또는 scipy.sparse CSC 행렬 (0 이 대부분인
+    Genus/Species 레벨용)
+    """
+
+    def __init__(
+        self,
+        samples,
+        taxa,
+        counts: np.ndarray,
+        sample_col: str = "index",
+        src: str | None = None,
+    ):
+        self.samples = pd.Index(samples)
+        self.taxa = pd.Index(taxa)
+        self.counts = counts
+        self.sample_col = sample_col
+        self.src = src
+        if self.counts.shape != (len(self.samples), len(self.taxa)):
+            raise ValueError(
+                f"counts shape {self.counts.shape} does not match "
+                f"{len(self.samples)} samples × {len(self.taxa)} taxa"
+            )
+
+    # ---------- 생성 ----------
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, sample_col: str | None = None,
+                   src: str | None = None) -> "LevelTable":
+        sample_col = sample_col or df.columns[0]
+        taxa_cols = df.columns.drop(sample_col)
+        return cls(df[sample_col], taxa_cols, df[taxa_cols].to_numpy(),
+                   sample_col=sample_col, src=src)
+
+    @classmethod
+    def from_csv(cls, fp: str, sample_col: str | None = None,
+                 backend: str = "dense") -> "LevelTable":
+        table = _read_wide_csv(fp, sample_col, backend)
+        if table is None:
+            table = cls.from_frame(pd.read_csv(fp), sample_col, src=fp)
+        return table.to_sparse() if backend == "sparse" else table
+
+    @classmethod
+    def from_npy(cls, path: str, backend: str = "dense",
+                 mmap: bool = True) -> "LevelTable":
+        """to_npy 로 저장한 디렉터리 — 기본은 memory-map (읽기 전용)"""
+        meta = npy_meta(path)
+        if meta is None:
+            raise FileNotFoundError(f"No array table at {path}")
+        mode = "r" if mmap else None
+        arr = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode)
+               for name in meta["arrays"]}
+        shape = (len(meta["samples"]), len(meta["taxa"]))
+        if meta["layout"] == "csc":
+            counts = _scipy_sparse().csc_matrix((arr["data"], arr["indices"], arr["indptr"]),
+                                       shape=shape, copy=False)
+        else:
+            counts = arr["counts"]
+        table = cls(meta["samples"], meta["taxa"], counts,
+                    sample_col=meta["sample_col"], src=meta.get("src"))
+        return table.to_sparse() if backend == "sparse" else table.to_dense()
+
+    # ---------- backend ----------
+    @property
+    def is_sparse(self) -> bool:
+        # scipy 를 import 하지 않고 판별 (np.memmap 도 ndarray)
+        return not isinstance(self.counts, np.ndarray)
+
+    def to_sparse(self) -> "LevelTable":
+        if self.is_sparse:
+            return self
+        return LevelTable(self.samples, self.taxa,
+                          _scipy_sparse().csc_matrix(self.counts),
+                          self.sample_col, self.src)
+
+    def to_dense(self) -> "LevelTable":
+        if not self.is_sparse:
+            return self
+        return LevelTable(self.samples, self.taxa, self.counts.toarray(),
+                          self.sample_col, self.src)
+
+    @property
+    def nbytes(self) -> int:
+        if self.is_sparse:
+            m = self.counts
+            return m.data.nbytes + m.indices.nbytes + m.indptr.nbytes
+        return self.counts.nbytes
+
+    # ---------- 변환 ----------
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.counts.shape
+
+    def select(self, mask) -> "LevelTable":
+        """taxon 열 부분집합 (bool mask 또는 위치 배열)"""
+        return LevelTable(self.samples, self.taxa[mask], self.counts[:, mask],
+                          self.sample_col, self.src)
+
+    def relabel(self, taxa) -> "LevelTable":
+        return LevelTable(self.samples, taxa, self.counts,
+                          self.sample_col, self.src)
+
+    def aggregate_columns(self) -> tuple["LevelTable", int]:
+        """같은 이름의 taxon 열을 합침 (처음 등장 순서 유지) → (테이블, 합쳐진 열 수)"""
+        codes, uniques = pd.factorize(self.taxa)
+        n_merged = len(self.taxa) - len(uniques)
+        if not n_merged:
+            return self, 0
+        return self.sum_columns(codes, uniques), n_merged
+
+    def sum_columns(self, codes: np.ndarray, labels) -> "LevelTable":
+        """열 i 를 그룹 codes[i] 에 더함 — codes 는 0..len(labels)-1"""
+        if self.is_sparse:
+            groups = _scipy_sparse().csc_matrix(
+                (np.ones(len(codes)), (np.arange(len(codes)), codes)),
+                shape=(len(codes), len(labels)))
+            counts = (self.counts @ groups).astype(self.counts.dtype).tocsc()
+        else:
+            order = np.argsort(codes, kind="stable")
+            starts = np.flatnonzero(np.r_[True, np.diff(codes[order]) != 0])
+            counts = np.add.reduceat(self.counts[:, order], starts, axis=1)
+        return LevelTable(self.samples, labels, counts, self.sample_col, self.src)
+
+    def row_sums(self) -> np.ndarray:
+        if self.is_sparse:
+            return np.asarray(self.counts.sum(axis=1)).ravel()
+        return self.counts.sum(axis=1)
+
+    def dense_columns(self, idx) -> np.ndarray:
+        """선택한 taxon 열만 dense 배열로"""
+        cols = self.counts[:, np.asarray(idx)]
+        return cols.toarray() if self.is_sparse else cols
+
+    def relative_abundance(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        샘플별 상대 풍부도(%)와 taxon 별 평균
+        반환: (rel — counts 와 같은 backend, means — 총합 0 인 샘플 제외 평균)
+        총합 0 인 샘플의 rel 행은 backend 와 상관없이 NaN
+        """
+        sums = self.row_sums()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if self.is_sparse:
+                rel = self.counts.tocsr().astype(float)
+                rel.data = rel.data / np.repeat(sums, np.diff(rel.indptr)) * 100
+                means = np.asarray(rel.sum(axis=0)).ravel() / (sums != 0).sum()
+                empty = np.flatnonzero(sums == 0)
+                if len(empty):
+                    # dense 와 같이 총합 0 인 샘플은 행 전체 NaN (저장된 원소가 없어
+                    # 나눗셈으로는 생기지 않으므로 명시적으로 채움)
+                    n = rel.shape[1]
+                    rel = rel + _scipy_sparse().csr_matrix(
+                        (np.full(len(empty) * n, np.nan),
+                         (np.repeat(empty, n), np.tile(np.arange(n), len(empty)))),
+                        shape=rel.shape)
+                return rel.tocsc(), means
+            rel = self.counts / sums[:, None] * 100
+            # DataFrame.mean 과 같이 NaN(총합 0 인 샘플) 은 건너뜀
+            means = np.nansum(rel, axis=0) / (~np.isnan(rel)).sum(axis=0)
+        return rel, means
+
+    def to_frame(self) -> pd.DataFrame:
+        """level-N.csv 와 같은 레이아웃 (첫 열 = 샘플)"""
+        df = pd.DataFrame(self.to_dense().counts, columns=self.taxa)
+        df.insert(0, self.sample_col, self.samples.to_numpy(),
+                  allow_duplicates=True)
+        return df
+
+    def to_csv(self, fp: str, mode: str = "w", header: bool = True,
+               max_cells: int = 5_000_000):
+        """mode="a", header=False 로 행 묶음을 이어 쓸 수 있음"""
+        if not self.is_sparse:
+            self.to_frame().to_csv(fp, index=False, mode=mode, header=header)
+            return
+
+        # sparse: 행 묶음 단위로만 dense 로 풀어서 이어 쓰기
+        step = max(1, max_cells // max(1, len(self.taxa)))
+        rows = self.counts.tocsr()
+        for start in range(0, max(1, len(self.samples)), step):
+            chunk = LevelTable(self.samples[start:start + step], self.taxa,
+                               rows[start:start + step].toarray(),
+                               self.sample_col)
+            first = start == 0
+            chunk.to_frame().to_csv(fp, index=False,
+                                    header=header and first,
+                                    mode=mode if first else "a")
+
+
+    def to_npy(self, path: str, **meta):
+        """
+        열 지향 바이너리 저장: path/ 아래 counts.npy (sparse 는 data/indices/
+        indptr.npy) 와 labels.json. 다시 읽을 때 파싱 없이 memory-map 가능
+        meta 는 labels.json 에 함께 기록 (입력 캐시의 원본 stat 등)
+        """
+        if self.is_sparse:
+            m = self.counts
+            arrays = {"data": m.data, "indices": m.indices, "indptr": m.indptr}
+        else:
+            arrays = {"counts": np.ascontiguousarray(self.counts)}
+        tmp = f"{path}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for name, a in arrays.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), a)
+        _write_labels(tmp, self.samples, self.taxa, self.sample_col,
+                      layout="csc" if self.is_sparse else "dense",
+                      arrays=list(arrays), src=self.src, **meta)
+        _replace_dir(tmp, path)
+
+
+class NpyTableWriter:
+    """
+    행 묶음을 미리 할당한 counts.npy (memmap) 에 이어 쓰기 — 스트리밍 출력용
+    행 수는 처음에 알아야 하므로 count_rows 로 구함 (close 에서 쓴 행 수와 대조)
+    """
+
+    def __init__(self, path: str, n_rows: int, taxa, sample_col: str,
+                 src: str | None = None):
+        self.path, self.taxa, self.sample_col, self.src = path, taxa, sample_col, src
+        self.tmp = f"{path}.tmp"
+        shutil.rmtree(self.tmp, ignore_errors=True)
+        os.makedirs(self.tmp)
+        self.counts = np.lib.format.open_memmap(
+            os.path.join(self.tmp, "counts.npy"), mode="w+",
+            dtype=np.float64, shape=(n_rows, len(taxa)))
+        self.samples: list = []
+
+    def write(self, chunk: LevelTable):
+        start = len(self.samples)
+        self.counts[start:start + len(chunk.samples)] = chunk.to_dense().counts
+        self.samples += chunk.samples.tolist()
+
+    def close(self):
+        if len(self.samples) != len(self.counts):
+            raise ValueError(f"{self.path}: wrote {len(self.samples)} of "
+                             f"{len(self.counts)} rows")
+        self.counts.flush()
+        del self.counts
+        _write_labels(self.tmp, self.samples, self.taxa, self.sample_col,
+                      layout="dense", arrays=["counts"], src=self.src)
+        _replace_dir(self.tmp, self.path)
+
+
+def as_level_table(obj, sample_col: str | None = None, src: str | None = None,
+                   backend: str = "dense") -> LevelTable:
+    """
+    메모리의 level 테이블 → LevelTable
+      LevelTable                : 그대로 (src 만 채움)
+      DataFrame                 : sample_col 열이 있으면 그 열, 없고 index 가
+                                  RangeIndex 가 아니면 index, 아니면 첫 열이 샘플
+      (counts, samples, taxa)   : ndarray 또는 scipy.sparse 카운트 행렬 + 라벨
+    """
+    if isinstance(obj, LevelTable):
+        table = LevelTable(obj.samples, obj.taxa, obj.counts, obj.sample_col,
+                           obj.src or src)
+    elif isinstance(obj, pd.DataFrame):
+        if (sample_col is None or sample_col not in obj.columns) and \
+                not isinstance(obj.index, pd.RangeIndex):
+            table = LevelTable(obj.index, obj.columns, obj.to_numpy(),
+                               sample_col=obj.index.name or "index", src=src)
+        else:
+            table = LevelTable.from_frame(obj, sample_col, src=src)
+    elif isinstance(obj, tuple) and len(obj) == 3:
+        counts, samples, taxa = obj
+        counts = counts.tocsc() if hasattr(counts, "tocsc") else np.asarray(counts)
+        table = LevelTable(samples, taxa, counts, sample_col=sample_col or "index",
+                           src=src)
+    else:
+        raise TypeError("level table must be a LevelTable, DataFrame or "
+                        "(counts, samples, taxa) tuple")
+    if backend == "sparse":
+        return table.to_sparse()
+    return table.to_dense() if table.is_sparse else table
+
+
+def npy_meta(path: str) -> dict | None:
+    """to_npy 디렉터리의 labels.json (없으면 None)"""
+    try:
+        with open(os.path.join(path, "labels.json"), encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_labels(path: str, samples, taxa, sample_col: str, **meta):
+    labels = {"sample_col": sample_col, "samples": pd.Index(samples).tolist(),
+              "taxa": pd.Index(taxa).tolist(), **meta}
+    with open(os.path.join(path, "labels.json"), "w", encoding="utf-8") as fh:
+        json.dump(labels, fh, ensure_ascii=False)
+
+
+def _replace_dir(tmp: str, path: str):
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+
+
+def safe_ratio(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    """num / den (den == 0 인 샘플은 NaN)"""
+    out = np.full(len(den), np.nan)
+    np.divide(num, den, out=out, where=den != 0)
+    return out
+
+
+# ---------- 스트리밍 (행 묶음) 읽기 ----------
+def read_level_header(fp: str, sample_col: str | None = None) -> pd.Index:
+    """본문을 읽지 않고 taxon 열 이름만 (pd.read_csv 와 같은 이름 규칙)"""
+    columns = pd.read_csv(fp, nrows=0).columns
+    return columns.drop(sample_col or columns[0])
+
+
+def count_rows(fp: str) -> int:
+    """
+    헤더를 제외한 데이터 행 수 — csv 모듈로 세므로 따옴표 안 줄바꿈은 한 행,
+    빈 줄은 pd.read_csv 와 같이 제외
+    """
+    with open(fp, newline="", encoding="utf-8") as fh:
+        reader = csv.reader(fh)
+        next(reader, None)
+        return sum(1 for row in reader if row)
+
+
+def iter_level_chunks(fp: str, sample_col: str | None = None,
+                      chunksize: int = 10_000, backend: str = "dense"):
+    """level CSV 를 chunksize 행씩 LevelTable 로 순회 — 메모리 사용량은 chunk 크기로 제한"""
+    with pd.read_csv(fp, chunksize=chunksize) as reader:
+        for df in reader:
+            table = LevelTable.from_frame(df, sample_col, src=fp)
+            yield table.to_sparse() if backend == "sparse" else table
+
+
+def _read_wide_csv(fp: str, sample_col: str | None = None,
+                   backend: str = "dense") -> LevelTable | None:
+    """
+    열이 수만 개인 level CSV 고속 파싱
+    pd.read_csv 의 헤더 처리는 열 수에 대해 제곱으로 느려지므로 헤더는 csv
+    모듈로, 숫자 본문은 np.loadtxt (backend="sparse" 면 한 행씩 읽어 CSC 로) 로
+    읽음. pd.read_csv 와 결과가 달라질 수 있는 입력(중복/빈 열 이름, 결측값,
+    첫 열이 아닌 샘플 열)이면 None
+    """
+    with open(fp, newline="", encoding="utf-8") as fh:
+        header = next(csv.reader(fh), None)
+    if not header or len(header) < 2:
+        return None
+    sample_col = sample_col or header[0]
+    if header[0] != sample_col or "" in header or len(set(header)) != len(header):
+        return None
+
+    samples = pd.read_csv(fp, header=None, skiprows=1, usecols=[0]).iloc[:, 0]
+    if samples.empty:
+        return None
+    if backend == "sparse":
+        counts = _read_sparse_rows(fp, len(header) - 1)
+        if counts is None or counts.shape[0] != len(samples):
+            return None
+        return LevelTable(samples, header[1:], counts, sample_col=sample_col, src=fp)
+    for dtype in (np.int64, np.float64):   # pandas 와 같은 공통 dtype 추론
+        try:
+            counts = np.loadtxt(fp, delimiter=",", skiprows=1, quotechar='"',
+                                usecols=range(1, len(header)), dtype=dtype,
+                                ndmin=2)
+            break
+        except ValueError:
+            continue
+    else:
+        return None
+    return LevelTable(samples, header[1:], counts, sample_col=sample_col, src=fp)
+
+
+def _read_sparse_rows(fp: str, n_cols: int, block_cells: int = 250_000):
+    """
+    본문을 행 묶음(약 block_cells 칸)씩 np.loadtxt 로 읽어 0 이 아닌 값만 모아
+    CSC 행렬로 — 전체 dense 배열을 만들지 않으므로 peak 메모리는 한 묶음 +
+    0 이 아닌 값 크기. 정수로 읽다가 소수가 나오면 float 로 바꿈 (pandas 와 같은
+    공통 dtype). 빈 칸·숫자가 아닌 값, 따옴표 안 줄바꿈이 있으면 None
+    """
+    rows, cols, data = [], [], []
+    dtype, n_rows = np.int64, 0
+    step = max(1, block_cells // max(1, n_cols))
+
+    def parse(lines):
+        nonlocal dtype
+        for attempt in (dtype, np.float64):
+            try:
+                return np.loadtxt(lines, delimiter=",", quotechar='"', dtype=attempt,
+                                  usecols=range(1, n_cols + 1), ndmin=2)
+            except ValueError:
+                if attempt is np.float64:
+                    raise
+                dtype = np.float64
+
+    with open(fp, encoding="utf-8") as fh:
+        next(fh, None)
+        while True:
+            lines = [line for line in itertools.islice(fh, step) if line.strip()]
+            if not lines:
+                break
+            if any(line.count('"') % 2 for line in lines):
+                return None
+            try:
+                block = parse(lines)
+            except ValueError:
+                return None
+            if data and data[0].dtype != block.dtype:   # int → float 로 바뀜
+                data = [d.astype(block.dtype) for d in data]
+            r, c = np.nonzero(block)
+            rows.append((r + n_rows).astype(np.int32))
+            cols.append(c.astype(np.int32))
+            data.append(block[r, c])
+            n_rows += len(block)
+    sparse = _scipy_sparse()
+    if not n_rows:
+        return sparse.csc_matrix((0, n_cols), dtype=dtype)
+    return sparse.csc_matrix(
+        (np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(n_rows, n_cols))
@@ -5,43 +5,137 @@ metabarcoding_taxonomy.visualizer
 통계 결과 시각화
 """
 from __future__ import annotations
-import os, glob, numpy as np, pandas as pd, matplotlib.pyplot as plt
+import os, numpy as np, pandas as pd
+from matplotlib.collections import PolyCollection
+from matplotlib.patches import Patch
+from .abundance import AbundanceView, top_abundance
+from .figures import FigureTemplate
+from .profiling import annotate, record_io, traced
 from .statistics import TaxonomyStatistics
+from .tables import LevelTable
+
+
+SUPPLE_RENDERERS = ("collection", "bars")
+
+# 고정된 색상 리스트 (Supplementary 는 순환 사용)
+BASE_COLORS = [
+    '#e41a1c', '#377eb8', '#4daf4a', '#984ea3', '#ff7f00',
+    '#ffff33', '#a65628', '#f781bf', '#999999', '#66c2a5',
+    '#fc8d62', '#8da0cb', '#e78ac3', '#a6d854', '#ffd92f'
+]
+
+
+def stacked_bar_collection(ax, values: np.ndarray, colors: list[str],
+                           width: float = 0.8, rasterized: bool = False):
+    """
+    샘플 × taxon 값 배열을 누적 막대 하나의 PolyCollection 으로 그림
+    ax.bar 를 taxon 마다 호출하는 것과 같은 모양 (높이 0 인 조각은 생략)
+    """
+    n, m = values.shape
+    top = np.cumsum(values, axis=1)
+    bottom = top - values
+    i, j = np.nonzero(values)
+    x0, x1 = i - width / 2, i + width / 2
+    verts = np.stack([np.column_stack([x0, bottom[i, j]]),
+                      np.column_stack([x0, top[i, j]]),
+                      np.column_stack([x1, top[i, j]]),
+                      np.column_stack([x1, bottom[i, j]])], axis=1)
+    coll = PolyCollection(verts, facecolors=np.asarray(colors, dtype=object)[j],
+                          edgecolors="none", linewidths=0)
+    coll.set_rasterized(rasterized)
+    ax.add_collection(coll)
+    # ax.bar 와 같은 자동 축 범위 (x 는 막대 폭 포함)
+    ax.update_datalim([(-width / 2, 0), (n - 1 + width / 2, 0)])
+    ax.autoscale_view()
+    return coll
+
+
+def style_barplot(figures: FigureTemplate, fig, ax, x, samples, legend: list[str],
+                  dpi: int, handles=None):
+    """바플롯 공통 축·범례·여백 (여백은 같은 라벨 조합이면 캐시 재사용)"""
+    ax.set_xticks(x)
+    ax.set_xticklabels(samples, rotation=30, ha="right", fontsize=14)
+    figures.style_axes(ax, "Relative abundance (%)", (0, 100), 14,
+                       grid_axis="y", grid_alpha=.3)
+    if any(legend):  # 범례 항목이 있는 경우에만 범례 표시
+        figures.legend_right(ax, handles=handles)
+    figures.layout(fig, ("barplot", dpi, tuple(samples), tuple(legend)),
+                   rect=[0, 0, 0.85, 1])
+
+
+def barplot_figure(figures: FigureTemplate, view: AbundanceView, legend: list[str],
+                   dpi: int):
+    """
+    상위 N 누적 바플롯 Figure (Other 는 검은색)
+    인스턴스 상태를 쓰지 않으므로 서비스 워커 프로세스에서도 그릴 수 있음
+    """
+    # 15 개보다 많으면 색상 순환 (top_n >= 15)
+    colors = [BASE_COLORS[i % len(BASE_COLORS)] for i in range(len(view.taxa))]
+    if view.has_other:
+        colors[-1] = '#000000'  # Other는 검은색으로 고정
+
+    fig, ax = figures.figure((8, 5), dpi)
+    bottom = np.zeros(len(view.samples))
+    x = np.arange(len(view.samples))
+    for c, col in enumerate(view.values.T):
+        ax.bar(x, col, bottom=bottom, label=legend[c], color=colors[c])
+        bottom += col
+    style_barplot(figures, fig, ax, x, view.samples, legend, dpi)
+    return fig
 
 
 class TaxonomyVisualizer(TaxonomyStatistics):
     """well-classified·retained 비율 & 누적 바플롯"""
-    
-    # ─────────── 분류군 라벨 처리 ───────────
-    def last_tax_label_with_readable_prefix(self, tax_string):
-        """분류학적 경로에서 마지막 분류군명을 읽기 쉬운 접두사와 함께 추출"""
-        if tax_string == "Other":
-            return "Other"
-        
-        # 접두사 매핑
-        prefix_map = {
-            'k__': 'K: ',    # Kingdom
-            'p__': 'P: ',    # Phylum  
-            'c__': 'C: ',    # Class
-            'o__': 'O: ',    # Order
-            'f__': 'F: ',    # Family
-            'g__': 'G: ',    # Genus
-            's__': 'S: '     # Species
-        }
-        
-        parts = tax_string.split(';')
-        last_part = parts[-1]
-        
-        # 접두사 변환
-        for prefix, readable in prefix_map.items():
-            if last_part.startswith(prefix):
-                name = last_part.replace(prefix, '')
-                return f"{readable}{name}"
-        
-        return last_part  # 접두사가 없는 경우 그대로 반환
-    
+
+    def __init__(self, *a, figure_format: str = "pdf", preview: bool = False,
+                 font_family: str = "Arial", export_plot_values: bool = False,
+                 **kw):
+        # preview=True: 저해상도 png 로 빠르게 확인 (figure_format 무시)
+        self.figures = FigureTemplate(figure_format, preview=preview,
+                                      font_family=font_family)
+        # 바플롯에 그린 값(%)을 {그림 이름}_values.csv 로 함께 저장
+        self.export_plot_values = export_plot_values
+        super().__init__(*a, **kw)
+
+    # ─────────── 저장 ───────────
+    def _figure_key(self, files: list[str], **params) -> str:
+        return self.manifest.stage_key(files, sample_col=self.sample_col,
+                                       figure=self.figures.params, **params)
+
+    def _values_csv(self, stem: str) -> str | None:
+        return f"{stem}_values.csv" if self.export_plot_values else None
+
+    def _figure_current(self, name: str, key: str, extra: list[str] = ()) -> bool:
+        """입력·설정이 그대로면 (manifest 기준) 다시 그리지 않음"""
+        outputs = [os.path.join(self.input_dir, n) for n in (name, *extra) if n]
+        if self.manifest.is_current(name, key, outputs):
+            self.log(f" {name} unchanged — skipped")
+            annotate(skipped=True)
+            return True
+        return False
+
+    def _savefig(self, fig, name: str, key: str | None = None, extra: list[str] = ()):
+        """
+        write_outputs 면 input_dir/name 으로 저장 — 꺼져 있으면 (from_tables 기본)
+        파일을 쓰지 않음. 어느 쪽이든 Figure 를 돌려줌 (figures.to_bytes 로 바이트)
+        """
+        if not self.write_outputs:
+            return fig
+        self.figures.save(fig, os.path.join(self.input_dir, name))
+        outputs = [n for n in (name, *extra) if n]
+        record_io(outputs=[os.path.join(self.input_dir, n) for n in outputs])
+        if key is not None:
+            self.manifest.record(name, key, outputs)
+        return fig
+
     # ─────────── well-classified ───────────
+    @traced("plot:well_classified")
     def plot_well_classified(self):
+        name = self.figures.filename("Well_classified_proportion")
+        key = self._figure_key(self.file_paths, mapping=self.sample_name_mapping,
+                               level_labels=self.level_labels)
+        if self._figure_current(name, key):
+            return
         if self.stats_df is None:
             self.compute_unclassified_stats()
 
@@ -52,154 +146,136 @@ class TaxonomyVisualizer(TaxonomyStatistics):
         phylum_labels = self.level_labels[1:]  # Kingdom 제외하고 Phylum부터
         df_phylum = df.iloc[:, 1:]  # Kingdom 컬럼 제외
         
-        fig, ax = plt.subplots(figsize=(6, 5), dpi=450)
+        fig, ax = self.figures.figure((6, 5))
         for s in df_phylum.index:
             ax.plot(phylum_labels, df_phylum.loc[s]*100,
                     marker="o", linewidth=3, markersize=10, label=s)
-        ax.set_ylim(-5, 105)
-        ax.set_ylabel("Well-classified (%)", fontsize=16)
-        ax.tick_params(axis='both', which='major', labelsize=16)
-        ax.grid(True, ls="--", alpha=.4)
+        self.figures.style_axes(ax, "Well-classified (%)", (-5, 105), 16)
         ax.legend(fontsize=14)
-        fig.tight_layout()
-        fig.savefig(os.path.join(self.input_dir, "Well_classified_proportion.pdf"))
-        plt.close(fig)
+        self.figures.layout(fig, ("well_classified", tuple(phylum_labels),
+                                  tuple(df_phylum.index)))
+        return self._savefig(fig, name, key)
 
     # ─────────── retained taxa ───────────
-    def plot_taxa_retained(self):
-        df = self.compute_taxa_counts()
+    @traced("plot:taxa_retained")
+    def plot_taxa_retained(self, df: pd.Series | None = None):
+        name = self.figures.filename("Retained_taxa_ratio")
+        key = self._figure_key(self.file_paths, level_labels=self.level_labels)
+        if self._figure_current(name, key):
+            return
+        if df is None:
+            df = self.compute_taxa_counts()
         self.log("Plotting retained taxa ratio…")
         
         # Phylum부터 시작 (Kingdom 제외)
         phylum_labels = self.level_labels[1:]  # Kingdom 제외하고 Phylum부터
         df_phylum = df.iloc[1:]  # Kingdom 값 제외
         
-        fig, ax = plt.subplots(figsize=(6, 5), dpi=450)
+        fig, ax = self.figures.figure((6, 5))
         ax.plot(phylum_labels, df_phylum.values*100, marker="o", linewidth=3, markersize=10)
-        ax.set_ylim(-5, 105)
-        ax.set_ylabel("Retained taxa (%)", fontsize=16)
-        ax.tick_params(axis='both', which='major', labelsize=16)
-        ax.grid(True, ls="--", alpha=.4)
-        fig.tight_layout()
-        fig.savefig(os.path.join(self.input_dir, "Retained_taxa_ratio.pdf"))
-        plt.close(fig)
+        self.figures.style_axes(ax, "Retained taxa (%)", (-5, 105), 16)
+        self.figures.layout(fig, ("retained", tuple(phylum_labels)))
+        return self._savefig(fig, name, key)
+
+    def _abundance_view(self, table: LevelTable, top_n: int | None,
+                        csv_name: str | None = None) -> AbundanceView:
+        """그릴 값 계산 (+ export_plot_values 면 같은 값을 CSV 로)"""
+        annotate(rows=table.shape[0], cols=table.shape[1])
+        view = top_abundance(table, top_n,
+                             self.map_sample_names(table.samples.tolist()))
+        if csv_name is not None and self.write_outputs:
+            view.to_csv(os.path.join(self.input_dir, csv_name))
+        return view
 
     # ─────────── 누적 바플롯 (기본) ───────────
-    def plot_cumulative_barplots(self, dpi=450, top_n=10):
+    def plot_cumulative_barplots(self, dpi=450, top_n=10) -> dict:
+        """{level: Figure} — manifest 로 건너뛴 level 은 None"""
         self.log("Plotting cumulative barplots…")
-        for fp in sorted(
-            glob.glob(os.path.join(self.input_dir, "level-*_*truncated.csv"))
-        ):
-            self._single_barplot(fp, dpi, top_n)
-
-    def _single_barplot(self, fp: str, dpi: int, top_n: int):
-        level = os.path.basename(fp).split("_")[0]   # level-1
-        df = pd.read_csv(fp)
-        sample_col = df.columns[0]
-        counts = df.set_index(sample_col)
-        counts.index = self.map_sample_names(counts.index.tolist())
-
-        rel = counts.div(counts.sum(axis=1), axis=0) * 100
-        means = rel.mean(axis=0).sort_values(ascending=False)
-        top = means.index[:top_n]
-        other = (100 - rel[top].sum(axis=1)).clip(lower=0)
-        plot_df = rel[top].copy()
-        if other.any():
-            plot_df["Other"] = other
-
-        # 고정된 색상 리스트 사용
-        base_colors = [
-            '#e41a1c', '#377eb8', '#4daf4a', '#984ea3', '#ff7f00',
-            '#ffff33', '#a65628', '#f781bf', '#999999', '#66c2a5',
-            '#fc8d62', '#8da0cb', '#e78ac3', '#a6d854', '#ffd92f'
-        ]
-
-        colors = base_colors[:len(plot_df.columns)]
-        
-        if "Other" in plot_df.columns:
-            colors[-1] = '#000000'  # Other는 검은색으로 고정
-
-        fig, ax = plt.subplots(figsize=(8, 5), dpi=dpi)
-        bottom = np.zeros(len(plot_df))
-        x = np.arange(len(plot_df))
-        for c, col in enumerate(plot_df.columns):
-            ax.bar(x, plot_df[col], bottom=bottom,
-                   label=self.last_tax_label_with_readable_prefix(col),
-                   color=colors[c])
-            bottom += plot_df[col].values
-
-        ax.set_xticks(x)
-        ax.set_xticklabels(plot_df.index, rotation=30, ha="right", fontsize=14)
-        ax.set_ylim(0, 100)
-        ax.set_ylabel("Relative abundance (%)", fontsize=14)
-        ax.tick_params(axis='y', which='major', labelsize=14)
-        ax.grid(axis="y", ls="--", alpha=.3)
-        ax.legend(bbox_to_anchor=(1.02, 1), loc="upper left", fontsize=14)
-        fig.tight_layout(rect=[0, 0, 0.85, 1])
-        fig.savefig(os.path.join(self.input_dir, f"{level}_barplot.pdf"), dpi=450)
-        plt.close(fig)
+        return {lvl: self.level_barplot(lvl, fp, dpi, top_n)
+                for fp, lvl in zip(self.file_paths, self.level_names)}
+
+    @traced("plot:barplot", level_arg=0)
+    def level_barplot(self, lvl: str, fp: str, dpi=450, top_n=10):
+        key = self._figure_key([fp], mapping=self.sample_name_mapping,
+                               top_n=top_n, dpi=dpi, values=self.export_plot_values)
+        csv_name = self._values_csv(f"{lvl}_barplot")
+        if self._figure_current(self.figures.filename(f"{lvl}_barplot"), key,
+                                [csv_name]):
+            return
+        return self._single_barplot(lvl, self.truncated_table(lvl, fp), dpi, top_n,
+                                    key)
+
+    def _single_barplot(self, level: str, table: LevelTable, dpi: int, top_n: int,
+                        key: str | None = None):
+        csv_name = self._values_csv(f"{level}_barplot")
+        view = self._abundance_view(table, top_n, csv_name)
+        legend = [self.last_tax_label_with_readable_prefix(t) for t in view.taxa]
+        fig = barplot_figure(self.figures, view, legend, dpi)
+        return self._savefig(fig, self.figures.filename(f"{level}_barplot"), key,
+                             [csv_name])
 
     # ─────────── 누적 바플롯 (Supplementary - 모든 분류군) ───────────
-    def supplementary_figure_all_details(self, dpi=450):
-        """모든 분류군을 표시하는 Supplementary Figure용 누적 바플롯 (Others 그룹핑 없음)"""
+    def supplementary_figure_all_details(self, dpi=450, renderer="collection",
+                                         rasterize=False):
+        """
+        모든 분류군을 표시하는 Supplementary Figure용 누적 바플롯 (Others 그룹핑 없음)
+        renderer="collection": 누적 막대 전체를 PolyCollection 하나로 (수천 taxon 용)
+        renderer="bars"      : taxon 마다 ax.bar (기존 방식)
+        rasterize=True       : 막대만 래스터화, 축·범례는 벡터 유지
+        반환: {level: Figure} (건너뛴 level 은 None)
+        """
+        if renderer not in SUPPLE_RENDERERS:
+            raise ValueError(f"renderer must be one of {SUPPLE_RENDERERS}")
         self.log("Plotting supplementary cumulative barplots (all taxa)…")
-        for fp in sorted(
-            glob.glob(os.path.join(self.input_dir, "level-*_*truncated.csv"))
-        ):
-            self._single_barplot_full(fp, dpi)
+        return {lvl: self.level_barplot_full(lvl, fp, dpi, renderer, rasterize)
+                for fp, lvl in zip(self.file_paths, self.level_names)}
 
-    def _single_barplot_full(self, fp: str, dpi: int):
+    @traced("plot:supplementary", level_arg=0)
+    def level_barplot_full(self, lvl: str, fp: str, dpi=450, renderer="collection",
+                           rasterize=False):
+        key = self._figure_key([fp], mapping=self.sample_name_mapping, dpi=dpi,
+                               renderer=renderer, rasterize=rasterize,
+                               values=self.export_plot_values)
+        if self._figure_current(self.figures.filename(f"{lvl}_barplot_Supple"),
+                                key, [self._values_csv(f"{lvl}_barplot_Supple")]):
+            return
+        return self._single_barplot_full(lvl, self.truncated_table(lvl, fp), dpi, key,
+                                         renderer, rasterize)
+
+    def _single_barplot_full(self, level: str, table: LevelTable, dpi: int,
+                             key: str | None = None, renderer: str = "collection",
+                             rasterize: bool = False):
         """모든 분류군을 개별적으로 표시하는 바플롯 (Others 그룹핑 없음)"""
-        level = os.path.basename(fp).split("_")[0]   # level-1
-        df = pd.read_csv(fp)
-        sample_col = df.columns[0]
-        counts = df.set_index(sample_col)
-        counts.index = self.map_sample_names(counts.index.tolist())
-
-        rel = counts.div(counts.sum(axis=1), axis=0) * 100
-        means = rel.mean(axis=0).sort_values(ascending=False)
-        
-        # Others 그룹핑 없이 모든 분류군 사용
-        plot_df = rel[means.index].copy()  # abundance 순으로 정렬된 모든 분류군
-        
-        # 15개 색상을 순환하여 사용
-        base_colors = [
-            '#e41a1c', '#377eb8', '#4daf4a', '#984ea3', '#ff7f00',
-            '#ffff33', '#a65628', '#f781bf', '#999999', '#66c2a5',
-            '#fc8d62', '#8da0cb', '#e78ac3', '#a6d854', '#ffd92f'
-        ]
+        # Others 그룹핑 없이 abundance 순으로 정렬된 모든 분류군 사용
+        csv_name = self._values_csv(f"{level}_barplot_Supple")
+        view = self._abundance_view(table, None, csv_name)
         
         # 분류군 수가 15개보다 많으면 색상을 순환하여 사용
-        colors = [base_colors[i % len(base_colors)] for i in range(len(plot_df.columns))]
+        colors = [BASE_COLORS[i % len(BASE_COLORS)] for i in range(len(view.taxa))]
 
-        fig, ax = plt.subplots(figsize=(8, 5), dpi=dpi)
-        bottom = np.zeros(len(plot_df))
-        x = np.arange(len(plot_df))
-        
-        # 평균 abundance 기준 상위 10개만 범례에 표시하기 위한 정보
-        top_10_taxa = means.index[:10]
-        
-        for c, col in enumerate(plot_df.columns):
-            # 상위 10개에 포함되는 경우에만 범례 라벨 추가
-            label = self.last_tax_label_with_readable_prefix(col) if col in top_10_taxa else ""
-            
-            ax.bar(x, plot_df[col], bottom=bottom,
-                   label=label if label else None,  # 빈 라벨은 None으로 처리
-                   color=colors[c])
-            bottom += plot_df[col].values
-
-        ax.set_xticks(x)
-        ax.set_xticklabels(plot_df.index, rotation=30, ha="right", fontsize=14)
-        ax.set_ylim(0, 100)
-        ax.set_ylabel("Relative abundance (%)", fontsize=14)
-        ax.tick_params(axis='y', which='major', labelsize=14)
-        ax.grid(axis="y", ls="--", alpha=.3)
-        
-        # 범례는 상위 10개에 대해서만 표시
-        handles, labels = ax.get_legend_handles_labels()
-        if handles:  # 범례 항목이 있는 경우에만 범례 표시
-            ax.legend(bbox_to_anchor=(1.02, 1), loc="upper left", fontsize=14)
-        
-        fig.tight_layout(rect=[0, 0, 0.85, 1])
-        fig.savefig(os.path.join(self.input_dir, f"{level}_barplot_Supple.pdf"), dpi=450)
-        plt.close(fig)
+        fig, ax = self.figures.figure((8, 5), dpi)
+        bottom = np.zeros(len(view.samples))
+        x = np.arange(len(view.samples))
+
+        # 평균 abundance 기준 상위 10개만 범례에 표시 (열 순서 = 평균 abundance 순서)
+        legend = [self.last_tax_label_with_readable_prefix(t) for t in view.taxa[:10]]
+
+        handles = None
+        if renderer == "collection":
+            # 총합 0 인 샘플(NaN)은 ax.bar 처럼 빈 막대로
+            stacked_bar_collection(ax, np.nan_to_num(view.values), colors,
+                                   rasterized=rasterize)
+            # 범례용 대리 패치
+            handles = [Patch(facecolor=colors[c], label=label)
+                       for c, label in enumerate(legend) if label]
+        else:
+            for c, col in enumerate(view.values.T):
+                label = legend[c] if c < len(legend) else ""
+                ax.bar(x, col, bottom=bottom,
+                       label=label if label else None,  # 빈 라벨은 None으로 처리
+                       color=colors[c], rasterized=rasterize)
+                bottom += col
+
+        style_barplot(self.figures, fig, ax, x, view.samples, legend, dpi, handles)
+        return self._savefig(fig, self.figures.filename(f"{level}_barplot_Supple"),
+                             key, [csv_name])
@@ -5,16 +5,120 @@ metabarcoding_taxonomy.workflow
 end-to-end 실행 래퍼
 """
 from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+from .filter import FilterResult
 from .visualizer import TaxonomyVisualizer
 
+EXECUTORS = ("process", "thread")
+
+
+class LevelRun(NamedTuple):
+    """병렬 실행 시 level 하나의 결과 (건너뛴 단계는 None)"""
+    level: str
+    samples: list | None
+    result: FilterResult | None
+    unclassified: np.ndarray | None
+    retained_ratio: float | None
+    log_lines: list[tuple[int, str]]
+    spans: list[dict]
+    manifest_files: dict
+    manifest_stages: dict
+
+
+class WorkflowResult(NamedTuple):
+    """run_all 결과 (manifest 로 건너뛴 level 은 filter_results 에 없음)"""
+    filter_results: dict[str, FilterResult]
+    stats_df: pd.DataFrame
+    taxa_count_df: pd.Series
+
 
 class MetabarcodingWorkflow(TaxonomyVisualizer):
     """필터링 → 통계 → 시각화 일괄 실행"""
-    def run_all(self):
+    def __init__(self, *a, workers: int = 1, executor: str = "process", **kw):
+        if executor not in EXECUTORS:
+            raise ValueError(f"executor must be one of {EXECUTORS}")
+        self.workers = workers
+        self.executor = executor
+        super().__init__(*a, **kw)
+
+    def run_all(self, top_n: int = 10) -> WorkflowResult:
         self.log("=== MetabarcodingWorkflow start ===")
-        self.process_all_files()
-        self.compute_unclassified_stats()
+        with self.span("workflow", workers=self.workers, executor=self.executor):
+            if self.workers > 1:
+                self._run_levels_parallel(top_n)
+            else:
+                self.process_all_files()
+                self.compute_unclassified_stats()
+                self.plot_well_classified()
+                self.plot_taxa_retained(self.compute_taxa_counts())
+                self.plot_cumulative_barplots(top_n=top_n)
+        self.log(f"Taxon rule cache: {self.taxon_cache.summary()}")
+        self.log("=== MetabarcodingWorkflow complete ===")
+        self.save_trace()
+        return WorkflowResult(
+            {lvl: self.filter_results[lvl] for lvl in self.level_names
+             if lvl in self.filter_results},
+            self.stats_df, self.taxa_count_df)
+
+    # ─────────── level 병렬 실행 ───────────
+    def _run_level(self, lvl: str, fp: str, need_stats: bool,
+                   top_n: int = 10) -> LevelRun:
+        """level 하나: 필터링 → 통계 → 바플롯"""
+        samples = unclassified = retained = None
+        with self.captured_log() as lines, self.tracer.captured() as spans:
+            result = self.filter_level(lvl, fp)
+            if need_stats:
+                samples, unclassified = self.level_unclassified(lvl, fp)
+                self.log(f" Level {lvl} done")
+                retained = self.level_retained_ratio(lvl, fp)
+            self.level_barplot(lvl, fp, top_n=top_n)
+        return LevelRun(lvl, samples, result, unclassified, retained, lines, spans,
+                        self.manifest.files, self.manifest.updated)
+
+    def _run_levels_parallel(self, top_n: int = 10):
+        self.log(f"Processing {len(self.level_names)} levels "
+                 f"({self.executor} pool, workers={self.workers})…")
+        need_stats = not (
+            self.manifest.is_current("stats:unclassified", self._unclassified_key())
+            and self.manifest.is_current("stats:taxa_counts", self._taxa_counts_key())
+        )
+        # 그림은 pyplot 없이 Figure 로 그리므로 스레드 워커에서도 바플롯을 그림
+        pool_cls = (ProcessPoolExecutor if self.executor == "process"
+                    else ThreadPoolExecutor)
+        n = len(self.level_names)
+        if self.derive_levels and not self.chunksize:
+            # 가장 깊은 level 을 먼저 읽어 두면 워커가 각자 다시 파싱하지 않음
+            self.load_level(self.level_names[-1])
+
+        # 워커는 manifest 를 파일에 쓰지 않고 기록만 돌려줌
+        self.manifest.autosave = False
+        try:
+            with pool_cls(max_workers=self.workers) as pool:
+                runs = list(pool.map(self._run_level, self.level_names,
+                                     self.file_paths, [need_stats] * n,
+                                     [top_n] * n))
+        finally:
+            self.manifest.autosave = True
+
+        # level 순서대로 로그 출력 · 결과 수집
+        for run in runs:
+            self.replay_log(run.log_lines)
+            self.tracer.extend(run.spans)
+            if run.result is not None:
+                self.filter_results[run.level] = run.result
+            self.manifest.merge(run.manifest_files, run.manifest_stages)
+        self.manifest.save()
+
+        if need_stats:
+            self.set_unclassified_stats({r.level: r.unclassified for r in runs},
+                                        runs[0].samples)
+            self.set_taxa_counts({r.level: r.retained_ratio for r in runs})
+        else:
+            self.compute_unclassified_stats()
+            self.compute_taxa_counts()
+
         self.plot_well_classified()
-        self.plot_taxa_retained()
-        self.plot_cumulative_barplots()
-        self.log("=== MetabarcodingWorkflow complete ===")
\ No newline at end of file
+        self.plot_taxa_retained(self.taxa_count_df)
@@ -0,0 +1,37 @@
+"""
+공용 fixture — benchmarks.synthetic 의 작은 합성 level-1..7 (QIIME2 collapse 처럼
+서로 일관된 level 파일, uncultured / incertae / "__" 노이즈 라벨 포함)
+"""
+from __future__ import annotations
+import logging, os, sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from benchmarks.synthetic import SyntheticSpec, write_synthetic_levels  # noqa: E402
+
+SPEC = SyntheticSpec(taxa=300, samples=5, zero_frac=0.6, noise_frac=0.2, seed=7)
+
+
+@pytest.fixture(autouse=True)
+def _quiet_logger():
+    logger = logging.getLogger("metabarcoding_taxonomy")
+    level = logger.level
+    logger.setLevel(logging.WARNING)
+    yield
+    logger.setLevel(level)
+
+
+@pytest.fixture
+def levels_dir(tmp_path):
+    """level-1..7.csv 가 있는 새 폴더"""
+    out = tmp_path / "levels"
+    write_synthetic_levels(str(out), SPEC)
+    return str(out)
+
+
+def read_bytes(folder: str, suffix: str = ".csv") -> dict[str, bytes]:
+    """입력 level-N.csv 를 제외한 출력 파일 {이름: 내용}"""
+    return {name: open(os.path.join(folder, name), "rb").read()
+            for name in sorted(os.listdir(folder))
+            if name.endswith(suffix) and "_" in name}
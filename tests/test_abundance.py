@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+from metabarcoding_taxonomy.abundance import rank_taxa, top_abundance
+from metabarcoding_taxonomy.tables import LevelTable
+
+
+def _baseline(counts: pd.DataFrame, top_n: int) -> pd.DataFrame:
+    """원본 _single_barplot 의 값 계산 (동률은 앞 열 우선 — stable 정렬)"""
+    rel = counts.div(counts.sum(axis=1), axis=0) * 100
+    means = rel.mean(axis=0).sort_values(ascending=False, kind="stable")
+    top = means.index[:top_n]
+    other = (100 - rel[top].sum(axis=1)).clip(lower=0)
+    plot_df = rel[top].copy()
+    if other.any():
+        plot_df["Other"] = other
+    return plot_df
+
+
+def _counts(seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    # 작은 정수 카운트 → 평균 동률이 많음, 3 번째 샘플은 총합 0
+    counts = rng.integers(0, 3, (6, 40)) * (rng.random((6, 40)) < 0.3)
+    counts[:, :5] = 2          # 완전히 같은 열 5 개
+    counts[2] = 0
+    return pd.DataFrame(counts, index=[f"S{i}" for i in range(6)],
+                        columns=[f"t{j:02d}" for j in range(40)])
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize("top_n", [1, 3, 7, 40, 100])
+def test_top_abundance_matches_sort_values(seed, top_n):
+    counts = _counts(seed)
+    expected = _baseline(counts, top_n)
+    table = LevelTable(counts.index, counts.columns, counts.to_numpy())
+    view = top_abundance(table, top_n)
+    assert view.taxa == expected.columns.tolist()
+    assert view.has_other == ("Other" in expected.columns)
+    # 합산 순서 차이로 Other 에 1e-14 수준 잔차가 남을 수 있음
+    np.testing.assert_allclose(view.values, expected.to_numpy(), rtol=1e-12, atol=1e-9)
+    # 빈 샘플: 상위 열은 NaN, Other 는 100
+    assert np.isnan(view.values[2, :min(top_n, 40)]).all()
+    if view.has_other:
+        assert view.values[2, -1] == 100
+
+
+def test_rank_taxa_ties_and_nan():
+    means = np.array([1.0, 3.0, np.nan, 3.0, 1.0, 2.0, 3.0])
+    # 동률은 앞 열 우선, NaN 은 맨 뒤 (Series.sort_values 와 같음)
+    expected = pd.Series(means).sort_values(ascending=False, kind="stable").index
+    assert rank_taxa(means).tolist() == expected.tolist()
+    for top_n in range(1, 8):
+        assert rank_taxa(means, top_n).tolist() == expected[:top_n].tolist()
+    assert rank_taxa(means, 0).tolist() == []
@@ -0,0 +1,36 @@
+import json, os
+import pandas as pd
+from metabarcoding_taxonomy.batch import SUMMARY_COLUMNS, main
+from metabarcoding_taxonomy.manifest import MANIFEST_NAME
+
+
+def test_failed_project_is_isolated(levels_dir, tmp_path):
+    os.makedirs(tmp_path / "empty")
+    manifest = tmp_path / "projects.json"
+    # 상대 경로는 manifest 위치 기준 · 실패할 프로젝트를 먼저
+    manifest.write_text(json.dumps([
+        {"name": "no_levels", "input_dir": "empty"},
+        {"name": "good", "input_dir": os.path.relpath(levels_dir, tmp_path),
+         "level_pattern": "level-[1-3].csv", "level_labels": ["K", "P", "C"],
+         "sample_name_mapping": {"0H": "T0"}, "supplementary": False},
+    ]))
+    summary_path = tmp_path / "batch_summary.csv"
+    assert main([str(manifest), "--workers", "2", "--summary", str(summary_path)]) == 1
+
+    summary = pd.read_csv(summary_path)
+    assert summary.columns.tolist() == list(SUMMARY_COLUMNS)
+    assert summary["project"].tolist() == ["no_levels", "good"]
+    bad, good = summary.iloc[0], summary.iloc[1]
+    assert bad["status"] == "failed" and "No level files" in bad["error"]
+    assert pd.isna(bad["levels"]) and pd.isna(bad["mean_unclassified"])
+    assert good["status"] == "ok" and pd.isna(good["error"])
+    assert (good["levels"], good["deepest_level"]) == (3, "level-3")
+    assert good["samples"] == 5 and 0 <= good["mean_unclassified"] <= 1
+
+    # 프로젝트별 옵션이 워크플로까지 전달됨
+    outputs = os.listdir(levels_dir)
+    assert "level-3_barplot.pdf" in outputs and "level-4_barplot.pdf" not in outputs
+    assert not any(name.endswith("_Supple.pdf") for name in outputs)
+    with open(os.path.join(levels_dir, MANIFEST_NAME), encoding="utf-8") as fh:
+        stats = json.load(fh)["stages"]["stats:unclassified"]["data"]
+    assert stats["index"][0] == "T0"
@@ -0,0 +1,49 @@
+import os
+import pytest
+from conftest import read_bytes
+from metabarcoding_taxonomy import TaxonomyFilter
+from metabarcoding_taxonomy.cli import main
+
+
+def _usage_error(capsys, argv):
+    with pytest.raises(SystemExit) as exc:
+        main(argv)
+    assert exc.value.code == 2
+    return capsys.readouterr().err
+
+
+def test_bad_arguments_are_usage_errors(levels_dir, tmp_path, capsys):
+    assert "not a directory" in _usage_error(capsys, ["filter", str(tmp_path / "x")])
+    assert "no level-N.csv" in _usage_error(capsys, ["filter", str(tmp_path)])
+    assert "--labels needs 7" in _usage_error(capsys, ["filter", levels_dir,
+                                                       "--labels", "K", "P"])
+    assert "requires --derive-levels" in _usage_error(
+        capsys, ["filter", levels_dir, "--check-derived"])
+    assert "SAMPLE=NAME" in _usage_error(capsys, ["filter", levels_dir, "--map", "x"])
+    assert "positive" in _usage_error(capsys, ["all", levels_dir, "--workers", "0"])
+    assert "invalid choice" in _usage_error(capsys, ["all", levels_dir,
+                                                     "--executor", "fork"])
+
+
+def test_internal_errors_propagate(levels_dir, monkeypatch):
+    def broken(self):
+        raise ValueError("bug")
+    monkeypatch.setattr(TaxonomyFilter, "process_all_files", broken)
+    with pytest.raises(ValueError, match="bug"):
+        main(["filter", levels_dir])
+
+
+def test_filter_command_writes_outputs(levels_dir):
+    assert main(["filter", levels_dir, "--no-incremental"]) == 0
+    assert len(read_bytes(levels_dir)) > 0
+
+
+def test_tampered_derived_level_exits_with_message(levels_dir):
+    fp = os.path.join(levels_dir, "level-3.csv")
+    lines = open(fp).read().splitlines()
+    head, first = lines[0], lines[1].split(",")
+    first[1] = str(int(float(first[1])) + 1)
+    open(fp, "w").write("\n".join([head, ",".join(first), *lines[2:]]) + "\n")
+    with pytest.raises(SystemExit) as exc:
+        main(["filter", levels_dir, "--derive-levels", "--check-derived"])
+    assert "level-3" in str(exc.value.code)
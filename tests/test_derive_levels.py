@@ -0,0 +1,42 @@
+import os, shutil
+import pandas as pd
+import pytest
+from conftest import read_bytes
+from metabarcoding_taxonomy import TaxonomyFilter
+
+
+def test_rollup_matches_supplied_levels(levels_dir):
+    obj = TaxonomyFilter(input_dir=levels_dir, derive_levels=True)
+    results = obj.check_derived_levels(strict=True)
+    assert sorted(results) == [f"level-{d}" for d in range(1, 7)]
+    assert all(results.values())
+
+
+def test_rollup_without_intermediate_files(levels_dir):
+    for d in range(1, 7):
+        os.remove(os.path.join(levels_dir, f"level-{d}.csv"))
+    obj = TaxonomyFilter(input_dir=levels_dir, derive_levels=True)
+    assert obj.level_names == [f"level-{d}" for d in range(1, 8)]
+    assert obj.check_derived_levels() == {}
+    assert obj.load_level("level-1").shape[1] >= 1
+
+
+def test_tampered_level_is_reported(levels_dir):
+    fp = os.path.join(levels_dir, "level-4.csv")
+    df = pd.read_csv(fp, index_col=0)
+    df.iloc[0, 0] += 1
+    df.to_csv(fp)
+    obj = TaxonomyFilter(input_dir=levels_dir, derive_levels=True)
+    results = obj.check_derived_levels()
+    assert [lvl for lvl, ok in results.items() if not ok] == ["level-4"]
+    with pytest.raises(ValueError, match="level-4"):
+        obj.check_derived_levels(strict=True)
+
+
+def test_derived_outputs_match_supplied(levels_dir, tmp_path):
+    derived_dir = str(tmp_path / "derived")
+    shutil.copytree(levels_dir, derived_dir)
+    TaxonomyFilter(input_dir=levels_dir, incremental=False).process_all_files()
+    TaxonomyFilter(input_dir=derived_dir, derive_levels=True,
+                   incremental=False).process_all_files()
+    assert read_bytes(derived_dir) == read_bytes(levels_dir)
@@ -0,0 +1,80 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from metabarcoding_taxonomy import TaxonomyStatistics
+from metabarcoding_taxonomy.diversity import alpha_diversity, bray_curtis, jaccard
+from metabarcoding_taxonomy.tables import LevelTable
+
+
+def _numeric_samples(levels_dir):
+    for name in os.listdir(levels_dir):
+        fp = os.path.join(levels_dir, name)
+        df = pd.read_csv(fp, index_col=0)
+        df.index = pd.RangeIndex(100, 100 + len(df), name=df.index.name)
+        df.to_csv(fp)
+
+
+@pytest.mark.parametrize("metric", ["braycurtis", "jaccard"])
+def test_cached_beta_matches_fresh_with_numeric_samples(levels_dir, metric):
+    _numeric_samples(levels_dir)
+    fresh = TaxonomyStatistics(input_dir=levels_dir).compute_beta_diversity(metric)
+    cached = TaxonomyStatistics(input_dir=levels_dir).compute_beta_diversity(metric)
+    for lvl, dist in fresh.items():
+        pd.testing.assert_frame_equal(cached[lvl], dist)
+
+
+def test_bray_curtis_block_sizes_agree():
+    rng = np.random.default_rng(3)
+    counts = rng.poisson(2, (9, 40)) * (rng.random((9, 40)) < 0.5)
+    counts[4] = 0
+    table = LevelTable(range(9), range(40), counts)
+    x = counts.astype(float)
+    with np.errstate(invalid="ignore"):   # 둘 다 빈 샘플 쌍 → NaN
+        expected = np.abs(x[:, None] - x[None]).sum(2) / (x[:, None] + x[None]).sum(2)
+    for block in (1, 7, 100, 10**6):
+        np.testing.assert_allclose(bray_curtis(table, block), expected)
+
+
+def _tables(counts) -> list[LevelTable]:
+    """같은 카운트의 dense · (scipy 가 있으면) sparse 테이블"""
+    dense = LevelTable([f"S{i}" for i in range(len(counts))],
+                       [f"t{j}" for j in range(counts.shape[1])], counts)
+    try:
+        return [dense, dense.to_sparse()]
+    except ImportError:
+        return [dense]
+
+
+def test_alpha_diversity_hand_computed():
+    counts = np.array([[2, 2, 0, 0], [0, 0, 0, 0], [1, 1, 1, 1], [5, 0, 0, 0]])
+    for table in _tables(counts):
+        alpha = alpha_diversity(table)
+        assert alpha["richness"].tolist() == [2, 0, 4, 1]
+        # 균등 2 종 → 1 bit, 균등 4 종 → 2 bit, 1 종 → 0 / 빈 샘플은 NaN
+        np.testing.assert_allclose(alpha["shannon"], [1, np.nan, 2, 0])
+        np.testing.assert_allclose(alpha["simpson"], [0.5, np.nan, 0.75, 0])
+
+
+def test_alpha_and_beta_match_scipy():
+    stats = pytest.importorskip("scipy.stats")
+    distance = pytest.importorskip("scipy.spatial.distance")
+    rng = np.random.default_rng(11)
+    counts = rng.poisson(3, (7, 30)) * (rng.random((7, 30)) < 0.4)
+    counts[2] = 0
+    full = [i for i in range(len(counts)) if i != 2]
+    x = counts[full]
+    for table in _tables(counts):
+        alpha = alpha_diversity(table).iloc[full]
+        assert alpha["richness"].tolist() == (x > 0).sum(axis=1).tolist()
+        np.testing.assert_allclose(alpha["shannon"], stats.entropy(x, base=2, axis=1))
+        p = x / x.sum(axis=1, keepdims=True)
+        np.testing.assert_allclose(alpha["simpson"], 1 - (p * p).sum(axis=1))
+
+        for ours, metric in ((jaccard(table), "jaccard"),
+                             (bray_curtis(table), "braycurtis")):
+            expected = distance.squareform(distance.pdist(x > 0 if metric == "jaccard"
+                                                          else x, metric))
+            np.testing.assert_allclose(ours[np.ix_(full, full)], expected, atol=1e-12)
+            # 빈 샘플: 다른 샘플과는 1, 자기 자신과는 NaN (scipy 는 0)
+            assert np.allclose(np.delete(ours[2], 2), 1) and np.isnan(ours[2, 2])
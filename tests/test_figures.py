@@ -0,0 +1,90 @@
+import pytest
+
+pytest.importorskip("matplotlib")
+from matplotlib import rcParams  # noqa: E402
+from matplotlib.text import Text  # noqa: E402
+from metabarcoding_taxonomy import MetabarcodingWorkflow  # noqa: E402
+from metabarcoding_taxonomy.figures import FigureTemplate  # noqa: E402
+
+
+def test_font_is_applied_per_figure_without_touching_rcparams():
+    before = dict(rcParams)
+    figures = FigureTemplate("svg", font_family="DejaVu Serif")
+    fig, ax = figures.figure((4, 3))
+    ax.plot(["a", "b", "c"], [1, 2, 3], label="series")
+    figures.style_axes(ax, "ratio", (0, 4), 12)
+    figures.legend_right(ax)
+    figures.layout(fig, ("test",))
+    svg = figures.to_bytes(fig)
+    assert dict(rcParams) == before
+    families = {tuple(t.get_fontfamily()) for t in fig.findobj(Text) if t.get_text()}
+    assert families == {("DejaVu Serif",)}
+    assert svg == figures.to_bytes(fig)   # 고정 hashsalt → 같은 바이트
+
+
+def test_workflow_figures_are_reproducible(levels_dir):
+    def run():
+        wf = MetabarcodingWorkflow(input_dir=levels_dir, figure_format="svg",
+                                   incremental=False)
+        wf.run_all()
+        with open(f"{levels_dir}/level-5_barplot.svg", "rb") as fh:
+            return fh.read()
+    before = dict(rcParams)
+    assert run() == run()
+    assert dict(rcParams) == before
+
+
+def test_barplot_cycles_palette_beyond_fifteen_taxa():
+    from conftest import SPEC
+    from benchmarks.synthetic import synthetic_tables
+    from metabarcoding_taxonomy.abundance import top_abundance
+    from metabarcoding_taxonomy.tables import LevelTable
+    from metabarcoding_taxonomy.visualizer import BASE_COLORS, barplot_figure
+
+    table = LevelTable.from_frame(synthetic_tables(SPEC)[7])
+    view = top_abundance(table, 20)
+    assert len(view.taxa) > len(BASE_COLORS)
+    legend = [t.rpartition(";")[2] for t in view.taxa]
+    fig = barplot_figure(FigureTemplate("png", preview=True), view, legend, 72)
+    bars = fig.axes[0].containers
+    assert len(bars) == len(view.taxa)
+    assert bars[-1].patches[0].get_facecolor()[:3] == (0, 0, 0)   # Other
+
+
+def _rectangles(ax):
+    """(x, 아래, 폭, 높이, RGBA) — 높이 0 · NaN 막대는 그려지지 않으므로 제외"""
+    import numpy as np
+    from matplotlib.collections import PolyCollection
+    from matplotlib.colors import to_rgba
+    rects = [(p.get_x(), p.get_y(), p.get_width(), p.get_height(), p.get_facecolor())
+             for p in ax.patches]
+    for coll in ax.findobj(PolyCollection):
+        for path, face in zip(coll.get_paths(), coll.get_facecolors()):
+            (x0, y0), (_, y1), (x1, _) = path.vertices[:3]
+            rects.append((x0, y0, x1 - x0, y1 - y0, tuple(face)))
+    rects = [(*r[:4], to_rgba(r[4])) for r in rects
+             if np.isfinite(r[3]) and r[3] != 0]
+    return sorted(rects)
+
+
+def test_collection_renderer_matches_bars():
+    import numpy as np
+    from conftest import SPEC
+    from benchmarks.synthetic import synthetic_tables
+
+    tables = {lvl: df.copy() for lvl, df in synthetic_tables(SPEC).items()
+              if lvl in (2, 6)}
+    tables[6].iloc[1] = 0           # 총합 0 인 샘플 → 빈 막대
+    wf = MetabarcodingWorkflow.from_tables(tables)
+    figs = {renderer: wf.supplementary_figure_all_details(dpi=40, renderer=renderer)
+            for renderer in ("bars", "collection")}
+    for lvl in wf.level_names:
+        bars, coll = (figs[r][lvl].axes[0] for r in ("bars", "collection"))
+        expected, got = _rectangles(bars), _rectangles(coll)
+        assert len(got) == len(expected) > 0
+        np.testing.assert_allclose([r[:4] for r in got], [r[:4] for r in expected],
+                                   atol=1e-9)
+        assert [r[4] for r in got] == [r[4] for r in expected]
+        assert coll.get_xlim() == bars.get_xlim() and coll.get_ylim() == bars.get_ylim()
+        assert ([t.get_text() for t in coll.get_legend().get_texts()]
+                == [t.get_text() for t in bars.get_legend().get_texts()])
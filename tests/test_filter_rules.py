@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from conftest import SPEC
+from benchmarks.synthetic import synthetic_tables
+from benchmarks.taxon_rules import baseline_is_filtered, baseline_truncate
+from metabarcoding_taxonomy import TaxonomyFilter
+
+TABLES = synthetic_tables(SPEC)
+EDGE = ["d__Bacteria", "d__Bacteria;__", "d__Bacteria;p__A;__;__", "__",
+        "d__Bacteria;p__Incertae_Sedis;c__B", "d__Bacteria;p__A;c__uncultured_x",
+        "d__Bacteria;p__A-1;c__B", "d__Bacteria;p__A;g__Bacillus_sp",
+        "d__Bacteria;p__A;g__Bacillus_sp;s__x", "d__Bacteria;p__A;c__B;__;s__C",
+        "d__Bacteria;p__Candidatus_A", "d__Bacteria;p__A;c__metagenome",
+        "d__Bacteria;p__Ä;c__B", "d__Bacteria;p__A_SP;c__B", "d__Bacteria;;c__B",
+        "d__Bacteria;p__UNCULTURED", "d__Bacteria;p__A b", ""]
+
+
+def _filter(tmp_path):
+    return TaxonomyFilter(tables=TABLES, input_dir=str(tmp_path))
+
+
+@pytest.mark.parametrize("level", sorted(TABLES))
+def test_vectorized_rules_match_scalar(level, tmp_path):
+    taxa = np.array([*TABLES[level].columns, *EDGE], dtype=object)
+    target = level - 1
+    scalar, batch = _filter(tmp_path), _filter(tmp_path)
+    expected_mask = [scalar.is_filtered_taxon(t, target) for t in taxa]
+    expected_trunc = [scalar.truncate_taxonomy(t) for t in taxa]
+    # 빈 캐시 · 채워진 캐시 둘 다
+    for _ in range(2):
+        assert batch.filtered_mask(taxa, target).tolist() == expected_mask
+        assert batch.truncate_labels(taxa).tolist() == expected_trunc
+
+
+def test_vectorized_rules_reuse_cached_parents(tmp_path):
+    """조상만 캐시에 있으면 마지막 세그먼트만 평가하는 경로"""
+    taxa = np.array(EDGE + list(TABLES[7].columns), dtype=object)
+    parents = np.unique([t.rpartition(";")[0] for t in taxa if ";" in t])
+    scalar, batch = _filter(tmp_path), _filter(tmp_path)
+    batch.truncate_labels(parents)
+    assert batch.truncate_labels(taxa).tolist() == [scalar.truncate_taxonomy(t)
+                                                    for t in taxa]
+    assert batch.filtered_mask(taxa).tolist() == [scalar.is_filtered_taxon(t)
+                                                  for t in taxa]
+
+
+@pytest.mark.parametrize("target", [None, 1, 6])
+def test_vectorized_rules_match_baseline(target, tmp_path, monkeypatch):
+    """원본(정규식 스칼라) 규칙과 같은 결과 (블록 경계 포함)"""
+    monkeypatch.setattr("metabarcoding_taxonomy.filter._CLASSIFY_BLOCK", 97)
+    taxa = np.array([*TABLES[7].columns, *TABLES[3].columns, *EDGE], dtype=object)
+    batch = _filter(tmp_path)
+    assert batch.filtered_mask(taxa, target).tolist() == [
+        baseline_is_filtered(t, target) for t in taxa]
+    assert batch.truncate_labels(taxa).tolist() == [baseline_truncate(t) for t in taxa]
+
+
+def _unique_segments(taxa) -> int:
+    return len(set(";".join(taxa).split(";")))
+
+
+def test_segment_cache_counters_and_ancestor_reuse(tmp_path):
+    """묶음 조회 hit/miss 카운터 · 깊은 level 에서 채운 조상 세그먼트를 얕은 level 이 재사용"""
+    wf = TaxonomyFilter(tables=TABLES, input_dir=str(tmp_path), taxon_cache_size=10)
+    segments = wf.taxon_cache.segments
+    deep, shallow = TABLES[7].columns, TABLES[3].columns
+
+    wf.filtered_mask(deep, 6)
+    cold = segments.info()
+    n_deep = _unique_segments(deep)
+    # 생성 시 크기(10)보다 커도 level 의 세그먼트가 모두 남음
+    assert cold.maxsize >= n_deep
+    assert (cold.hits, cold.misses, cold.currsize) == (0, n_deep, n_deep)
+
+    wf.filtered_mask(shallow, 2)
+    wf.truncate_labels(shallow)
+    wf.filtered_mask(shallow)          # 통계 단계 (target_level 없음) 도 같은 키
+    warm = segments.info()
+    assert warm.misses == cold.misses
+    assert warm.hits == 3 * _unique_segments(shallow)
+    # 일괄 경로는 스칼라 전용 표를 건드리지 않음
+    assert len(wf.taxon_cache.verdicts) == len(wf.taxon_cache.lineages) == 0
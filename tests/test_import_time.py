@@ -0,0 +1,36 @@
+import os, subprocess, sys
+import pytest
+from benchmarks.import_time import BUDGETS, ROOT, measure
+
+# pandas 자체를 허용하는 문장도 matplotlib 백엔드까지 끌어오면 안 됨
+PANDAS_PLOTTING = "pandas.plotting._matplotlib"
+# 절대 시간 예산은 머신마다 달라 기본으로는 건너뜀 — IMPORT_BUDGET=1 로 실행
+# (느린 CI 머신은 IMPORT_BUDGET_SCALE=2 처럼 예산을 늘림)
+TIMED = os.environ.get("IMPORT_BUDGET") == "1"
+SCALE = float(os.environ.get("IMPORT_BUDGET_SCALE", "1"))
+
+
+def _loaded_modules(stmt: str) -> list[str]:
+    """새 인터프리터에서 stmt 실행 후 sys.modules"""
+    code = f"import sys\n{stmt}\nprint('\\n'.join(sys.modules))"
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT,
+                          capture_output=True, text=True, check=True)
+    return proc.stdout.split()
+
+
+@pytest.mark.parametrize("stmt, forbidden", [(b[0], b[3]) for b in BUDGETS],
+                         ids=[b[0] for b in BUDGETS])
+def test_heavy_modules_not_imported(stmt, forbidden):
+    banned = (*forbidden, PANDAS_PLOTTING)
+    loaded = [name for name in _loaded_modules(stmt)
+              if any(name == b or name.startswith(f"{b}.") for b in banned)]
+    assert loaded == []
+
+
+@pytest.mark.skipif(not TIMED, reason="set IMPORT_BUDGET=1 to check import times")
+@pytest.mark.parametrize("stmt, metric, budget, forbidden", BUDGETS,
+                         ids=[b[0] for b in BUDGETS])
+def test_import_budget(stmt, metric, budget, forbidden):
+    runs = [measure(stmt) for _ in range(3)]
+    best = min(r[0 if metric == "own" else 1] for r in runs)
+    assert best <= budget * SCALE, f"{stmt}: {best:.1f} ms > {budget} ms"
@@ -0,0 +1,37 @@
+import os
+from conftest import SPEC
+from benchmarks.synthetic import synthetic_tables
+from metabarcoding_taxonomy import MetabarcodingWorkflow
+
+TABLES = synthetic_tables(SPEC)
+
+
+def test_from_tables_run_leaves_cwd_untouched(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    wf = MetabarcodingWorkflow.from_tables(TABLES, export_plot_values=True)
+    result = wf.run_all()
+    wf.supplementary_figure_all_details()
+    wf.compute_alpha_diversity()
+    wf.compute_beta_diversity()
+    assert len(result.filter_results) == len(TABLES)
+    assert os.listdir(tmp_path) == []
+
+
+def test_from_tables_writes_when_asked(tmp_path):
+    out = tmp_path / "out"
+    out.mkdir()
+    MetabarcodingWorkflow.from_tables(TABLES, input_dir=str(out),
+                                      write_outputs=True).run_all()
+    names = os.listdir(out)
+    assert "level-7_barplot.pdf" in names and "level-7_retained.csv" in names
+
+
+def test_in_memory_plots_return_figures(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    wf = MetabarcodingWorkflow.from_tables(TABLES)
+    figs = wf.plot_cumulative_barplots(dpi=72)
+    assert sorted(figs) == sorted(wf.level_names)
+    assert wf.figures.to_bytes(figs["level-7"]).startswith(b"%PDF")
+    assert wf.supplementary_figure_all_details(dpi=72)["level-3"] is not None
+    assert wf.plot_well_classified() is not None
+    assert os.listdir(tmp_path) == []
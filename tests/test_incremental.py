@@ -0,0 +1,78 @@
+import os, shutil
+import pandas as pd
+from conftest import read_bytes
+from metabarcoding_taxonomy import MetabarcodingWorkflow
+from metabarcoding_taxonomy.cli import main
+from metabarcoding_taxonomy.manifest import MANIFEST_NAME
+
+
+def _run(folder: str, top_n: int = 10, **kw) -> set[str]:
+    """run_all 한 번 → 이번 실행에서 다시 계산(기록)된 단계 이름"""
+    wf = MetabarcodingWorkflow(input_dir=folder, **kw)
+    wf.run_all(top_n=top_n)
+    return set(wf.manifest.updated)
+
+
+def _outputs(folder: str) -> dict[str, bytes]:
+    return {**read_bytes(folder), **read_bytes(folder, ".pdf")}
+
+
+def _level_of(stage: str) -> str | None:
+    """단계 이름 안의 level (여러 level 을 묶는 단계는 None)"""
+    return next((f"level-{i}" for i in range(1, 8)
+                 if f"level-{i}:" in f"{stage}:" or f"level-{i}_" in stage), None)
+
+
+def test_unchanged_inputs_skip_every_stage(levels_dir):
+    first = _run(levels_dir)
+    assert {"filter:level-1", "filter:level-7", "stats:unclassified",
+            "level-7_barplot.pdf"} <= first
+    before = _outputs(levels_dir)
+    assert _run(levels_dir) == set()
+    assert _outputs(levels_dir) == before
+
+
+def test_changed_level_reruns_only_affected_stages(levels_dir, tmp_path):
+    all_stages = _run(levels_dir)
+    fp = os.path.join(levels_dir, "level-3.csv")
+    df = pd.read_csv(fp)
+    df[df.columns[1]] += 1
+    df.to_csv(fp, index=False)
+
+    rerun = _run(levels_dir)
+    expected = {s for s in all_stages if _level_of(s) in ("level-3", None)}
+    assert "filter:level-3" in rerun and "stats:unclassified" in rerun
+    assert rerun == expected
+
+    # 일부만 다시 돌린 결과 == 처음부터 돌린 결과
+    fresh = str(tmp_path / "fresh")
+    os.makedirs(fresh)
+    for i in range(1, 8):
+        shutil.copy(os.path.join(levels_dir, f"level-{i}.csv"), fresh)
+    _run(fresh, incremental=False)
+    assert _outputs(levels_dir) == _outputs(fresh)
+
+
+def test_changed_params_rerun(levels_dir):
+    _run(levels_dir)
+    rerun = _run(levels_dir, top_n=5)
+    assert rerun == {f"level-{i}_barplot.pdf" for i in range(1, 8)}
+    # 샘플 이름 매핑: 샘플 이름이 들어가는 통계·그림만 (필터 · retained 개수 제외)
+    rerun = _run(levels_dir, top_n=5, sample_name_mapping={"0H": "T0"})
+    assert rerun == {"stats:unclassified", "Well_classified_proportion.pdf",
+                     *(f"level-{i}_barplot.pdf" for i in range(1, 8))}
+
+
+def test_force_and_no_incremental_rerun_everything(levels_dir):
+    all_stages = _run(levels_dir)
+    assert _run(levels_dir, force=True) == all_stages
+
+    manifest = os.path.join(levels_dir, MANIFEST_NAME)
+    recorded = open(manifest, "rb").read()
+    filtered = [os.path.join(levels_dir, f"level-{i}_filtered.csv") for i in range(1, 8)]
+    for path in filtered:
+        os.utime(path, ns=(0, 0))
+    assert main(["filter", levels_dir, "--no-incremental"]) == 0
+    assert all(os.stat(path).st_mtime_ns > 0 for path in filtered)
+    # manifest 를 읽지도 쓰지도 않음
+    assert open(manifest, "rb").read() == recorded
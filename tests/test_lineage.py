@@ -0,0 +1,37 @@
+import numpy as np
+from conftest import SPEC
+from benchmarks.synthetic import synthetic_tables
+from metabarcoding_taxonomy import TaxonomyFilter
+from metabarcoding_taxonomy.lineage import LineageIndex
+
+TABLES = synthetic_tables(SPEC)
+
+
+def test_encode_decode_roundtrip():
+    index = LineageIndex()
+    taxa = TABLES[7].columns
+    nodes = index.encode(taxa)
+    assert index.decode(nodes).equals(taxa)
+    assert [index.lineage(n) for n in nodes[:5]] == taxa[:5].tolist()
+    assert np.array_equal(index.encode(taxa), nodes)
+    assert index.find("d__Nope;p__x") is None and index.find(taxa[0]) == nodes[0]
+
+
+def test_derived_levels_reuse_node_ids(tmp_path):
+    obj = TaxonomyFilter(tables={7: TABLES[7]}, input_dir=str(tmp_path),
+                         derive_levels=True)
+    deepest = obj.level_nodes("level-7")
+    for d in range(1, 7):
+        table = obj.load_level(f"level-{d}")
+        assert sorted(table.taxa) == sorted(TABLES[d].columns)
+        assert obj.lineages.decode(obj.level_nodes(f"level-{d}")).equals(table.taxa)
+    assert obj.level_nodes("level-7") is deepest
+
+
+def test_legend_labels_do_not_grow_the_index(tmp_path):
+    obj = TaxonomyFilter(tables=TABLES, input_dir=str(tmp_path))
+    size = len(obj.lineages)
+    assert obj.last_tax_label_with_readable_prefix("k__A;p__B;g__Vibrio") == "G: Vibrio"
+    assert obj.last_tax_label("k__A;p__B;g__Vibrio") == "Vibrio"
+    assert obj.last_tax_label_with_readable_prefix("Other") == "Other"
+    assert len(obj.lineages) == size
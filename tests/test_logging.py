@@ -0,0 +1,31 @@
+import logging
+from metabarcoding_taxonomy import MetabarcodingWorkflow, TaxonomyFilter
+from metabarcoding_taxonomy.profiling import LOGGER, StageTracer
+
+
+def test_library_logs_propagate_without_handlers(levels_dir, caplog):
+    assert LOGGER.propagate
+    with caplog.at_level(logging.INFO, logger="metabarcoding_taxonomy"):
+        TaxonomyFilter(input_dir=levels_dir, incremental=False).process_all_files()
+    assert any("Initialized with levels" in r.getMessage() for r in caplog.records)
+
+
+def test_worker_logs_are_replayed_with_their_level(levels_dir, caplog):
+    with caplog.at_level(logging.INFO, logger="metabarcoding_taxonomy"):
+        MetabarcodingWorkflow(input_dir=levels_dir, incremental=False, workers=2,
+                              executor="process").run_all()
+    messages = [r.getMessage() for r in caplog.records]
+    assert any("Level level-7 done" in m for m in messages)
+    # DEBUG span 요약은 INFO 설정에서 걸러짐
+    assert not any("span " in m for m in messages)
+
+
+def test_span_records_rss_high_water_and_growth():
+    tracer = StageTracer()
+    with tracer.span("load", "level-1"):
+        block = bytearray(32 * 2**20)
+    del block
+    span = tracer.spans[0]
+    if span["max_rss"] is not None:
+        assert span["rss_growth"] >= 0 and span["max_rss"] >= span["rss_growth"]
+    assert "peak_rss" not in span
@@ -0,0 +1,43 @@
+import os
+import numpy as np
+import pytest
+from conftest import SPEC
+from benchmarks.synthetic import synthetic_tables
+from metabarcoding_taxonomy import TaxonomyStatistics
+from metabarcoding_taxonomy.rarefaction import rarefy
+from metabarcoding_taxonomy.tables import LevelTable
+
+TABLES = synthetic_tables(SPEC)
+
+
+def test_rarefy_rejects_non_integer_counts():
+    table = LevelTable.from_frame(TABLES[3] / 2.5)
+    with pytest.raises(ValueError, match="integer"):
+        rarefy(table, 5, iterations=2)
+    with pytest.raises(ValueError, match="integer"):
+        rarefy(table.to_sparse(), 5, iterations=2)
+
+
+def test_rarefy_is_reproducible_across_workers():
+    table = LevelTable.from_frame(TABLES[4])
+    depth = int(table.row_sums()[table.row_sums() > 0].min())
+    one = rarefy(table, depth, iterations=12, seed=3, batch=5)
+    two = rarefy(table, depth, iterations=12, seed=3, batch=5, workers=2)
+    assert np.array_equal(one.table.counts, two.table.counts)
+    assert one.stats.equals(two.stats)
+    assert np.allclose(one.table.row_sums(), depth)
+
+
+def test_rarefied_creates_folder_only_when_writing(tmp_path, levels_dir):
+    mem = tmp_path / "mem"
+    mem.mkdir()
+    rarefied = TaxonomyStatistics.from_tables(TABLES, input_dir=str(mem)).rarefied(
+        iterations=3)
+    assert os.listdir(mem) == []
+    with pytest.raises(ValueError, match="integer"):
+        rarefied.rarefied(iterations=3)   # 평균 테이블은 다시 rarefy 하지 않음
+
+    out = str(tmp_path / "out")
+    TaxonomyStatistics(input_dir=levels_dir, incremental=False).rarefied(
+        iterations=3, out_dir=out)
+    assert "level-7_rarefaction.csv" in os.listdir(out)
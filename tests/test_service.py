@@ -0,0 +1,97 @@
+import json, threading, urllib.error, urllib.request
+import pytest
+from metabarcoding_taxonomy.service import AnalysisService, make_server
+
+# 두 번째 샘플은 합계 0 → 미분류 비율 NaN
+INLINE = {"level-2": {"samples": ["S1", "S2"],
+                      "taxa": ["d__Bacteria;p__A", "d__Bacteria;p__uncultured"],
+                      "counts": [[3, 1], [0, 0]]}}
+
+
+@pytest.fixture
+def server():
+    service = AnalysisService(workers=0)
+    httpd = make_server("127.0.0.1", 0, service)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield service, f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+    service.close()
+
+
+def _request(url: str, body=None) -> tuple[int, str, bytes]:
+    data = None if body is None else json.dumps(body).encode()
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data)) as r:
+            return r.status, r.headers["Content-Type"], r.read()
+    except urllib.error.HTTPError as exc:
+        return exc.code, exc.headers["Content-Type"], exc.read()
+
+
+def test_stats_reuses_warm_project(server, levels_dir):
+    service, url = server
+    req = {"input_dir": levels_dir, "mapping": {"0H": "T0"}}
+    status, _, body = _request(url + "/stats", req)
+    first = json.loads(body)
+    assert status == 200
+    assert first["samples"][0] == "T0"
+    assert sorted(first["unclassified"]) == [f"level-{i}" for i in range(1, 8)]
+    assert len(first["unclassified"]["level-7"]) == len(first["samples"])
+
+    project = service.projects.get(first["key"])
+    status, _, body = _request(url + "/stats", {"input_dir": levels_dir})
+    assert status == 200 and json.loads(body)["key"] == first["key"]
+    # 같은 입력 → 같은 분석 인스턴스 (테이블을 다시 읽지 않음)
+    assert service.projects.get(first["key"]) is project
+    assert service.projects.info().currsize == 1
+
+
+def test_stats_sends_nan_as_null(server):
+    _, url = server
+    status, _, body = _request(url + "/stats", {"tables": INLINE})
+    assert status == 200
+    assert b"NaN" not in body
+    assert json.loads(body)["unclassified"]["level-2"] == [0.25, None]
+
+
+def test_barplot_figure_cache_hit(server, levels_dir):
+    service, url = server
+    req = {"input_dir": levels_dir, "level": "level-5", "top_n": 4,
+           "format": "png", "dpi": 40}
+    status, content_type, first = _request(url + "/barplot", req)
+    assert (status, content_type) == (200, "image/png")
+    assert first.startswith(b"\x89PNG")
+    hits = service.figures.info().hits
+    assert _request(url + "/barplot", req)[2] == first
+    assert service.figures.info().hits == hits + 1
+    assert service.figures.info().currsize == 1
+
+    status, content_type, body = _request(url + "/barplot", {**req, "format": None})
+    values = json.loads(body)
+    assert (status, content_type) == (200, "application/json")
+    assert len(values["taxa"]) == len(values["legend"]) == 4 + values["has_other"]
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/stats", {"tables": INLINE, "mapping": ["S1", "T1"]}),
+    ("/barplot", {"tables": INLINE, "mapping": "S1=T1"}),
+    ("/barplot", {"tables": INLINE, "top_n": 0}),
+    ("/barplot", {"tables": INLINE, "format": "gif"}),
+    ("/barplot", {"tables": INLINE, "level": "level-9"}),
+    ("/stats", ["not", "an", "object"]),
+    ("/stats", {}),
+])
+def test_bad_requests_are_400(server, path, body):
+    _, url = server
+    status, content_type, payload = _request(url + path, body)
+    assert (status, content_type) == (400, "application/json")
+    assert "error" in json.loads(payload)
+
+
+def test_missing_input_and_unknown_path_are_404(server, tmp_path):
+    _, url = server
+    status, _, body = _request(url + "/stats", {"input_dir": str(tmp_path)})
+    assert status == 404 and "No level files" in json.loads(body)["error"]
+    assert _request(url + "/nope", {})[0] == 404
+    assert _request(url + "/nope")[0] == 404
+    assert json.loads(_request(url + "/health")[2])["status"] == "ok"
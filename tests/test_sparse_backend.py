@@ -0,0 +1,59 @@
+import shutil
+import numpy as np
+import pytest
+from conftest import read_bytes
+
+pytest.importorskip("scipy")
+from metabarcoding_taxonomy import TaxonomyStatistics  # noqa: E402
+from metabarcoding_taxonomy.abundance import top_abundance  # noqa: E402
+from metabarcoding_taxonomy.tables import LevelTable  # noqa: E402
+
+
+def test_sparse_csv_reader_matches_dense(levels_dir):
+    fp = f"{levels_dir}/level-7.csv"
+    dense = LevelTable.from_csv(fp)
+    sparse = LevelTable.from_csv(fp, backend="sparse")
+    assert sparse.is_sparse
+    assert sparse.counts.dtype == dense.counts.dtype
+    assert np.array_equal(sparse.counts.toarray(), dense.counts)
+    assert sparse.samples.equals(dense.samples) and sparse.taxa.equals(dense.taxa)
+
+
+def test_sparse_csv_reader_float_and_blank_lines(tmp_path):
+    fp = tmp_path / "level-2.csv"
+    fp.write_text("index,k__A;p__B,k__A;p__C\n0H,1,0\n\n6H,0,2.5\n\n")
+    table = LevelTable.from_csv(str(fp), backend="sparse")
+    assert table.counts.dtype == np.float64
+    assert np.array_equal(table.counts.toarray(), [[1, 0], [0, 2.5]])
+
+
+def test_sparse_backend_outputs_identical(levels_dir, tmp_path):
+    sparse_dir = str(tmp_path / "sparse")
+    shutil.copytree(levels_dir, sparse_dir)
+    results = {}
+    for folder, backend in ((levels_dir, "dense"), (sparse_dir, "sparse")):
+        stats = TaxonomyStatistics(input_dir=folder, backend=backend, incremental=False)
+        stats.process_all_files()
+        results[backend] = (stats.compute_unclassified_stats(),
+                            stats.compute_taxa_counts())
+    outputs = read_bytes(levels_dir)
+    assert len(outputs) == 21
+    assert outputs == read_bytes(sparse_dir)
+    assert results["dense"][0].equals(results["sparse"][0])
+    assert results["dense"][1].equals(results["sparse"][1])
+
+
+def test_zero_total_sample_is_nan_on_both_backends():
+    counts = np.array([[2, 0, 2], [0, 0, 0], [0, 3, 1]])
+    dense = LevelTable(["A", "B", "C"], ["t1", "t2", "t3"], counts)
+    tables = {"dense": dense, "sparse": dense.to_sparse()}
+    dense_rel, dense_means = tables["dense"].relative_abundance()
+    sparse_rel, sparse_means = tables["sparse"].relative_abundance()
+    assert np.isnan(dense_rel[1]).all()
+    np.testing.assert_array_equal(sparse_rel.toarray(), dense_rel)
+    np.testing.assert_allclose(sparse_means, dense_means)
+    np.testing.assert_allclose(dense_means, [25, 37.5, 37.5])
+
+    views = {b: top_abundance(t, 2) for b, t in tables.items()}
+    np.testing.assert_array_equal(views["sparse"].values, views["dense"].values)
+    assert np.isnan(views["sparse"].values[1, :2]).all()
@@ -0,0 +1,38 @@
+import os, shutil
+import numpy as np
+import pandas as pd
+from conftest import read_bytes
+from metabarcoding_taxonomy import TaxonomyFilter
+from metabarcoding_taxonomy.tables import LevelTable, count_rows
+
+CSV = ('index,k__A;p__B,k__A;p__uncultured\n'
+       '"0H\nrep",1,2\n'
+       '6H,3,0\n'
+       '\n'
+       '12H,0,5\n'
+       '\n')
+
+
+def test_count_rows_matches_pandas(tmp_path):
+    fp = tmp_path / "level-2.csv"
+    fp.write_text(CSV)
+    assert count_rows(str(fp)) == len(pd.read_csv(fp)) == 3
+
+
+def test_streamed_npy_output_with_blank_and_quoted_lines(tmp_path):
+    fp = tmp_path / "level-2.csv"
+    fp.write_text(CSV)
+    TaxonomyFilter(input_dir=str(tmp_path), chunksize=2, formats=("csv", "npy"),
+                   incremental=False).process_all_files()
+    npy = LevelTable.from_npy(os.path.join(tmp_path, "level-2_retained.arrays"))
+    assert npy.samples.tolist() == ["0H\nrep", "6H", "12H"]
+    assert np.array_equal(npy.counts, [[1], [3], [0]])
+
+
+def test_streamed_outputs_match_in_memory(levels_dir, tmp_path):
+    streamed_dir = str(tmp_path / "streamed")
+    shutil.copytree(levels_dir, streamed_dir)
+    TaxonomyFilter(input_dir=levels_dir, incremental=False).process_all_files()
+    TaxonomyFilter(input_dir=streamed_dir, chunksize=2,
+                   incremental=False).process_all_files()
+    assert read_bytes(streamed_dir) == read_bytes(levels_dir)
@@ -0,0 +1,20 @@
+import shutil
+import pytest
+from conftest import read_bytes
+from metabarcoding_taxonomy import MetabarcodingWorkflow
+
+
+def _outputs(folder: str) -> dict[str, bytes]:
+    return {**read_bytes(folder), **read_bytes(folder, ".pdf")}
+
+
+@pytest.mark.parametrize("workers, executor", [(2, "process"), (3, "thread")])
+def test_parallel_outputs_match_serial(levels_dir, tmp_path, workers, executor):
+    parallel_dir = str(tmp_path / executor)
+    shutil.copytree(levels_dir, parallel_dir)
+    MetabarcodingWorkflow(input_dir=levels_dir, incremental=False).run_all()
+    MetabarcodingWorkflow(input_dir=parallel_dir, incremental=False,
+                          workers=workers, executor=executor).run_all()
+    serial = _outputs(levels_dir)
+    assert any(name.endswith(".pdf") for name in serial)
+    assert _outputs(parallel_dir) == serial